@@ -9,12 +9,24 @@ from datetime import datetime, timezone
 
 import redis
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 
+import instrumentation
+import profiler
+from instrumentation import timed
+from history import (
+    build_history, compact_search_results,
+    compact_movie_detail, stub_tool_response
+)
+from llm_governor import (
+    LLMGovernor, LLMOverloadedError,
+    PRIORITY_CONTINUATION, PRIORITY_NEW
+)
+
 load_dotenv()
 
 logging.basicConfig(
@@ -25,6 +37,8 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrumentation.init_app(app)
+profiler.init_app(app)
 
 # --- Required env vars ---
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
@@ -60,9 +74,29 @@ AI_CHAT_MAX_REQUESTS = int(os.getenv('AI_CHAT_MAX_REQUESTS', '10'))
 AI_CHAT_WINDOW_SECONDS = int(os.getenv('AI_CHAT_WINDOW_SECONDS', '60'))
 AI_CHAT_DAILY_LIMIT = int(os.getenv('AI_CHAT_DAILY_LIMIT', '100'))
 AI_CHAT_IDLE_TIMEOUT_MINUTES = int(os.getenv('AI_CHAT_IDLE_TIMEOUT_MINUTES', '5'))
+# 'sliding_window' (exact, one ZSET member per request) or, opt-in, 'token_bucket'
+# (O(1) memory per user, but allows a burst of AI_CHAT_MAX_REQUESTS then refills
+# steadily instead of counting the last AI_CHAT_WINDOW_SECONDS)
+AI_CHAT_RATE_LIMIT_ALGORITHM = os.getenv('AI_CHAT_RATE_LIMIT_ALGORITHM', 'sliding_window')
 
 MAX_TOOL_CALL_ROUNDS = 5
 
+# Prompt budget for prior conversation turns (estimated tokens)
+AI_CHAT_HISTORY_MAX_MESSAGES = int(os.getenv('AI_CHAT_HISTORY_MAX_MESSAGES', '20'))
+AI_CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('AI_CHAT_HISTORY_TOKEN_BUDGET', '1200'))
+AI_CHAT_HISTORY_MESSAGE_TOKENS = int(os.getenv('AI_CHAT_HISTORY_MESSAGE_TOKENS', '300'))
+
+# --- LLM admission control (bounded concurrency + priority wait queue) ---
+LLM_REQUEST_DEADLINE_SECONDS = float(os.getenv('LLM_REQUEST_DEADLINE_SECONDS', '45'))
+
+llm_governor = LLMGovernor(
+    initial_limit=int(os.getenv('LLM_INITIAL_CONCURRENCY', '4')),
+    min_limit=int(os.getenv('LLM_MIN_CONCURRENCY', '1')),
+    max_limit=int(os.getenv('LLM_MAX_CONCURRENCY', '16')),
+    max_queue=int(os.getenv('LLM_MAX_QUEUE', '32')),
+    target_latency=float(os.getenv('LLM_TARGET_LATENCY_SECONDS', '10'))
+)
+
 # --- Redis connection pool (single pool, reused across requests) ---
 redis_pool = redis.ConnectionPool(
     host=REDIS_HOST,
@@ -98,10 +132,11 @@ def send_heartbeat():
         return
 
     try:
-        response = requests.post(
-            f"{LAMBDA_API_URL}/heartbeat",
-            timeout=5
-        )
+        with timed('control_lambda', 'heartbeat'):
+            response = requests.post(
+                f"{LAMBDA_API_URL}/heartbeat",
+                timeout=5
+            )
         if response.status_code == 200:
             with _heartbeat_lock:
                 _last_heartbeat = datetime.now(timezone.utc)
@@ -112,16 +147,21 @@ def send_heartbeat():
         logger.error(f"Error sending heartbeat: {e}")
 
 
-# --- Rate limiter with Lua script (atomic) ---
+# --- Rate limiter with Lua script (atomic, also records activity) ---
+# Both scripts take KEYS = [<limit keys...>, activity_key] and
+# ARGV = [max_requests, window, max_daily, daily_window, now, user_id, idle_window].
 RATE_LIMIT_LUA = """
 local short_key = KEYS[1]
 local daily_key = KEYS[2]
+local activity_key = KEYS[3]
 
 local max_requests = tonumber(ARGV[1])
 local window = tonumber(ARGV[2])
 local max_daily_requests = tonumber(ARGV[3])
 local daily_window = tonumber(ARGV[4])
 local now = tonumber(ARGV[5])
+local user_id = ARGV[6]
+local idle_window = tonumber(ARGV[7])
 
 -- Check short-term limit
 redis.call('ZREMRANGEBYSCORE', short_key, 0, now - window)
@@ -157,81 +197,198 @@ redis.call('EXPIRE', short_key, window)
 redis.call('ZADD', daily_key, now, req_id)
 redis.call('EXPIRE', daily_key, daily_window)
 
+-- Record activity
+redis.call('ZADD', activity_key, now, user_id)
+redis.call('ZREMRANGEBYSCORE', activity_key, 0, now - idle_window)
+redis.call('EXPIRE', activity_key, idle_window)
+
 local remaining = max_requests - short_count - 1
 return {1, remaining, now + window, 'ok'}
 """
 
+# Token bucket variant: one hash per user (short tokens, daily tokens, last
+# refill time) instead of one ZSET member per request.
+TOKEN_BUCKET_LUA = """
+local bucket_key = KEYS[1]
+local activity_key = KEYS[2]
 
-def check_rate_limit(user_id):
-    r = get_redis_client()
-    if not r:
-        return {'allowed': True, 'remaining': AI_CHAT_MAX_REQUESTS}
+local max_requests = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local max_daily_requests = tonumber(ARGV[3])
+local daily_window = tonumber(ARGV[4])
+local now = tonumber(ARGV[5])
+local user_id = ARGV[6]
+local idle_window = tonumber(ARGV[7])
+
+local short_rate = max_requests / window
+local daily_rate = max_daily_requests / daily_window
+
+local state = redis.call('HMGET', bucket_key, 'short', 'daily', 'ts')
+local short_tokens = tonumber(state[1]) or max_requests
+local daily_tokens = tonumber(state[2]) or max_daily_requests
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+
+short_tokens = math.min(max_requests, short_tokens + elapsed * short_rate)
+daily_tokens = math.min(max_daily_requests, daily_tokens + elapsed * daily_rate)
+
+local allowed = 1
+local limit_type = 'ok'
+local reset_at = now + window
+
+if short_tokens < 1 then
+    allowed = 0
+    limit_type = 'minute'
+    reset_at = now + (1 - short_tokens) / short_rate
+elseif daily_tokens < 1 then
+    allowed = 0
+    limit_type = 'daily'
+    reset_at = now + (1 - daily_tokens) / daily_rate
+else
+    short_tokens = short_tokens - 1
+    daily_tokens = daily_tokens - 1
+end
 
-    short_key = f"ai_chat_rate_limit:{user_id}"
-    daily_key = f"ai_chat_daily_limit:{user_id}"
-    current_time = time.time()
-    
+redis.call('HSET', bucket_key, 'short', short_tokens, 'daily', daily_tokens, 'ts', now)
+redis.call('EXPIRE', bucket_key, daily_window)
+
+if allowed == 0 then
+    return {0, 0, math.ceil(reset_at), limit_type}
+end
+
+-- Record activity
+redis.call('ZADD', activity_key, now, user_id)
+redis.call('ZREMRANGEBYSCORE', activity_key, 0, now - idle_window)
+redis.call('EXPIRE', activity_key, idle_window)
+
+return {1, math.floor(short_tokens), math.ceil(reset_at), 'ok'}
+"""
+
+ACTIVITY_KEY = "ai_chat_activity"
+
+# Scripts are sent with EVALSHA; redis-py loads them (SCRIPT LOAD) on the
+# first NOSCRIPT reply, so the Lua source crosses the wire once per server.
+_script_client = redis.Redis(connection_pool=redis_pool)
+rate_limit_scripts = {
+    'sliding_window': _script_client.register_script(RATE_LIMIT_LUA),
+    'token_bucket': _script_client.register_script(TOKEN_BUCKET_LUA),
+}
+
+
+def rate_limit_call(user_id, current_time):
+    """Return (script_name, keys, args) for the configured rate-limit algorithm."""
     # 24 hours in seconds
     daily_window = 24 * 60 * 60
 
-    try:
-        result = r.eval(
-            RATE_LIMIT_LUA, 2, short_key, daily_key,
-            AI_CHAT_MAX_REQUESTS, AI_CHAT_WINDOW_SECONDS, 
-            AI_CHAT_DAILY_LIMIT, daily_window, current_time
-        )
+    if AI_CHAT_RATE_LIMIT_ALGORITHM == 'token_bucket':
+        script = 'token_bucket'
+        keys = [f"ai_chat_bucket:{user_id}", ACTIVITY_KEY]
+    else:
+        script = 'sliding_window'
+        keys = [f"ai_chat_rate_limit:{user_id}", f"ai_chat_daily_limit:{user_id}", ACTIVITY_KEY]
+
+    args = [
+        AI_CHAT_MAX_REQUESTS, AI_CHAT_WINDOW_SECONDS,
+        AI_CHAT_DAILY_LIMIT, daily_window, current_time,
+        user_id, AI_CHAT_IDLE_TIMEOUT_MINUTES * 60
+    ]
+    return script, keys, args
 
-        allowed = int(result[0]) == 1
-        remaining = max(0, int(result[1]))
-        reset_at = int(result[2])
-        limit_type = result[3]
-
-        if not allowed:
-            remaining_seconds = reset_at - int(current_time)
-            msg = f'Rate limit exceeded. Try again in {remaining_seconds} seconds.'
-            if limit_type == 'daily':
-                hours = remaining_seconds // 3600
-                mins = (remaining_seconds % 3600) // 60
-                msg = f'Daily limit reached ({AI_CHAT_DAILY_LIMIT} messages). Try again in {hours}h {mins}m.'
-            
-            return {
-                'allowed': False,
-                'remaining': 0,
-                'reset_at': reset_at,
-                'message': msg
-            }
+
+def parse_rate_limit_result(result, current_time):
+    allowed = int(result[0]) == 1
+    remaining = max(0, int(result[1]))
+    reset_at = int(result[2])
+    limit_type = result[3]
+
+    if not allowed:
+        remaining_seconds = reset_at - int(current_time)
+        msg = f'Rate limit exceeded. Try again in {remaining_seconds} seconds.'
+        if limit_type == 'daily':
+            hours = remaining_seconds // 3600
+            mins = (remaining_seconds % 3600) // 60
+            msg = f'Daily limit reached ({AI_CHAT_DAILY_LIMIT} messages). Try again in {hours}h {mins}m.'
 
         return {
-            'allowed': True,
-            'remaining': remaining,
-            'reset_at': reset_at
+            'allowed': False,
+            'remaining': 0,
+            'reset_at': reset_at,
+            'message': msg
         }
-    except Exception as e:
-        logger.error(f"Rate limit check failed: {e}")
-        return {'allowed': True, 'remaining': AI_CHAT_MAX_REQUESTS}
+
+    return {
+        'allowed': True,
+        'remaining': remaining,
+        'reset_at': reset_at
+    }
 
 
-def update_activity(user_id):
+def check_rate_limit(user_id):
+    """Apply rate limits and record activity for user_id in one round trip."""
     r = get_redis_client()
     if not r:
-        return
+        return {'allowed': True, 'remaining': AI_CHAT_MAX_REQUESTS}
+
+    current_time = time.time()
+    script, keys, args = rate_limit_call(user_id, current_time)
 
-    key = f"ai_chat_activity:{user_id}"
     try:
-        r.setex(key, AI_CHAT_IDLE_TIMEOUT_MINUTES * 60, str(time.time()))
+        with timed('redis', 'rate_limit'):
+            result = rate_limit_scripts[script](keys=keys, args=args, client=r)
+        return parse_rate_limit_result(result, current_time)
     except Exception as e:
-        logger.error(f"Failed to update activity: {e}")
+        logger.error(f"Rate limit check failed: {e}")
+        return {'allowed': True, 'remaining': AI_CHAT_MAX_REQUESTS}
+
+
+def queue_activity_summary(pipe, now):
+    idle_window = AI_CHAT_IDLE_TIMEOUT_MINUTES * 60
+    pipe.zremrangebyscore(ACTIVITY_KEY, 0, now - idle_window)
+    pipe.zrevrange(ACTIVITY_KEY, 0, 0, withscores=True)
+    pipe.zcount(ACTIVITY_KEY, now - idle_window, '+inf')
+    return pipe
+
+
+def parse_activity_summary(results):
+    _, latest, active_users = results
+    latest_time = float(latest[0][1]) if latest else 0.0
+    return latest_time, int(active_users)
+
+
+def get_activity_summary(r):
+    """Return (latest_activity_ts, active_users) from the activity sorted set."""
+    pipe = queue_activity_summary(r.pipeline(transaction=False), time.time())
+    with timed('redis', 'activity_summary'):
+        results = pipe.execute()
+    return parse_activity_summary(results)
+
+
+def activity_response(latest_time, active_users):
+    if latest_time > 0:
+        idle_minutes = (time.time() - latest_time) / 60
+        return {
+            'has_activity': True,
+            'last_activity': latest_time,
+            'idle_minutes': round(idle_minutes, 1),
+            'active_users': active_users,
+            'should_shutdown': idle_minutes >= AI_CHAT_IDLE_TIMEOUT_MINUTES
+        }
+
+    return {
+        'has_activity': False,
+        'last_activity': None
+    }
 
 
 # --- Movie API functions ---
 def search_movies(query, limit=10):
     try:
         logger.info(f"Searching movies: query='{query}', limit={limit}")
-        response = requests.get(
-            f"{MOVIE_API_BASE_URL}/api/search",
-            params={'q': query, 'limit': limit},
-            timeout=10
-        )
+        with timed('movie_api', 'search'):
+            response = requests.get(
+                f"{MOVIE_API_BASE_URL}/api/search",
+                params={'q': query, 'limit': limit},
+                timeout=10
+            )
         if response.status_code == 200:
             data = response.json()
             results = data.get('results', [])
@@ -246,10 +403,11 @@ def search_movies(query, limit=10):
 
 def get_movie_details(movie_id):
     try:
-        response = requests.get(
-            f"{MOVIE_API_BASE_URL}/api/movie/{movie_id}",
-            timeout=10
-        )
+        with timed('movie_api', 'movie_detail'):
+            response = requests.get(
+                f"{MOVIE_API_BASE_URL}/api/movie/{movie_id}",
+                timeout=10
+            )
         if response.status_code == 200:
             data = response.json()
             return data.get('movie')
@@ -260,37 +418,47 @@ def get_movie_details(movie_id):
         return None
 
 
+YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+
+
+def youtube_search_params(movie_title, year=None):
+    query = f"{movie_title} trailer"
+    if year:
+        query += f" {year}"
+
+    return {
+        'part': 'id',
+        'q': query,
+        'type': 'video',
+        'maxResults': 1,
+        'key': YOUTUBE_API_KEY,
+        'videoCategoryId': '1'
+    }
+
+
+def parse_youtube_video_id(movie_title, status_code, data):
+    if status_code == 200:
+        items = data.get('items', [])
+        if items:
+            video_id = items[0]['id']['videoId']
+            logger.info(f"Found YouTube trailer for {movie_title}: {video_id}")
+            return video_id
+
+    logger.warning(f"No YouTube trailer found for {movie_title}")
+    return None
+
+
 def search_youtube_trailer(movie_title, year=None):
     if not YOUTUBE_API_KEY:
         logger.warning("YouTube API key not configured")
         return None
 
     try:
-        query = f"{movie_title} trailer"
-        if year:
-            query += f" {year}"
-
-        url = "https://www.googleapis.com/youtube/v3/search"
-        params = {
-            'part': 'id',
-            'q': query,
-            'type': 'video',
-            'maxResults': 1,
-            'key': YOUTUBE_API_KEY,
-            'videoCategoryId': '1'
-        }
-
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            items = data.get('items', [])
-            if items:
-                video_id = items[0]['id']['videoId']
-                logger.info(f"Found YouTube trailer for {movie_title}: {video_id}")
-                return video_id
-
-        logger.warning(f"No YouTube trailer found for {movie_title}")
-        return None
+        params = youtube_search_params(movie_title, year)
+        with timed('youtube', 'search'):
+            response = requests.get(YOUTUBE_SEARCH_URL, params=params, timeout=10)
+        data = response.json() if response.status_code == 200 else {}
+        return parse_youtube_video_id(movie_title, response.status_code, data)
     except Exception as e:
         logger.error(f"Error searching YouTube trailer: {e}")
         return None
@@ -392,9 +560,17 @@ EXAMPLES OF BAD RESPONSES (NEVER DO THIS):
 - Repeating info the UI already shows (rating, year, genre)"""
 
 
-def execute_tool_call(tool_call, movie_results, youtube_trailer_holder, movie_detail_holder):
-    """Execute a single tool call and return a function response Part."""
-    function_name = tool_call.name
+def generate_content(contents, config, priority, deadline):
+    """Call the model through the admission controller."""
+    with llm_governor.slot(priority=priority, deadline=deadline), timed('gemini', 'generate_content'):
+        return client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config
+        )
+
+
+def parse_tool_args(tool_call):
     function_args = {}
     if hasattr(tool_call, 'args'):
         if isinstance(tool_call.args, dict):
@@ -404,60 +580,201 @@ def execute_tool_call(tool_call, movie_results, youtube_trailer_holder, movie_de
                 function_args = dict(tool_call.args)
             except (TypeError, ValueError):
                 function_args = {}
+    return function_args
 
-    if function_name == "search_movies":
-        query = function_args.get('query', '')
-        limit = function_args.get('limit', 5)
-        movies = search_movies(query, limit)
-        movie_results.extend(movies)
-        return types.Part.from_function_response(
-            name=function_name,
-            response={"results": movies, "count": len(movies)}
+
+def function_response_content(responses, stub=False):
+    parts = [
+        types.Part.from_function_response(
+            name=name,
+            response=stub_tool_response(name, response) if stub else response
         )
+        for name, response in responses
+    ]
+    return types.Content(role="user", parts=parts)
 
-    elif function_name == "get_movie_details":
-        movie_id = function_args.get('movie_id')
-        movie = get_movie_details(movie_id)
-        if movie:
-            movie_detail_holder.append(movie)
-            return types.Part.from_function_response(
-                name=function_name,
-                response={"movie": movie}
-            )
-        else:
-            return types.Part.from_function_response(
-                name=function_name,
-                response={"error": "Movie not found", "movie_id": movie_id}
-            )
 
-    elif function_name == "get_youtube_trailer":
-        movie_title = function_args.get('movie_title', '')
-        year = function_args.get('year')
-        video_id = search_youtube_trailer(movie_title, year)
-        if video_id:
-            youtube_trailer_holder.append({
-                'video_id': video_id,
-                'movie_title': movie_title,
-                'year': year
-            })
-            return types.Part.from_function_response(
-                name=function_name,
-                response={
-                    "video_id": video_id,
-                    "youtube_url": f"https://www.youtube.com/watch?v={video_id}",
-                    "embed_url": f"https://www.youtube.com/embed/{video_id}"
-                }
-            )
-        else:
-            return types.Part.from_function_response(
-                name=function_name,
-                response={
-                    "error": "Trailer not found",
-                    "message": f"Could not find YouTube trailer for {movie_title}"
+def build_generation_config():
+    tools = types.Tool(function_declarations=get_available_functions())
+    return types.GenerateContentConfig(
+        tools=[tools],
+        system_instruction=SYSTEM_INSTRUCTION,
+        temperature=0.7,
+        max_output_tokens=1000
+    )
+
+
+class ChatTurn:
+    """State of one /chat request across the tool-call loop.
+
+    Holds no I/O so the threaded Flask view and the asyncio app (asgi.py)
+    drive the same prompt/response bookkeeping with their own clients.
+    """
+
+    def __init__(self, user_message, conversation_history):
+        history = build_history(
+            conversation_history[-AI_CHAT_HISTORY_MAX_MESSAGES:],
+            token_budget=AI_CHAT_HISTORY_TOKEN_BUDGET,
+            max_message_tokens=AI_CHAT_HISTORY_MESSAGE_TOKENS
+        )
+        self.contents = [
+            types.Content(role=role, parts=[types.Part(text=text)])
+            for role, text in history
+        ]
+        self.contents.append(types.Content(role="user", parts=[types.Part(text=user_message)]))
+
+        # Accumulators for structured response data
+        self.movie_results = []
+        self.youtube_trailer_holder = []
+        self.movie_detail_holder = []
+        self.assistant_message_content = ""
+        self.total_tool_calls = 0
+        self.previous_round = None  # (index in contents, responses) of the last tool round
+
+    def take_tool_calls(self, response, round_num):
+        """Read a model response; return the tool calls to run (empty = done)."""
+        if not response.candidates or not response.candidates[0].content:
+            return []
+
+        # Extract tool calls and text from response
+        tool_calls = []
+        for part in response.candidates[0].content.parts:
+            if hasattr(part, 'function_call') and part.function_call:
+                tool_calls.append(part.function_call)
+            elif hasattr(part, 'text') and part.text:
+                self.assistant_message_content = part.text
+
+        if tool_calls:
+            self.total_tool_calls += len(tool_calls)
+            logger.info(f"Tool call round {round_num + 1}: {[tc.name for tc in tool_calls]}")
+
+            # Append model's response with function calls
+            self.contents.append(response.candidates[0].content)
+
+        return tool_calls
+
+    def record_tool_result(self, function_name, function_args, result):
+        """Turn a tool's raw result into its (name, response) pair for the model."""
+        if function_name == "search_movies":
+            movies = result or []
+            self.movie_results.extend(movies)
+            return function_name, {"results": compact_search_results(movies), "count": len(movies)}
+
+        elif function_name == "get_movie_details":
+            if result:
+                self.movie_detail_holder.append(result)
+                return function_name, {"movie": compact_movie_detail(result)}
+            return function_name, {"error": "Movie not found", "movie_id": function_args.get('movie_id')}
+
+        elif function_name == "get_youtube_trailer":
+            movie_title = function_args.get('movie_title', '')
+            if result:
+                self.youtube_trailer_holder.append({
+                    'video_id': result,
+                    'movie_title': movie_title,
+                    'year': function_args.get('year')
+                })
+                return function_name, {
+                    "video_id": result,
+                    "youtube_url": f"https://www.youtube.com/watch?v={result}",
+                    "embed_url": f"https://www.youtube.com/embed/{result}"
                 }
-            )
+            return function_name, {
+                "error": "Trailer not found",
+                "message": f"Could not find YouTube trailer for {movie_title}"
+            }
 
-    return None
+        return None
+
+    def add_tool_responses(self, function_responses):
+        """Append this round's tool output; return False when there is none."""
+        function_responses = [r for r in function_responses if r]
+        if not function_responses:
+            return False
+
+        # Earlier rounds' payloads were already consumed; resend them as stubs
+        if self.previous_round:
+            index, responses = self.previous_round
+            self.contents[index] = function_response_content(responses, stub=True)
+
+        self.contents.append(function_response_content(function_responses))
+        self.previous_round = (len(self.contents) - 1, function_responses)
+        return True
+
+    def needs_final_response(self):
+        # If we exited the loop after tool calls, get final text response
+        return self.total_tool_calls > 0 and not self.assistant_message_content
+
+    def take_final_response(self, response):
+        if response.candidates and response.candidates[0].content:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'text') and part.text:
+                    self.assistant_message_content = part.text
+
+    def fallback_title(self):
+        """Title the model mentioned in [brackets] without searching for it."""
+        if self.movie_results or not self.assistant_message_content:
+            return None
+        matches = re.findall(r'\[([^\]]+)\]', self.assistant_message_content)
+        if matches:
+            logger.info(f"Fallback search triggered for unsearched title: {matches[0]}")
+            return matches[0]
+        return None
+
+    def result(self, rate_limit_check):
+        return {
+            'message': self.assistant_message_content,
+            'movie_results': self.movie_results,
+            'movie_detail': self.movie_detail_holder[-1] if self.movie_detail_holder else None,
+            'youtube_trailer': self.youtube_trailer_holder[-1] if self.youtube_trailer_holder else None,
+            'tool_calls': self.total_tool_calls > 0,
+            'rate_limit': {
+                'remaining': rate_limit_check.get('remaining', 0),
+                'reset_at': rate_limit_check.get('reset_at')
+            }
+        }
+
+
+def get_user_id(headers, remote_addr):
+    forwarded_for = headers.get('X-Forwarded-For', '')
+    if forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr or 'unknown'
+
+
+def rate_limited_body(rate_limit_check):
+    return {
+        'error': 'Rate limit exceeded',
+        'message': rate_limit_check.get('message', 'Too many requests'),
+        'reset_at': rate_limit_check.get('reset_at'),
+        'remaining': 0
+    }
+
+
+def overloaded_body(e):
+    logger.warning(f"Chat rejected: {e.reason}, retry after {e.retry_after}s")
+    return {
+        'error': 'Service busy',
+        'message': 'Guidy is handling a lot of requests right now. Please try again shortly.',
+        'retry_after': e.retry_after
+    }
+
+
+def execute_tool_call(tool_call, turn):
+    """Execute a single tool call and return its (name, response) pair."""
+    function_name = tool_call.name
+    function_args = parse_tool_args(tool_call)
+
+    if function_name == "search_movies":
+        result = search_movies(function_args.get('query', ''), function_args.get('limit', 5))
+    elif function_name == "get_movie_details":
+        result = get_movie_details(function_args.get('movie_id'))
+    elif function_name == "get_youtube_trailer":
+        result = search_youtube_trailer(function_args.get('movie_title', ''), function_args.get('year'))
+    else:
+        return None
+
+    return turn.record_tool_result(function_name, function_args, result)
 
 
 @app.route('/health', methods=['GET'])
@@ -480,125 +797,45 @@ def chat():
         if not user_message:
             return jsonify({'error': 'Message is required'}), 400
 
-        forwarded_for = request.headers.get('X-Forwarded-For', '')
-        if forwarded_for:
-            user_id = forwarded_for.split(',')[0].strip()
-        else:
-            user_id = request.remote_addr or 'unknown'
+        user_id = get_user_id(request.headers, request.remote_addr)
 
         rate_limit_check = check_rate_limit(user_id)
         if not rate_limit_check.get('allowed', True):
-            return jsonify({
-                'error': 'Rate limit exceeded',
-                'message': rate_limit_check.get('message', 'Too many requests'),
-                'reset_at': rate_limit_check.get('reset_at'),
-                'remaining': 0
-            }), 429
-
-        update_activity(user_id)
-
-        tools = types.Tool(function_declarations=get_available_functions())
-        config = types.GenerateContentConfig(
-            tools=[tools],
-            system_instruction=SYSTEM_INSTRUCTION,
-            temperature=0.7,
-            max_output_tokens=1000
-        )
-
-        contents = []
-        for msg in conversation_history[-10:]:
-            role = msg.get('role', 'user')
-            content = msg.get('content', '')
-            if role == 'user':
-                contents.append(types.Content(role="user", parts=[types.Part(text=content)]))
-            elif role == 'assistant':
-                contents.append(types.Content(role="model", parts=[types.Part(text=content)]))
-
-        contents.append(types.Content(role="user", parts=[types.Part(text=user_message)]))
+            return jsonify(rate_limited_body(rate_limit_check)), 429
 
-        # Accumulators for structured response data
-        movie_results = []
-        youtube_trailer_holder = []
-        movie_detail_holder = []
-        assistant_message_content = ""
-        total_tool_calls = 0
+        config = build_generation_config()
+        turn = ChatTurn(user_message, conversation_history)
+        deadline = time.monotonic() + LLM_REQUEST_DEADLINE_SECONDS
 
         # Multi-round tool call loop
         for round_num in range(MAX_TOOL_CALL_ROUNDS):
-            response = client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=contents,
-                config=config
-            )
-
-            if not response.candidates or not response.candidates[0].content:
-                break
-
-            # Extract tool calls and text from response
-            tool_calls = []
-            for part in response.candidates[0].content.parts:
-                if hasattr(part, 'function_call') and part.function_call:
-                    tool_calls.append(part.function_call)
-                elif hasattr(part, 'text') and part.text:
-                    assistant_message_content = part.text
+            priority = PRIORITY_NEW if round_num == 0 else PRIORITY_CONTINUATION
+            response = generate_content(turn.contents, config, priority, deadline)
 
+            tool_calls = turn.take_tool_calls(response, round_num)
             if not tool_calls:
                 break
 
-            total_tool_calls += len(tool_calls)
-            logger.info(f"Tool call round {round_num + 1}: {[tc.name for tc in tool_calls]}")
-
-            # Append model's response with function calls
-            contents.append(response.candidates[0].content)
-
             # Execute all tool calls and collect responses
-            function_response_parts = []
-            for tool_call in tool_calls:
-                part = execute_tool_call(
-                    tool_call, movie_results,
-                    youtube_trailer_holder, movie_detail_holder
-                )
-                if part:
-                    function_response_parts.append(part)
-
-            if function_response_parts:
-                contents.append(types.Content(role="user", parts=function_response_parts))
-            else:
+            function_responses = [execute_tool_call(tool_call, turn) for tool_call in tool_calls]
+            if not turn.add_tool_responses(function_responses):
                 break
 
-        # If we exited the loop after tool calls, get final text response
-        if total_tool_calls > 0 and not assistant_message_content:
-            final_response = client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=contents,
-                config=config
-            )
-            if final_response.candidates and final_response.candidates[0].content:
-                for part in final_response.candidates[0].content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        assistant_message_content = part.text
+        if turn.needs_final_response():
+            final_response = generate_content(turn.contents, config, PRIORITY_CONTINUATION, deadline)
+            turn.take_final_response(final_response)
 
         # Fallback: if model generated text with [movie] but didn't actually call search
-        if not movie_results and assistant_message_content:
-            matches = re.findall(r'\[([^\]]+)\]', assistant_message_content)
-            if matches:
-                fallback_title = matches[0]
-                logger.info(f"Fallback search triggered for unsearched title: {fallback_title}")
-                movies = search_movies(fallback_title, limit=5)
-                if movies:
-                    movie_results.extend(movies)
+        fallback_title = turn.fallback_title()
+        if fallback_title:
+            turn.movie_results.extend(search_movies(fallback_title, limit=5))
 
-        return jsonify({
-            'message': assistant_message_content,
-            'movie_results': movie_results,
-            'movie_detail': movie_detail_holder[-1] if movie_detail_holder else None,
-            'youtube_trailer': youtube_trailer_holder[-1] if youtube_trailer_holder else None,
-            'tool_calls': total_tool_calls > 0,
-            'rate_limit': {
-                'remaining': rate_limit_check.get('remaining', 0),
-                'reset_at': rate_limit_check.get('reset_at')
-            }
-        }), 200
+        return jsonify(turn.result(rate_limit_check)), 200
+
+    except LLMOverloadedError as e:
+        response = jsonify(overloaded_body(e))
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
 
     except Exception as e:
         logger.error(f"Chat error: {e}", exc_info=True)
@@ -608,6 +845,17 @@ def chat():
         }), 500
 
 
+@app.route('/llm/stats', methods=['GET'])
+def llm_stats():
+    return jsonify(llm_governor.stats()), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    body, content_type = instrumentation.metrics_payload()
+    return Response(body, mimetype=content_type)
+
+
 @app.route('/heartbeat', methods=['POST'])
 def heartbeat():
     send_heartbeat()
@@ -627,35 +875,8 @@ def check_activity():
         }), 200
 
     try:
-        latest_time = 0.0
-        cursor = 0
-        while True:
-            cursor, keys = r.scan(cursor=cursor, match="ai_chat_activity:*", count=100)
-            for key in keys:
-                value = r.get(key)
-                if value:
-                    try:
-                        latest_time = max(latest_time, float(value))
-                    except ValueError:
-                        continue
-            if cursor == 0:
-                break
-
-        if latest_time > 0:
-            current_time = time.time()
-            idle_minutes = (current_time - latest_time) / 60
-
-            return jsonify({
-                'has_activity': True,
-                'last_activity': latest_time,
-                'idle_minutes': round(idle_minutes, 1),
-                'should_shutdown': idle_minutes >= AI_CHAT_IDLE_TIMEOUT_MINUTES
-            }), 200
-
-        return jsonify({
-            'has_activity': False,
-            'last_activity': None
-        }), 200
+        latest_time, active_users = get_activity_summary(r)
+        return jsonify(activity_response(latest_time, active_users)), 200
 
     except Exception as e:
         logger.error(f"Activity check failed: {e}")
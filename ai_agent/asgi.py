@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Async (ASGI) serving mode for the AI agent.
+
+Same routes and response shapes as the Flask app in app.py, but every I/O
+path is non-blocking: Gemini via client.aio, Redis via redis.asyncio and
+the movie API / YouTube / heartbeat via httpx. One worker process holds
+hundreds of in-flight chats instead of one thread per chat.
+
+Run with:
+    gunicorn -k uvicorn.workers.UvicornWorker --workers N asgi:app
+or  python asgi.py   (uses AI_AGENT_WORKERS / AI_AGENT_PORT)
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timezone
+
+import httpx
+import redis.asyncio as aioredis
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+import app as agent
+import instrumentation
+import profiler
+from instrumentation import ServerTimingMiddleware, timed
+from llm_governor import (
+    AsyncLLMGovernor, LLMOverloadedError,
+    PRIORITY_CONTINUATION, PRIORITY_NEW
+)
+
+logger = logging.getLogger(__name__)
+
+AI_AGENT_WORKERS = int(os.getenv('AI_AGENT_WORKERS', '2'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('AI_AGENT_HTTP_MAX_CONNECTIONS', '100'))
+
+HEARTBEAT_LEASE_KEY = 'ai_agent:heartbeat:sender'
+
+llm_governor = AsyncLLMGovernor(
+    initial_limit=agent.llm_governor.limit,
+    min_limit=agent.llm_governor.min_limit,
+    max_limit=agent.llm_governor.max_limit,
+    max_queue=agent.llm_governor.max_queue,
+    target_latency=agent.llm_governor.target_latency
+)
+
+# Created per worker process in lifespan(); connections must not cross forks.
+_state = {'http': None, 'redis': None, 'scripts': None, 'last_heartbeat': datetime.now(timezone.utc)}
+
+
+# --- Redis ---
+
+def get_redis_client():
+    return _state['redis']
+
+
+async def check_rate_limit(user_id):
+    r = get_redis_client()
+    if not r:
+        return {'allowed': True, 'remaining': agent.AI_CHAT_MAX_REQUESTS}
+
+    current_time = time.time()
+    script, keys, args = agent.rate_limit_call(user_id, current_time)
+
+    try:
+        with timed('redis', 'rate_limit'):
+            result = await _state['scripts'][script](keys=keys, args=args, client=r)
+        return agent.parse_rate_limit_result(result, current_time)
+    except Exception as e:
+        logger.error(f"Rate limit check failed: {e}")
+        return {'allowed': True, 'remaining': agent.AI_CHAT_MAX_REQUESTS}
+
+
+# --- Outbound HTTP ---
+
+async def send_heartbeat():
+    if not agent.LAMBDA_API_URL:
+        return
+
+    try:
+        with timed('control_lambda', 'heartbeat'):
+            response = await _state['http'].post(f"{agent.LAMBDA_API_URL}/heartbeat", timeout=5)
+        if response.status_code == 200:
+            _state['last_heartbeat'] = datetime.now(timezone.utc)
+            logger.info("Heartbeat sent successfully")
+        else:
+            logger.warning(f"Heartbeat failed with status {response.status_code}")
+    except Exception as e:
+        logger.error(f"Error sending heartbeat: {e}")
+
+
+async def is_heartbeat_sender():
+    """Whether this worker holds the heartbeat lease (one sender per container).
+
+    The lease outlives a few intervals so it stays with one worker; if that
+    worker exits, another takes over once it expires. Without Redis every
+    worker sends, which is harmless (the Lambda only records the time).
+    """
+    r = get_redis_client()
+    if not r:
+        return True
+
+    ttl = agent.HEARTBEAT_INTERVAL_SECONDS * 3
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        if await r.set(HEARTBEAT_LEASE_KEY, worker_id, nx=True, ex=ttl):
+            return True
+        if await r.get(HEARTBEAT_LEASE_KEY) == worker_id:
+            await r.expire(HEARTBEAT_LEASE_KEY, ttl)
+            return True
+        return False
+    except Exception as e:
+        logger.error(f"Heartbeat lease check failed: {e}")
+        return True
+
+
+async def heartbeat_worker():
+    while True:
+        await asyncio.sleep(agent.HEARTBEAT_INTERVAL_SECONDS)
+        if await is_heartbeat_sender():
+            await send_heartbeat()
+
+
+async def search_movies(query, limit=10):
+    try:
+        logger.info(f"Searching movies: query='{query}', limit={limit}")
+        with timed('movie_api', 'search'):
+            response = await _state['http'].get(
+                f"{agent.MOVIE_API_BASE_URL}/api/search",
+                params={'q': query, 'limit': limit},
+                timeout=10
+            )
+        if response.status_code == 200:
+            results = response.json().get('results', [])
+            logger.info(f"Search returned {len(results)} results for query='{query}'")
+            return results
+        logger.error(f"Search API returned {response.status_code}")
+        return []
+    except Exception as e:
+        logger.error(f"Error searching movies: {e}")
+        return []
+
+
+async def get_movie_details(movie_id):
+    try:
+        with timed('movie_api', 'movie_detail'):
+            response = await _state['http'].get(f"{agent.MOVIE_API_BASE_URL}/api/movie/{movie_id}", timeout=10)
+        if response.status_code == 200:
+            return response.json().get('movie')
+        logger.error(f"Movie details API returned {response.status_code}")
+        return None
+    except Exception as e:
+        logger.error(f"Error getting movie details: {e}")
+        return None
+
+
+async def search_youtube_trailer(movie_title, year=None):
+    if not agent.YOUTUBE_API_KEY:
+        logger.warning("YouTube API key not configured")
+        return None
+
+    try:
+        with timed('youtube', 'search'):
+            response = await _state['http'].get(
+                agent.YOUTUBE_SEARCH_URL,
+                params=agent.youtube_search_params(movie_title, year),
+                timeout=10
+            )
+        data = response.json() if response.status_code == 200 else {}
+        return agent.parse_youtube_video_id(movie_title, response.status_code, data)
+    except Exception as e:
+        logger.error(f"Error searching YouTube trailer: {e}")
+        return None
+
+
+async def run_tool_call(tool_call):
+    """Run one tool call; return (name, args, raw result) or None if unknown."""
+    function_name = tool_call.name
+    function_args = agent.parse_tool_args(tool_call)
+
+    if function_name == "search_movies":
+        result = await search_movies(function_args.get('query', ''), function_args.get('limit', 5))
+    elif function_name == "get_movie_details":
+        result = await get_movie_details(function_args.get('movie_id'))
+    elif function_name == "get_youtube_trailer":
+        result = await search_youtube_trailer(function_args.get('movie_title', ''), function_args.get('year'))
+    else:
+        return None
+
+    return function_name, function_args, result
+
+
+# --- Gemini ---
+
+async def generate_content(contents, config, priority, deadline):
+    async with llm_governor.slot(priority=priority, deadline=deadline):
+        with timed('gemini', 'generate_content'):
+            return await agent.client.aio.models.generate_content(
+                model=agent.GEMINI_MODEL,
+                contents=contents,
+                config=config
+            )
+
+
+# --- Routes ---
+
+async def health(request):
+    return JSONResponse({
+        'status': 'healthy',
+        'service': 'ai-agent',
+        'version': '1.0.0',
+        'last_heartbeat': _state['last_heartbeat'].isoformat()
+    })
+
+
+async def chat(request):
+    try:
+        data = await request.json()
+        user_message = data.get('message', '').strip()
+        conversation_history = data.get('history', [])
+
+        if not user_message:
+            return JSONResponse({'error': 'Message is required'}, status_code=400)
+
+        remote_addr = request.client.host if request.client else None
+        user_id = agent.get_user_id(request.headers, remote_addr)
+
+        rate_limit_check = await check_rate_limit(user_id)
+        if not rate_limit_check.get('allowed', True):
+            return JSONResponse(agent.rate_limited_body(rate_limit_check), status_code=429)
+
+        config = agent.build_generation_config()
+        turn = agent.ChatTurn(user_message, conversation_history)
+        deadline = time.monotonic() + agent.LLM_REQUEST_DEADLINE_SECONDS
+
+        # Multi-round tool call loop
+        for round_num in range(agent.MAX_TOOL_CALL_ROUNDS):
+            priority = PRIORITY_NEW if round_num == 0 else PRIORITY_CONTINUATION
+            response = await generate_content(turn.contents, config, priority, deadline)
+
+            tool_calls = turn.take_tool_calls(response, round_num)
+            if not tool_calls:
+                break
+
+            # Tool calls within a round are independent; run them concurrently
+            # and record results in call order
+            results = await asyncio.gather(*(run_tool_call(tool_call) for tool_call in tool_calls))
+            function_responses = [turn.record_tool_result(*result) for result in results if result]
+            if not turn.add_tool_responses(function_responses):
+                break
+
+        if turn.needs_final_response():
+            final_response = await generate_content(turn.contents, config, PRIORITY_CONTINUATION, deadline)
+            turn.take_final_response(final_response)
+
+        # Fallback: if model generated text with [movie] but didn't actually call search
+        fallback_title = turn.fallback_title()
+        if fallback_title:
+            turn.movie_results.extend(await search_movies(fallback_title, limit=5))
+
+        return JSONResponse(turn.result(rate_limit_check))
+
+    except LLMOverloadedError as e:
+        return JSONResponse(
+            agent.overloaded_body(e),
+            status_code=503,
+            headers={'Retry-After': str(e.retry_after)}
+        )
+
+    except Exception as e:
+        logger.error(f"Chat error: {e}", exc_info=True)
+        return JSONResponse({
+            'error': 'An error occurred processing your request',
+            'details': str(e)
+        }, status_code=500)
+
+
+async def llm_stats(request):
+    return JSONResponse(llm_governor.stats())
+
+
+async def metrics(request):
+    body, content_type = instrumentation.metrics_payload()
+    return Response(body, media_type=content_type)
+
+
+async def debug_profile(request):
+    if not profiler.authorized(request.headers):
+        return JSONResponse({'error': 'Not found'}, status_code=404)
+
+    # Sample from a worker thread so the event loop thread is in the profile
+    seconds, hz = profiler.profile_params(request.query_params)
+    collapsed = await asyncio.to_thread(profiler.run_profile, seconds, hz)
+    if collapsed is None:
+        return JSONResponse({'error': 'A profile is already running in this worker'}, status_code=409)
+    return PlainTextResponse(collapsed)
+
+
+async def heartbeat(request):
+    await send_heartbeat()
+    return JSONResponse({
+        'status': 'ok',
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    })
+
+
+async def check_activity(request):
+    r = get_redis_client()
+    if not r:
+        return JSONResponse({
+            'has_activity': False,
+            'last_activity': None
+        })
+
+    try:
+        pipe = agent.queue_activity_summary(r.pipeline(transaction=False), time.time())
+        with timed('redis', 'activity_summary'):
+            results = await pipe.execute()
+        latest_time, active_users = agent.parse_activity_summary(results)
+        return JSONResponse(agent.activity_response(latest_time, active_users))
+
+    except Exception as e:
+        logger.error(f"Activity check failed: {e}")
+        return JSONResponse({
+            'has_activity': False,
+            'error': str(e)
+        }, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    _state['http'] = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=20)
+    )
+    _state['redis'] = aioredis.Redis(
+        host=agent.REDIS_HOST,
+        port=agent.REDIS_PORT,
+        db=0,
+        decode_responses=True,
+        socket_timeout=5,
+        max_connections=50
+    )
+    _state['scripts'] = {
+        'sliding_window': _state['redis'].register_script(agent.RATE_LIMIT_LUA),
+        'token_bucket': _state['redis'].register_script(agent.TOKEN_BUCKET_LUA),
+    }
+    heartbeat_task = asyncio.create_task(heartbeat_worker())
+    try:
+        yield
+    finally:
+        heartbeat_task.cancel()
+        await _state['http'].aclose()
+        await _state['redis'].aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health, methods=['GET']),
+        Route('/chat', chat, methods=['POST']),
+        Route('/llm/stats', llm_stats, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/debug/profile', debug_profile, methods=['GET']),
+        Route('/heartbeat', heartbeat, methods=['POST']),
+        Route('/activity/check', check_activity, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(ServerTimingMiddleware),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        'asgi:app',
+        host='0.0.0.0',  # nosec B104 - Required for container/EC2 to accept connections
+        port=int(os.getenv('AI_AGENT_PORT', '5001')),
+        workers=AI_AGENT_WORKERS
+    )
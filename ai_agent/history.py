@@ -0,0 +1,108 @@
+"""Token-budgeted prompt construction for the chat tool loop.
+
+Helpers here work on plain dicts/strings so they stay independent of the
+Gemini SDK types; app.py converts the result into types.Content.
+"""
+
+CHARS_PER_TOKEN = 4
+
+# Fields of a search hit the model needs to pick and name movies. The UI
+# renders the full records from movie_results, not from the model's copy.
+SEARCH_RESULT_FIELDS = ('id', 'title', 'year', 'rating', 'genres', 'director')
+DETAIL_DESCRIPTION_MAX_CHARS = 600
+
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, max_tokens):
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)].rstrip() + '...'
+
+
+def build_history(conversation_history, token_budget, max_message_tokens=300, summary_tokens=150):
+    """Fit prior chat turns into token_budget.
+
+    Returns a list of (role, text) pairs with role in {'user', 'model'}. The
+    newest turns are kept (long ones truncated to max_message_tokens); turns
+    that no longer fit are folded into a single leading summary of the
+    user's earlier requests, capped at summary_tokens.
+    """
+    turns = []
+    for msg in conversation_history:
+        role = msg.get('role', 'user')
+        content = (msg.get('content') or '').strip()
+        if not content:
+            continue
+        if role == 'user':
+            turns.append(('user', content))
+        elif role == 'assistant':
+            turns.append(('model', content))
+
+    kept = []
+    used = 0
+    cutoff = len(turns)
+    for i in range(len(turns) - 1, -1, -1):
+        role, text = turns[i]
+        text = truncate_to_tokens(text, max_message_tokens)
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            break
+        kept.append((role, text))
+        used += cost
+        cutoff = i
+    kept.reverse()
+
+    # Gemini expects the conversation to open with a user turn
+    while kept and kept[0][0] != 'user':
+        kept.pop(0)
+
+    dropped_requests = [text for role, text in turns[:cutoff] if role == 'user']
+    if dropped_requests:
+        summary = 'Earlier in this conversation the user asked: ' + ' | '.join(
+            truncate_to_tokens(text, 25) for text in dropped_requests[-6:]
+        )
+        summary = truncate_to_tokens(summary, summary_tokens)
+        if kept:
+            kept[0] = ('user', f"{summary}\n\n{kept[0][1]}")
+        else:
+            kept.append(('user', summary))
+            kept.append(('model', 'Got it.'))
+
+    return kept
+
+
+def compact_search_results(movies):
+    return [{k: m.get(k) for k in SEARCH_RESULT_FIELDS if m.get(k) is not None} for m in movies]
+
+
+def compact_movie_detail(movie):
+    compact = {k: v for k, v in movie.items() if k != 'poster_filename'}
+    description = compact.get('description')
+    if description and len(description) > DETAIL_DESCRIPTION_MAX_CHARS:
+        compact['description'] = description[:DETAIL_DESCRIPTION_MAX_CHARS].rstrip() + '...'
+    return compact
+
+
+def stub_tool_response(name, response):
+    """Shrink a function response from an earlier tool round.
+
+    The model already reasoned over the full payload; later rounds only need
+    to know what was found.
+    """
+    if 'error' in response:
+        return response
+    if name == 'search_movies':
+        return {
+            'count': response.get('count', 0),
+            'titles': [m.get('title') for m in response.get('results', [])],
+        }
+    if name == 'get_movie_details':
+        movie = response.get('movie') or {}
+        return {'movie': {'id': movie.get('id'), 'title': movie.get('title')}}
+    return response
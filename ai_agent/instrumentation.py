@@ -0,0 +1,130 @@
+"""Per-dependency latency instrumentation for the agent.
+
+`timed(dependency, operation)` records how long a call to Gemini, Redis, the
+movie API, YouTube or the control Lambda took, in the
+ai_agent_dependency_duration_seconds histogram (errors in
+ai_agent_dependency_errors_total). Within a request the calls are also summed
+per dependency and returned as a Server-Timing header; init_app() wires that
+up for the Flask app and ServerTimingMiddleware for the ASGI one. The
+per-request totals live in a ContextVar, so they work for threaded workers
+and for concurrent asyncio tasks alike.
+
+The agent image is built from ai_agent/ alone, so this is a copy of the web
+app's instrumentation.py without Flask's g, tracing or its metrics module;
+tests/test_instrumentation.py keeps server_timing_header() identical.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess
+)
+
+DEPENDENCY_LATENCY = Histogram(
+    'ai_agent_dependency_duration_seconds',
+    'Latency of calls to backing services',
+    ['dependency', 'operation'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 20, 30, 60)
+)
+
+DEPENDENCY_ERRORS = Counter(
+    'ai_agent_dependency_errors_total',
+    'Failed calls to backing services',
+    ['dependency', 'operation']
+)
+
+# {dependency: [seconds, calls]} for the current request, None outside one
+_request_timings = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def timed(dependency, operation):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DEPENDENCY_ERRORS.labels(dependency=dependency, operation=operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        DEPENDENCY_LATENCY.labels(dependency=dependency, operation=operation).observe(elapsed)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            entry = timings.setdefault(dependency, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def server_timing_header(timings, total):
+    parts = []
+    for dependency, (seconds, calls) in sorted(timings.items(), key=lambda item: -item[1][0]):
+        part = f"{dependency};dur={seconds * 1000:.1f}"
+        if calls > 1:
+            part += f';desc="{calls} calls"'
+        parts.append(part)
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ', '.join(parts)
+
+
+def metrics_payload():
+    """(body, content_type) for a /metrics response, aggregating workers if needed."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def init_app(app):
+    from flask import g
+
+    @app.before_request
+    def _start_request_timings():
+        g.request_started = time.perf_counter()
+        _request_timings.set({})
+
+    @app.after_request
+    def _add_server_timing(response):
+        timings = _request_timings.get()
+        if timings is not None and 'request_started' in g:
+            total = time.perf_counter() - g.request_started
+            response.headers['Server-Timing'] = server_timing_header(timings, total)
+        return response
+
+    @app.teardown_request
+    def _clear_request_timings(exc):
+        _request_timings.set(None)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding the Server-Timing header to HTTP responses."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = {}
+        token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                header = server_timing_header(timings, time.perf_counter() - started)
+                message = dict(message)
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'server-timing', header.encode('latin-1'))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
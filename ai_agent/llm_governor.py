@@ -0,0 +1,265 @@
+"""Admission control for outbound LLM calls.
+
+A process-wide governor bounds the number of concurrent model calls, queues
+the overflow in priority/FIFO order with per-request deadlines, rejects fast
+when the queue is full, and adapts the concurrency limit (AIMD) to observed
+latency and 429/quota errors. LLMGovernor serves threaded (WSGI) workers,
+AsyncLLMGovernor serves a single asyncio event loop (ASGI).
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first. Follow-up rounds of a chat that already holds
+# user attention go ahead of brand new chats.
+PRIORITY_CONTINUATION = 0
+PRIORITY_NEW = 1
+
+
+class LLMOverloadedError(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(f"LLM capacity exhausted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('granted', 'enqueued_at')
+
+    def __init__(self):
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+def is_throttling_error(exc):
+    """True for quota / rate-limit responses from the model API."""
+    code = getattr(exc, 'code', None) or getattr(exc, 'status_code', None)
+    if code == 429:
+        return True
+    text = str(exc)
+    return '429' in text or 'RESOURCE_EXHAUSTED' in text
+
+
+class _GovernorState:
+    """Limit bookkeeping shared by the threaded and asyncio governors."""
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=16,
+                 max_queue=32, target_latency=10.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.max_queue = max_queue
+        self.target_latency = target_latency
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._successes_since_change = 0
+
+        self._avg_latency = target_latency / 2
+        self._avg_wait = 0.0
+        self._counters = {
+            'admitted': 0,
+            'rejected_queue_full': 0,
+            'rejected_deadline': 0,
+            'throttled': 0,
+            'errors': 0,
+        }
+
+    def _record(self, latency=None, throttled=False, failed=False):
+        self._in_flight -= 1
+
+        if throttled:
+            self._counters['throttled'] += 1
+            new_limit = max(self.min_limit, self.limit // 2)
+            if new_limit != self.limit:
+                logger.warning(f"LLM throttled, concurrency limit {self.limit} -> {new_limit}")
+            self.limit = new_limit
+            self._successes_since_change = 0
+        elif failed:
+            self._counters['errors'] += 1
+        elif latency is not None:
+            self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+            if self._avg_latency > self.target_latency:
+                if self.limit > self.min_limit:
+                    self.limit -= 1
+                self._successes_since_change = 0
+            else:
+                self._successes_since_change += 1
+                if self._successes_since_change >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes_since_change = 0
+
+    def _record_wait(self, waited):
+        self._avg_wait = 0.8 * self._avg_wait + 0.2 * waited
+
+    def _retry_after(self):
+        # Rough time for the current backlog to drain, in whole seconds.
+        backlog = len(self._queue) + self._in_flight
+        estimate = backlog * self._avg_latency / max(self.limit, 1)
+        return int(min(60, max(1, math.ceil(estimate))))
+
+    def _stats(self):
+        return {
+            'limit': self.limit,
+            'in_flight': self._in_flight,
+            'queued': len(self._queue),
+            'max_queue': self.max_queue,
+            'avg_latency_seconds': round(self._avg_latency, 3),
+            'avg_queue_wait_seconds': round(self._avg_wait, 3),
+            **self._counters,
+        }
+
+
+class LLMGovernor(_GovernorState):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._cond = threading.Condition()
+
+    # --- Admission ---
+
+    def acquire(self, priority=PRIORITY_NEW, deadline=None):
+        """Block until a slot is granted or raise LLMOverloadedError.
+
+        deadline is an absolute time.monotonic() value (None = no deadline).
+        Returns the seconds spent waiting in the queue.
+        """
+        with self._cond:
+            if self._in_flight < self.limit and not self._queue:
+                self._in_flight += 1
+                self._counters['admitted'] += 1
+                return 0.0
+
+            if len(self._queue) >= self.max_queue:
+                self._counters['rejected_queue_full'] += 1
+                raise LLMOverloadedError('queue_full', self._retry_after())
+
+            waiter = _Waiter()
+            entry = (priority, next(self._seq), waiter)
+            heapq.heappush(self._queue, entry)
+
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._counters['rejected_deadline'] += 1
+                    raise LLMOverloadedError('deadline_exceeded', self._retry_after())
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - waiter.enqueued_at
+            self._record_wait(waited)
+            return waited
+
+    def release(self, latency=None, throttled=False, failed=False):
+        with self._cond:
+            self._record(latency, throttled, failed)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_NEW, deadline=None):
+        """Hold a concurrency slot for the duration of one model call."""
+        self.acquire(priority, deadline)
+        start = time.monotonic()
+        outcome = {}
+        try:
+            yield
+            outcome = {'latency': time.monotonic() - start}
+        except Exception as e:
+            outcome = {'throttled': True} if is_throttling_error(e) else {'failed': True}
+            raise
+        finally:
+            # A cancelled call (BaseException) frees its slot but records no outcome
+            self.release(**outcome)
+
+    def _dispatch(self):
+        # Caller holds self._cond
+        granted = False
+        while self._in_flight < self.limit and self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            waiter.granted = True
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return self._stats()
+
+
+class AsyncLLMGovernor(_GovernorState):
+    """Same policy as LLMGovernor for coroutines on one event loop."""
+
+    async def acquire(self, priority=PRIORITY_NEW, deadline=None):
+        if self._in_flight < self.limit and not self._queue:
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+            return 0.0
+
+        if len(self._queue) >= self.max_queue:
+            self._counters['rejected_queue_full'] += 1
+            raise LLMOverloadedError('queue_full', self._retry_after())
+
+        enqueued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._queue, entry)
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._counters['rejected_deadline'] += 1
+                raise LLMOverloadedError('deadline_exceeded', self._retry_after())
+        except asyncio.CancelledError:
+            if future.done():
+                # Slot was granted as we were cancelled; hand it back
+                self.release()
+            else:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            raise
+
+        waited = time.monotonic() - enqueued_at
+        self._record_wait(waited)
+        return waited
+
+    def release(self, latency=None, throttled=False, failed=False):
+        self._record(latency, throttled, failed)
+        while self._in_flight < self.limit and self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            future.set_result(True)
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_NEW, deadline=None):
+        await self.acquire(priority, deadline)
+        start = time.monotonic()
+        outcome = {}
+        try:
+            yield
+            outcome = {'latency': time.monotonic() - start}
+        except Exception as e:
+            outcome = {'throttled': True} if is_throttling_error(e) else {'failed': True}
+            raise
+        finally:
+            # A cancelled call (BaseException) frees its slot but records no outcome
+            self.release(**outcome)
+
+    def stats(self):
+        return self._stats()
@@ -0,0 +1,203 @@
+"""Statistical wall-clock profiler for live workers.
+
+`sample(seconds, hz)` walks every thread's stack via sys._current_frames() at
+`hz` samples per second and returns collapsed stacks
+("thread;outer (file:line);...;leaf (file:line) count" per line), the input
+format of flamegraph.pl / speedscope / inferno. Nothing is instrumented, so
+the cost is a few microseconds per sample and zero when idle.
+
+SlowRequestRecorder keeps sampling only the threads currently serving a
+request and keeps the stacks of requests slower than a threshold.
+
+init_app() adds two routes to the Flask app, both disabled unless
+PROFILER_TOKEN is set and sent back in the X-Profiler-Token header:
+    GET /debug/profile?seconds=N&hz=M   profile this worker for N seconds
+    GET /debug/profile/slow             recent slow-request profiles
+asgi.py exposes /debug/profile the same way, running the sampler in a thread
+so the event loop itself shows up in the stacks. Under gunicorn each call
+profiles only the worker that answers it.
+
+A copy of the web app's profiler.py reading its settings from the
+environment; tests/test_profiler.py keeps the sampler code identical.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+PROFILER_SLOW_REQUEST_MS = int(os.getenv('PROFILER_SLOW_REQUEST_MS', '0'))
+PROFILER_SLOW_REQUEST_HZ = int(os.getenv('PROFILER_SLOW_REQUEST_HZ', '50'))
+
+MAX_SECONDS = 60
+MAX_HZ = 1000
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, thread_name):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ';'.join(reversed(labels))
+
+
+def _thread_names():
+    return {thread.ident: thread.name for thread in threading.enumerate()}
+
+
+def sample(seconds, hz, exclude=()):
+    """Sample all threads (but the caller) for `seconds`; returns Counter of stacks."""
+    interval = 1.0 / hz
+    skip = {threading.get_ident(), *exclude}
+    stacks = Counter()
+    names = _thread_names()
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident in skip:
+                continue
+            if ident not in names:
+                names = _thread_names()
+            stacks[collapse_stack(frame, names.get(ident, f"thread-{ident}"))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks):
+    return '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common()) + '\n'
+
+
+class SlowRequestRecorder:
+    """Samples in-flight request threads; keeps profiles of slow requests."""
+
+    def __init__(self, threshold_ms, hz=50, keep=20):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = 1.0 / hz
+        self.recent = deque(maxlen=keep)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_thread(self):
+        # Started lazily so it is created in each forked worker, not the master
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='slow-request-profiler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse_stack(frame, 'request')] += 1
+
+    def start(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            self._ensure_thread()
+
+    def finish(self, duration, **info):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if stacks is None or duration < self.threshold:
+            return None
+
+        record = dict(info, duration_ms=round(duration * 1000, 1), recorded_at=time.time(),
+                      samples=sum(stacks.values()), stacks=format_collapsed(stacks))
+        self.recent.append(record)
+        return record
+
+
+def authorized(headers):
+    if not PROFILER_TOKEN:
+        return False
+    # Bytes: compare_digest raises TypeError on non-ASCII str
+    return hmac.compare_digest(headers.get('X-Profiler-Token', '').encode(), PROFILER_TOKEN.encode())
+
+
+def profile_params(args):
+    """Clamp ?seconds= and ?hz= from a query-string mapping."""
+    try:
+        seconds = float(args.get('seconds', 10))
+        hz = int(args.get('hz', 100))
+    except (TypeError, ValueError):
+        seconds, hz = 10.0, 100
+    return min(max(seconds, 0.1), MAX_SECONDS), min(max(hz, 1), MAX_HZ)
+
+
+def run_profile(seconds, hz, exclude=()):
+    """Collapsed stacks, or None if a profile is already running."""
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        return format_collapsed(sample(seconds, hz, exclude=exclude))
+    finally:
+        _profile_lock.release()
+
+
+def init_app(app):
+    from flask import Response, abort, g, jsonify, request
+
+    recorder = None
+    if PROFILER_SLOW_REQUEST_MS > 0:
+        recorder = SlowRequestRecorder(PROFILER_SLOW_REQUEST_MS, hz=PROFILER_SLOW_REQUEST_HZ)
+
+        @app.before_request
+        def _start_slow_request_profile():
+            g.profile_started = time.perf_counter()
+            recorder.start()
+
+        @app.teardown_request
+        def _finish_slow_request_profile(exc):
+            started = g.pop('profile_started', None)
+            if started is None:
+                return
+            record = recorder.finish(
+                time.perf_counter() - started,
+                method=request.method,
+                path=request.path,
+                endpoint=request.url_rule.rule if request.url_rule else None
+            )
+            if record:
+                app.logger.warning(
+                    f"Slow request {record['method']} {record['path']}: "
+                    f"{record['duration_ms']}ms ({record['samples']} samples recorded)"
+                )
+
+    @app.route('/debug/profile')
+    def debug_profile():
+        if not authorized(request.headers):
+            abort(404)
+
+        seconds, hz = profile_params(request.args)
+        exclude = (recorder._thread.ident,) if recorder and recorder._thread else ()
+        collapsed = run_profile(seconds, hz, exclude=exclude)
+        if collapsed is None:
+            return jsonify({'error': 'A profile is already running in this worker'}), 409
+        return Response(collapsed, mimetype='text/plain')
+
+    @app.route('/debug/profile/slow')
+    def debug_profile_slow():
+        if not authorized(request.headers):
+            abort(404)
+        return jsonify({
+            'enabled': recorder is not None,
+            'threshold_ms': PROFILER_SLOW_REQUEST_MS,
+            'requests': list(recorder.recent) if recorder else []
+        })
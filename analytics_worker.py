@@ -16,8 +16,13 @@ try:
     print("Importing modules...", flush=True)
     import boto3
     import json
+    import os
     from config import Config
     from database.analytics_db import save_search_analytics
+    import tracing
+
+    if 'TRACE_SERVICE_NAME' not in os.environ:
+        Config.TRACE_SERVICE_NAME = 'analytics-worker'
     print("Imports successful!", flush=True)
 
 except Exception as e:
@@ -27,7 +32,7 @@ except Exception as e:
     sys.exit(1)
 
 
-def process_search_event(event):
+def process_search_event(event, span=None):
     try:
         print(f"Processing: query='{event['query']}' "
               f"results={event['results_count']} "
@@ -39,7 +44,14 @@ def process_search_event(event):
             event['cached']
         )
 
-        print("Saved to database", flush=True)
+        # Enqueue-to-commit lag for this event (timestamp set by send_search_event)
+        lag_ms = (time.time() - event.get('timestamp', time.time())) * 1000
+        if span is not None:
+            span.set_attribute('messaging.enqueue_to_commit_ms', round(lag_ms, 1))
+            trace = f" trace_id={span.trace_id}"
+        else:
+            trace = ""
+        print(f"Saved to database (lag={lag_ms:.0f}ms{trace})", flush=True)
 
     except Exception as e:
         print(f"Processing error: {e}", flush=True)
@@ -97,7 +109,8 @@ def start_worker():
                     QueueUrl=Config.SQS_QUEUE_URL,
                     MaxNumberOfMessages=10,
                     WaitTimeSeconds=20,
-                    VisibilityTimeout=30
+                    VisibilityTimeout=30,
+                    MessageAttributeNames=['All']
                 )
 
                 if 'Messages' not in response:
@@ -110,7 +123,11 @@ def start_worker():
                     try:
                         event = json.loads(message['Body'])
 
-                        process_search_event(event)
+                        with tracing.span('search_event process', 'consumer',
+                                          context=tracing.context_from_sqs(message),
+                                          **{'messaging.system': 'aws_sqs',
+                                             'messaging.message_id': message['MessageId']}) as span:
+                            process_search_event(event, span)
                         message_count += 1
 
                         sqs.delete_message(
@@ -1,10 +1,8 @@
 from flask import Flask, jsonify, request, render_template, Response
 from config import Config
-import boto3
 import os
 import logging
 import json
-import requests as http_requests
 from concurrent.futures import ThreadPoolExecutor
 
 from database.rate_limiter import check_rate_limit, get_rate_limit_status
@@ -13,13 +11,26 @@ from database.movies_db import (
     get_all_movies, log_search_query
 )
 from database.redis_cache import get_cached_search, set_cached_search, get_cache_stats, clear_search_cache
-from database.movie_cache import get_cached_movie, set_cached_movie, clear_movie_cache
+from database.movie_cache import (
+    get_cached_movie, set_cached_movie, clear_movie_cache, get_cached_similar, set_cached_similar
+)
 from database.meilisearch_sync import search_movies_meili
 from database.sqs_analytics import send_search_event
 from database.analytics_db import get_popular_searches, get_search_stats
-
+from database.movie_views import record_view
+from database.connections import get_aws_client, pg_connection
+from cache_warmup import start_background_warmup
+from catalog_events import start_listener
+from catalog_sync import invalidate_changes
+
+from serialization import FastJSONProvider
+import instrumentation
+import profiler
+import startup_status
+import tracing
+from instrumentation import timed
 from metrics import (
-    metrics_endpoint, track_request,
+    metrics_endpoint, init_app as init_request_metrics,
     CACHE_HIT_COUNT, CACHE_MISS_COUNT,
     SEARCH_QUERY_COUNT, SEARCH_RESULTS_COUNT,
     MOVIE_VIEWS
@@ -32,18 +43,41 @@ logging.basicConfig(
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = FastJSONProvider(app)
+tracing.init_app(app)
+instrumentation.init_app(app)
+init_request_metrics(app)
+profiler.init_app(app)
+
+
+# Set once startup is done, so a ready worker stops reading the status file
+_started = False
+
+
+@app.before_request
+def startup_gate():
+    """Answer /api/* with 503 while init_data.py is still migrating and syncing."""
+    global _started
+    if _started or not request.path.startswith('/api/'):
+        return None
+    status = startup_status.read()
+    if startup_status.is_ready(status):
+        _started = True
+        return None
+    return jsonify({'error': 'Service starting'}), 503, {'Retry-After': '5'}
 
 
 # ── Helpers ──
 
 def invoke_lambda(function_name, payload, async_invoke=False):
     """Invoke a Lambda function and return parsed response body."""
-    client = boto3.client('lambda', region_name=Config.AWS_REGION)
-    response = client.invoke(
-        FunctionName=function_name,
-        InvocationType='Event' if async_invoke else 'RequestResponse',
-        Payload=json.dumps(payload)
-    )
+    client = get_aws_client('lambda')
+    with timed('lambda', function_name):
+        response = client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event' if async_invoke else 'RequestResponse',
+            Payload=json.dumps(payload)
+        )
     if async_invoke:
         return {'status': 'ok'}
 
@@ -60,7 +94,6 @@ def invoke_lambda(function_name, payload, async_invoke=False):
 #  Pages
 
 @app.route('/')
-@track_request
 def home():
     return render_template(
         'ai_movies.html',
@@ -88,17 +121,21 @@ def api_similar_movies(movie_id):
     limit = request.args.get('limit', 10, type=int)
     if limit > 20:
         limit = 20
-    movies = get_similar_movies(movie_id, limit)
-    # Remove the 'overlap' field added by the SQL query
-    for m in movies:
-        m.pop('overlap', None)
+
+    movies = get_cached_similar(movie_id, limit)
+    if movies is None:
+        movies = get_similar_movies(movie_id, limit)
+        # Remove the 'overlap' field added by the SQL query
+        for m in movies:
+            m.pop('overlap', None)
+        set_cached_similar(movie_id, limit, movies)
     return jsonify({'movies': movies})
 
 
 @app.route('/movie/<int:movie_id>')
-@track_request
 def movie_detail(movie_id):
-    MOVIE_VIEWS.labels(movie_id=movie_id).inc()
+    MOVIE_VIEWS.inc()
+    record_view(movie_id)
 
     cached_movie, from_cache = get_cached_movie(movie_id)
     if cached_movie and from_cache:
@@ -109,18 +146,34 @@ def movie_detail(movie_id):
         return jsonify({'error': 'Movie not found'}), 404
 
     movie_dict = dict(movie)
-    set_cached_movie(movie_id, movie_dict, ttl=600)
+    set_cached_movie(movie_id, movie_dict)
     return render_template('movie_detail.html', movie=movie_dict, from_cache=False)
 
 
 #  Core API
 
 @app.route('/health')
-@track_request
 def health():
     return jsonify({'status': 'healthy', 'service': 'flask-app', 'version': '1.0.0'})
 
 
+@app.route('/ready')
+def ready():
+    """Readiness, unlike /health: critical startup steps done and Postgres answering."""
+    status = startup_status.read()
+    if not startup_status.is_ready(status):
+        return jsonify({'status': 'starting', 'startup': status}), 503
+
+    try:
+        with pg_connection() as conn, conn.cursor() as cursor:
+            with timed('postgres', 'ready'):
+                cursor.execute('SELECT 1')
+    except Exception as e:
+        logging.warning(f"Readiness check: {e}")
+        return jsonify({'status': 'unavailable', 'startup': status}), 503
+    return jsonify({'status': 'ready', 'startup': status})
+
+
 @app.route('/info')
 def info():
     import sys
@@ -133,7 +186,6 @@ def info():
 
 
 @app.route('/metrics')
-@track_request
 def metrics():
     return metrics_endpoint()
 
@@ -141,11 +193,12 @@ def metrics():
 @app.route('/api/meilisearch/status')
 def meilisearch_status():
     try:
-        from database.meilisearch_sync import get_meili_client
+        from database.meilisearch_sync import get_meili_client, get_reindex_status
         client = get_meili_client()
-        stats = client.get_index('movies').get_stats()
+        with timed('meilisearch', 'get_stats'):
+            stats = client.get_index('movies').get_stats()
         doc_count = stats.get('numberOfDocuments', 0) if isinstance(stats, dict) else getattr(stats, 'number_of_documents', 0)
-        return jsonify({'status': 'ok', 'documents': doc_count})
+        return jsonify({'status': 'ok', 'documents': doc_count, 'reindex': get_reindex_status()})
     except Exception as e:
         logging.warning(f"Meilisearch status check: {e}")
         return jsonify({'status': 'unavailable', 'documents': 0}), 503
@@ -153,12 +206,20 @@ def meilisearch_status():
 
 @app.route('/api/meilisearch/reindex', methods=['POST'])
 def meilisearch_reindex():
+    """Blue/green by default (build a shadow index, swap when complete);
+    ?mode=inplace rewrites the live index synchronously as before."""
     try:
-        from database.meilisearch_sync import index_all_movies
-        result = index_all_movies()
-        if result:
-            return jsonify({'status': 'ok', 'message': 'Reindex started'})
-        return jsonify({'status': 'error', 'message': 'Reindex failed'}), 500
+        from database.meilisearch_sync import index_all_movies, start_background_reindex
+
+        if request.args.get('mode') == 'inplace':
+            if index_all_movies():
+                start_background_warmup(invalidate=True)
+                return jsonify({'status': 'ok', 'message': 'Reindex complete'})
+            return jsonify({'status': 'error', 'message': 'Reindex failed'}), 500
+
+        if not start_background_reindex(on_swap=start_background_warmup):
+            return jsonify({'status': 'busy', 'message': 'Reindex already running'}), 409
+        return jsonify({'status': 'ok', 'message': 'Reindex started'}), 202
     except Exception as e:
         logging.error(f"Reindex error: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -182,7 +243,7 @@ def search():
         else:
             CACHE_MISS_COUNT.inc()
             result = search_movies_meili(query)
-            set_cached_search(query, result, ttl=300)
+            set_cached_search(query, result)
             from_cache = False
 
         SEARCH_RESULTS_COUNT.observe(len(result))
@@ -264,7 +325,8 @@ def api_cache_stats():
         'hits': stats['hits'],
         'misses': stats['misses'],
         'hit_rate': f"{hit_rate:.1f}%",
-        'cached_keys': stats['keys_count']
+        'cached_keys': stats['keys_count'],
+        'cached_movies': stats['movie_keys_count']
     })
 
 
@@ -280,6 +342,14 @@ def clear_movies_cache_endpoint():
     return jsonify({'message': f'Cleared {count} cached movies'})
 
 
+@app.route('/api/cache/warmup', methods=['POST'])
+def api_cache_warmup():
+    invalidate = request.args.get('invalidate', 'false').lower() == 'true'
+    if not start_background_warmup(invalidate=invalidate):
+        return jsonify({'status': 'disabled'}), 409
+    return jsonify({'status': 'started', 'invalidate': invalidate}), 202
+
+
 @app.route('/api/analytics/popular')
 def api_popular_searches():
     limit = request.args.get('limit', 10, type=int)
@@ -294,11 +364,12 @@ def api_analytics_stats():
 @app.route('/api/sqs/stats')
 def api_sqs_stats():
     try:
-        sqs = boto3.client('sqs', region_name=Config.AWS_REGION)
-        response = sqs.get_queue_attributes(
-            QueueUrl=Config.SQS_QUEUE_URL,
-            AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible', 'ApproximateNumberOfMessagesDelayed']
-        )
+        sqs = get_aws_client('sqs')
+        with timed('sqs', 'get_queue_attributes'):
+            response = sqs.get_queue_attributes(
+                QueueUrl=Config.SQS_QUEUE_URL,
+                AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible', 'ApproximateNumberOfMessagesDelayed']
+            )
         attrs = response['Attributes']
         return jsonify({
             'queue_url': Config.SQS_QUEUE_URL,
@@ -326,6 +397,14 @@ def data_sync():
 
     try:
         result = invoke_lambda(Config.LAMBDA_DATA_PIPELINE, {'action': 'sync'})
+        postgres = result.get('postgres', {})
+        if postgres.get('status') == 'ok':
+            if 'unchanged' not in postgres:
+                # No per-movie report: assume everything changed
+                start_background_warmup(invalidate=True)
+            elif invalidate_changes(postgres, source='data_pipeline'):
+                # Only the synced movies were dropped; refill the hot set around them
+                start_background_warmup()
         return jsonify(result)
     except Exception as e:
         logging.error(f"Data sync error: {e}")
@@ -373,20 +452,23 @@ def youtube_trailer(movie_id):
     movie = dict(movie)
     query = f"{movie['title']} {movie.get('year', '')} official trailer"
 
+    import requests as http_requests
+
     try:
-        yt_res = http_requests.get(
-            'https://www.googleapis.com/youtube/v3/search',
-            params={
-                'part': 'snippet',
-                'q': query,
-                'type': 'video',
-                'maxResults': 1,
-                'key': api_key,
-                'videoCategoryId': '1',  # Film & Animation
-            },
-            timeout=5
-        )
-        yt_res.raise_for_status()
+        with timed('youtube', 'search'):
+            yt_res = http_requests.get(
+                'https://www.googleapis.com/youtube/v3/search',
+                params={
+                    'part': 'snippet',
+                    'q': query,
+                    'type': 'video',
+                    'maxResults': 1,
+                    'key': api_key,
+                    'videoCategoryId': '1',  # Film & Animation
+                },
+                timeout=5
+            )
+            yt_res.raise_for_status()
         data = yt_res.json()
 
         items = data.get('items', [])
@@ -408,6 +490,7 @@ def youtube_trailer(movie_id):
 #  Entry point
 
 if __name__ == '__main__':
+    start_listener()
     app.run(
         host=Config.FLASK_HOST,
         port=Config.FLASK_PORT,
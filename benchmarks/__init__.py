@@ -0,0 +1,17 @@
+"""Load-test harness for the Flask app and the AI agent.
+
+Boots both services under gunicorn against in-process stand-ins for Redis,
+PostgreSQL, Meilisearch, S3, SQS, Lambda, Gemini and YouTube (standins.py),
+drives a weighted request mix at a fixed concurrency or arrival rate
+(workloads.py) and reports throughput and latency percentiles per operation
+(report.py). Results are written as JSON; pass a previous result as
+--baseline to fail on regressions:
+
+    python -m benchmarks.run --workload mixed --concurrency 16 --duration 30 \\
+        --output bench.json
+    python -m benchmarks.run --workload mixed --concurrency 16 --duration 30 \\
+        --baseline bench.json
+
+Needs the dev requirements (fakeredis with Lua support). --url/--agent-url
+point the load at already running services instead.
+"""
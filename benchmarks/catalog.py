@@ -0,0 +1,75 @@
+"""The movie catalog the stand-ins serve and the workloads ask for.
+
+Built from data/movies.json (the same file init_data.py loads), optionally
+repeated with suffixed titles to simulate a larger catalog. Popularity is
+Zipf-distributed: a few movies, posters and queries take most of the
+traffic, which is what makes the cache hit rates realistic.
+"""
+import bisect
+import itertools
+import json
+import os
+import random
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'movies.json')
+
+STOP_WORDS = {'the', 'a', 'an', 'of', 'and', 'in', 'on', 'to', 'for', 'with', 'at', 'by'}
+
+
+def load_movies(size=None, path=DATA_FILE):
+    """Movies with ids 1..n; repeats the file when `size` exceeds it."""
+    with open(path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    size = size or len(base)
+    movies = []
+    for i in range(size):
+        movie = dict(base[i % len(base)])
+        copy = i // len(base)
+        movie['id'] = i + 1
+        if copy:
+            movie['title'] = f"{movie['title']} {copy + 1}"
+            movie['poster_filename'] = f"{copy + 1}_{movie['poster_filename']}"
+        movies.append(movie)
+    return movies
+
+
+class Zipf:
+    """Samples items with probability proportional to 1 / rank**s."""
+
+    def __init__(self, items, s=1.1):
+        self.items = list(items)
+        self.cumulative = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, len(self.items) + 1)))
+
+    def sample(self, rng):
+        point = rng.random() * self.cumulative[-1]
+        return self.items[bisect.bisect_left(self.cumulative, point)]
+
+
+def search_queries(movies):
+    """Distinct queries users type: title words, directors, genres."""
+    queries = []
+    for movie in movies:
+        words = [w for w in movie['title'].lower().split() if w not in STOP_WORDS and w.isalpha()]
+        if words:
+            queries.append(' '.join(words[:2]))
+        queries.append(movie['director'].split()[-1].lower())
+        queries.extend(genre.lower() for genre in movie.get('genres', []))
+    return list(dict.fromkeys(queries))
+
+
+class Catalog:
+    def __init__(self, size=None, seed=0):
+        self.movies = load_movies(size)
+        self.by_id = {m['id']: m for m in self.movies}
+
+        # Popularity order is shuffled so rank doesn't follow file order
+        rng = random.Random(seed)
+        popular = list(self.movies)
+        rng.shuffle(popular)
+        queries = search_queries(self.movies)
+        rng.shuffle(queries)
+
+        self.popular_movies = Zipf(popular)
+        self.popular_queries = Zipf(queries)
+        self.genres = sorted({g for m in self.movies for g in m.get('genres', [])})
@@ -0,0 +1,94 @@
+"""Latency/throughput summaries and baseline comparison.
+
+A result file is {"meta": {...}, "operations": {name: summary}} with one
+summary per operation plus "all". Latencies are in milliseconds.
+"""
+import json
+import math
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Differences below this many ms are noise on a shared machine
+NOISE_FLOOR_MS = 1.0
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, elapsed):
+    """Summary of (latency_seconds, ok) samples measured over `elapsed` seconds."""
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    count = len(latencies)
+
+    summary = {
+        'count': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'rps': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        'mean_ms': round(sum(latencies) / count, 2) if count else 0.0,
+        'max_ms': round(latencies[-1], 2) if count else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(latencies, pct), 2)
+    return summary
+
+
+def summarize_by_operation(samples, elapsed):
+    """{operation: summary} from (operation, latency_seconds, ok) samples, plus 'all'."""
+    grouped = {}
+    for operation, latency, ok in samples:
+        grouped.setdefault(operation, []).append((latency, ok))
+
+    operations = {name: summarize(values, elapsed) for name, values in sorted(grouped.items())}
+    operations['all'] = summarize([(latency, ok) for _, latency, ok in samples], elapsed)
+    return operations
+
+
+def compare(current, baseline, tolerance=0.10):
+    """Regressions of `current` against `baseline` as human-readable strings.
+
+    Latency percentiles may grow and throughput may drop by `tolerance`
+    (a fraction) before counting; error rates may grow by one point.
+    """
+    regressions = []
+    for name, base in baseline.get('operations', {}).items():
+        now = current.get('operations', {}).get(name)
+        if now is None:
+            continue
+
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            allowed = base[key] * (1 + tolerance)
+            if now[key] > allowed and now[key] - base[key] > NOISE_FLOOR_MS:
+                regressions.append(f"{name} {key}: {base[key]:.1f} -> {now[key]:.1f}")
+
+        if base['rps'] and now['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{name} rps: {base['rps']:.1f} -> {now['rps']:.1f}")
+
+        if now['error_rate'] > base['error_rate'] + 0.01:
+            regressions.append(f"{name} error_rate: {base['error_rate']:.2%} -> {now['error_rate']:.2%}")
+    return regressions
+
+
+def format_table(operations):
+    columns = ('count', 'errors', 'rps', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms')
+    lines = [f"{'operation':<10}" + ''.join(f"{c:>10}" for c in columns)]
+    for name, summary in operations.items():
+        lines.append(f"{name:<10}" + ''.join(f"{summary[c]:>10}" for c in columns))
+    return '\n'.join(lines)
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+        f.write('\n')
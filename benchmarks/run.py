@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Run a workload against the stand-in services and report the results.
+
+Without --url it starts the Flask app (gunicorn, the repo's gunicorn.conf.py)
+and, if the workload chats, the agent (gunicorn + uvicorn worker, as in
+ai_agent/Dockerfile) on free local ports with every backend faked, then
+tears them down. Closed loop by default: --concurrency clients each send
+their next request as soon as the last one returns. With --rate the clients
+follow a fixed arrival schedule instead and latency counts from the
+scheduled start, so a stalled server shows up as queueing delay rather than
+as fewer requests.
+"""
+import argparse
+import itertools
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from benchmarks import report
+from benchmarks.catalog import Catalog
+from benchmarks.standins import ROOT_DIR, latency_settings
+from benchmarks.workloads import WORKLOADS, Workload
+
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Service:
+    """A gunicorn process serving one of the stand-in app factories."""
+
+    def __init__(self, name, command, env, port):
+        self.name = name
+        self.url = f"http://127.0.0.1:{port}"
+        self.workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+        self.log_path = os.path.join(self.workdir, 'server.log')
+
+        metrics_dir = os.path.join(self.workdir, 'prometheus')
+        os.makedirs(metrics_dir)
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir, **env)
+
+        self._log = open(self.log_path, 'w', encoding='utf-8')
+        self.process = subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                                        stdout=self._log, stderr=subprocess.STDOUT)
+
+    def wait_healthy(self):
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if requests.get(f"{self.url}/health", timeout=2).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            tail = ''.join(f.readlines()[-20:])
+        self.stop()
+        raise RuntimeError(f"{self.name} did not become healthy; log tail:\n{tail}")
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._log.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def start_main(args):
+    port = free_port()
+    env = {
+        'FLASK_HOST': '127.0.0.1',
+        'FLASK_PORT': str(port),
+        'GUNICORN_WORKERS': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+    }
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+               'benchmarks.standins:create_main_app()']
+    return Service('main', command, env, port)
+
+
+def start_agent(args, movie_api_url):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f"127.0.0.1:{port}",
+               '--workers', str(args.agent_workers), '--timeout', '120']
+    if args.agent_mode == 'asgi':
+        command += ['--worker-class', 'uvicorn.workers.UvicornWorker',
+                    'benchmarks.standins:create_agent_app()']
+    else:
+        command += ['--threads', str(args.threads), "benchmarks.standins:create_agent_app('flask')"]
+    return Service('agent', command, {'MOVIE_API_BASE_URL': movie_api_url}, port)
+
+
+def run_load(workload, targets, concurrency, duration, rate=None, seed=0, timeout=60):
+    """Drive the workload; returns ((operation, latency_seconds, ok) samples, elapsed)."""
+    samples = []
+    lock = threading.Lock()
+    slots = itertools.count()
+    started = time.perf_counter()
+    end = started + duration
+    finished = [started]
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        local = []
+        while True:
+            if rate:
+                with lock:
+                    slot = next(slots)
+                start = started + slot / rate
+                if start >= end:
+                    break
+                delay = start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                start = time.perf_counter()
+                if start >= end:
+                    break
+
+            req = workload.next_request(rng)
+            try:
+                response = session.request(req.method, targets[req.service] + req.path, json=req.body,
+                                           headers=req.headers, timeout=timeout)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            local.append((req.operation, time.perf_counter() - start, ok))
+
+        session.close()
+        with lock:
+            samples.extend(local)
+            finished[0] = max(finished[0], time.perf_counter())
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, finished[0] - started
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workload', default='mixed', choices=sorted(WORKLOADS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=None, help='open-loop arrivals per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds first')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--catalog-size', type=int, default=0, help='movies to serve (default: data/movies.json)')
+    parser.add_argument('--latency', default=None, help='stand-in latencies, e.g. "postgres=2,gemini=600"')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for the Flask app')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--agent-workers', type=int, default=1)
+    parser.add_argument('--agent-mode', default='asgi', choices=('asgi', 'flask'))
+    parser.add_argument('--url', default=None, help='use a running Flask app instead of starting one')
+    parser.add_argument('--agent-url', default=None, help='use a running agent instead of starting one')
+    parser.add_argument('--output', default=None, help='write the JSON result here')
+    parser.add_argument('--baseline', default=None, help='compare against this JSON result')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed regression (fraction)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.catalog_size:
+        os.environ['BENCH_CATALOG_SIZE'] = str(args.catalog_size)
+    if args.latency is not None:
+        os.environ['BENCH_LATENCY_MS'] = args.latency
+
+    workload = Workload(args.workload, Catalog(args.catalog_size or None, seed=args.seed))
+    services = []
+    try:
+        targets = {'main': args.url, 'agent': args.agent_url}
+        if targets['main'] is None:
+            services.append(start_main(args))
+            targets['main'] = services[-1].url
+            services[-1].wait_healthy()
+        if 'agent' in workload.services and targets['agent'] is None:
+            services.append(start_agent(args, targets['main']))
+            targets['agent'] = services[-1].url
+            services[-1].wait_healthy()
+
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:g}s ...", flush=True)
+            run_load(workload, targets, args.concurrency, args.warmup, args.rate, seed=args.seed + 1)
+
+        print(f"Running {args.workload} for {args.duration:g}s at "
+              f"{f'{args.rate:g} req/s' if args.rate else f'concurrency {args.concurrency}'} ...", flush=True)
+        samples, elapsed = run_load(workload, targets, args.concurrency, args.duration, args.rate, seed=args.seed)
+    finally:
+        for service in reversed(services):
+            service.stop()
+
+    result = {
+        'meta': {
+            'workload': args.workload,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'duration': args.duration,
+            'catalog_size': len(workload.catalog.movies),
+            'latency_ms': {k: v * 1000 for k, v in latency_settings(args.latency).items()},
+            'workers': args.workers,
+            'threads': args.threads,
+            'agent_mode': args.agent_mode,
+            'external': bool(args.url or args.agent_url),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+        },
+        'operations': report.summarize_by_operation(samples, elapsed),
+    }
+
+    print(report.format_table(result['operations']))
+    if args.output:
+        report.save(result, args.output)
+        print(f"Saved results to {args.output}")
+
+    if args.baseline:
+        baseline = report.load(args.baseline)
+        for key in ('workload', 'concurrency', 'rate', 'workers', 'threads'):
+            if baseline['meta'].get(key) != result['meta'][key]:
+                print(f"Warning: baseline {key}={baseline['meta'].get(key)!r}, this run {result['meta'][key]!r}")
+
+        regressions = report.compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,540 @@
+"""Local stand-ins for every backend the apps talk to.
+
+create_main_app() and create_agent_app() swap the clients out before the app
+modules are imported, so the real request path (caching, codecs, rate
+limiting, instrumentation, JSON encoding) runs against:
+
+    redis        fakeredis (Lua included), one in-memory server per worker
+    postgres     the movies_db / analytics_db functions over an in-memory catalog
+    meilisearch  a token index over the catalog
+    s3, sqs      boto3.client() fakes: deterministic poster bytes, a message list
+    lambda       canned data-pipeline replies
+    gemini       a scripted model: one search_movies tool call, then text
+    youtube      a canned video id
+
+Each stand-in sleeps for a per-backend latency (BENCH_LATENCY_MS, e.g.
+"postgres=2,meilisearch=5,s3=25") so round trips stay part of the picture.
+BENCH_REAL=redis,postgres,meilisearch leaves those clients alone and uses
+whatever REDIS_HOST / POSTGRES_* / MEILISEARCH_HOST point at, e.g. local
+containers.
+
+Both factories are meant to be loaded by gunicorn:
+    gunicorn -c gunicorn.conf.py 'benchmarks.standins:create_main_app()'
+    gunicorn -k uvicorn.workers.UvicornWorker 'benchmarks.standins:create_agent_app()'
+"""
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import types
+import uuid
+
+from benchmarks.catalog import Catalog
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGENT_DIR = os.path.join(ROOT_DIR, 'ai_agent')
+
+DEFAULT_LATENCY_MS = {
+    'redis': 0,
+    'postgres': 2,
+    'meilisearch': 5,
+    's3': 25,
+    'sqs': 8,
+    'lambda': 50,
+    'gemini': 600,
+    'youtube': 80,
+}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Words of a chat request that aren't part of what is being searched for
+_CHAT_FILLER = {'i', 'want', 'something', 'like', 'any', 'good', 'show', 'me', 'films', 'film', 'movies',
+                'movie', 'by', 'recommend', 'a', 'from', 'around', 'the', 'some'}
+
+
+def latency_settings(spec=None):
+    """Seconds per backend from 'name=ms,name=ms' over DEFAULT_LATENCY_MS."""
+    settings = dict(DEFAULT_LATENCY_MS)
+    spec = os.getenv('BENCH_LATENCY_MS', '') if spec is None else spec
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        settings[name.strip()] = float(value)
+    return {name: ms / 1000.0 for name, ms in settings.items()}
+
+
+def real_backends():
+    return {name.strip() for name in os.getenv('BENCH_REAL', '').split(',') if name.strip()}
+
+
+def _pause(seconds):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+# --- Redis ---
+
+def fake_redis_pool(server, decode_responses):
+    import fakeredis
+    import redis
+
+    return redis.ConnectionPool(
+        connection_class=fakeredis.FakeConnection,
+        server=server,
+        decode_responses=decode_responses
+    )
+
+
+# --- PostgreSQL ---
+
+class FakePostgres:
+    """In-memory versions of the movies_db / analytics_db query functions."""
+
+    def __init__(self, movies, latency):
+        self.movies = sorted(movies, key=lambda m: -m['rating'])
+        self.by_id = {m['id']: m for m in movies}
+        self.latency = latency
+        self.searches = []
+        self._lock = threading.Lock()
+
+    def get_all_movies(self):
+        _pause(self.latency)
+        return [dict(m) for m in self.movies]
+
+    def get_movie_by_id(self, movie_id):
+        _pause(self.latency)
+        movie = self.by_id.get(movie_id)
+        return dict(movie) if movie else None
+
+    def count_movies(self):
+        _pause(self.latency)
+        return len(self.movies)
+
+    def get_movies_paginated(self, page=1, per_page=20):
+        _pause(self.latency)
+        offset = (page - 1) * per_page
+        total = len(self.movies)
+        return {
+            'movies': [dict(m) for m in self.movies[offset:offset + per_page]],
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page
+        }
+
+    def get_similar_movies(self, movie_id, limit=5):
+        _pause(self.latency)
+        movie = self.by_id.get(movie_id)
+        if not movie or not movie.get('genres'):
+            return []
+        genres = set(movie['genres'])
+        scored = [
+            (len(genres.intersection(m.get('genres', []))), m)
+            for m in self.movies if m['id'] != movie_id
+        ]
+        scored = [(overlap, m) for overlap, m in scored if overlap]
+        scored.sort(key=lambda item: (-item[0], -item[1]['rating']))
+        return [dict(m, overlap=overlap) for overlap, m in scored[:limit]]
+
+    def log_search_query(self, query, results_count):
+        _pause(self.latency)
+        with self._lock:
+            self.searches.append((query, results_count, time.time()))
+
+    def save_search_analytics(self, query, results_count, cached):
+        self.log_search_query(query, results_count)
+
+    def get_popular_searches(self, limit=10):
+        _pause(self.latency)
+        with self._lock:
+            searches = list(self.searches)
+        totals = {}
+        for query, results_count, _ in searches:
+            entry = totals.setdefault(query, [0, 0])
+            entry[0] += 1
+            entry[1] += results_count
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])[:limit]
+        return [
+            {'query': query, 'search_count': count, 'avg_results': results / count}
+            for query, (count, results) in ranked
+        ]
+
+    def get_search_stats(self):
+        _pause(self.latency)
+        with self._lock:
+            searches = list(self.searches)
+        if not searches:
+            return {'total_searches': 0, 'unique_queries': 0, 'avg_results_per_search': 0}
+        return {
+            'total_searches': len(searches),
+            'unique_queries': len({query for query, _, _ in searches}),
+            'avg_results_per_search': sum(r for _, r, _ in searches) / len(searches)
+        }
+
+
+def install_fake_postgres(db):
+    from database import analytics_db, movies_db
+    from instrumentation import instrument
+
+    for name in ('get_all_movies', 'get_movie_by_id', 'count_movies', 'get_movies_paginated',
+                 'get_similar_movies', 'log_search_query'):
+        setattr(movies_db, name, instrument('postgres', name)(getattr(db, name)))
+    for name in ('save_search_analytics', 'get_popular_searches', 'get_search_stats'):
+        setattr(analytics_db, name, instrument('postgres', name)(getattr(db, name)))
+
+
+# --- Meilisearch ---
+
+def _tokens(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+class FakeMeiliIndex:
+    """Prefix-matching token search with the genre filter and rating sort the app uses."""
+
+    def __init__(self, uid, latency, documents=()):
+        self.uid = uid
+        self.latency = latency
+        self.documents = {}
+        self.settings = {}
+        self._postings = {}
+        self._lock = threading.Lock()
+        self._add(documents)
+
+    def _add(self, documents):
+        with self._lock:
+            for doc in documents:
+                self.documents[doc['id']] = dict(doc)
+                text = ' '.join([doc.get('title', ''), doc.get('director', ''),
+                                 doc.get('description', ''), ' '.join(doc.get('genres') or [])])
+                for token in set(_tokens(text)):
+                    self._postings.setdefault(token, set()).add(doc['id'])
+
+    def _matching(self, token):
+        if token in self._postings:
+            return set(self._postings[token])
+        matches = set()
+        for candidate, ids in self._postings.items():
+            if candidate.startswith(token):
+                matches |= ids
+        return matches
+
+    def search(self, query, opt_params=None):
+        _pause(self.latency)
+        params = opt_params or {}
+        started = time.perf_counter()
+
+        tokens = _tokens(query)
+        if tokens:
+            ids = None
+            for token in tokens:
+                found = self._matching(token)
+                ids = found if ids is None else ids & found
+            hits = [self.documents[i] for i in ids]
+        else:
+            hits = list(self.documents.values())
+
+        genre = re.match(r'genres = "(.*)"', params.get('filter', '') or '')
+        if genre:
+            hits = [h for h in hits if genre.group(1) in (h.get('genres') or [])]
+        hits.sort(key=lambda h: -h.get('rating', 0))
+
+        limit = params.get('limit', 20)
+        return {
+            'hits': [dict(h) for h in hits[:limit]],
+            'query': query,
+            'limit': limit,
+            'estimatedTotalHits': len(hits),
+            'processingTimeMs': int((time.perf_counter() - started) * 1000)
+        }
+
+    def get_stats(self):
+        _pause(self.latency)
+        return {'numberOfDocuments': len(self.documents), 'isIndexing': False}
+
+    def update_settings(self, settings):
+        _pause(self.latency)
+        self.settings.update(settings)
+        return {'taskUid': 0, 'status': 'enqueued'}
+
+    def add_documents(self, documents, primary_key=None):
+        _pause(self.latency)
+        self._add(documents)
+        return {'taskUid': 0, 'status': 'enqueued'}
+
+
+class FakeMeiliClient:
+    def __init__(self, latency, documents=()):
+        self.latency = latency
+        self._indexes = {'movies': FakeMeiliIndex('movies', latency, documents)}
+
+    def create_index(self, uid, options=None):
+        self._indexes.setdefault(uid, FakeMeiliIndex(uid, self.latency))
+        return {'taskUid': 0, 'status': 'enqueued'}
+
+    def index(self, uid):
+        return self._indexes.setdefault(uid, FakeMeiliIndex(uid, self.latency))
+
+    def get_index(self, uid):
+        _pause(self.latency)
+        if uid not in self._indexes:
+            raise LookupError(f"Index `{uid}` not found.")
+        return self._indexes[uid]
+
+    def health(self):
+        return {'status': 'available'}
+
+
+# --- AWS ---
+
+class FakeS3:
+    def __init__(self, posters, latency, poster_bytes):
+        self.latency = latency
+        self.poster_bytes = poster_bytes
+        self.posters = set(posters)
+        self.uploaded = {}
+
+    def _body(self, key):
+        if key in self.uploaded:
+            return self.uploaded[key]
+        # Random bytes don't compress, like JPEG data
+        return random.Random(key).randbytes(self.poster_bytes)
+
+    def _missing(self, operation, key):
+        from botocore.exceptions import ClientError
+        return ClientError({'Error': {'Code': 'NoSuchKey', 'Message': f"{key} not found"}}, operation)
+
+    def get_object(self, Bucket, Key, **kwargs):
+        _pause(self.latency)
+        if Key not in self.posters and Key not in self.uploaded:
+            raise self._missing('GetObject', Key)
+        data = self._body(Key)
+        return {'Body': io.BytesIO(data), 'ContentLength': len(data), 'ContentType': 'image/jpeg'}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        _pause(self.latency)
+        if Key not in self.posters and Key not in self.uploaded:
+            raise self._missing('HeadObject', Key)
+        return {'ContentLength': self.poster_bytes}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        _pause(self.latency)
+        self.uploaded[Key] = Body if isinstance(Body, bytes) else Body.read()
+        return {'ETag': uuid.uuid4().hex}
+
+
+class FakeSQS:
+    def __init__(self, latency):
+        self.latency = latency
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def send_message(self, QueueUrl, MessageBody, MessageAttributes=None, **kwargs):
+        _pause(self.latency)
+        message_id = str(uuid.uuid4())
+        with self._lock:
+            self.messages.append({'MessageId': message_id, 'Body': MessageBody,
+                                  'MessageAttributes': MessageAttributes or {}})
+        return {'MessageId': message_id}
+
+    def get_queue_attributes(self, QueueUrl, AttributeNames=None, **kwargs):
+        _pause(self.latency)
+        return {'Attributes': {
+            'ApproximateNumberOfMessages': str(len(self.messages)),
+            'ApproximateNumberOfMessagesNotVisible': '0',
+            'ApproximateNumberOfMessagesDelayed': '0'
+        }}
+
+
+class FakeLambda:
+    def __init__(self, latency, movie_count):
+        self.latency = latency
+        self.movie_count = movie_count
+
+    def invoke(self, FunctionName, Payload=None, InvocationType='RequestResponse', **kwargs):
+        _pause(self.latency)
+        body = {'postgres': {'status': 'ok', 'movies': self.movie_count},
+                'meilisearch': {'status': 'ok', 'documents': self.movie_count}}
+        payload = json.dumps({'statusCode': 200, 'body': json.dumps(body)}).encode()
+        return {'StatusCode': 200, 'Payload': io.BytesIO(payload)}
+
+
+def install_fake_boto3(services):
+    import boto3
+
+    original = boto3.client
+
+    def client(service_name, *args, **kwargs):
+        if service_name in services:
+            return services[service_name]
+        return original(service_name, *args, **kwargs)
+
+    boto3.client = client
+
+
+# --- Gemini ---
+
+class ScriptedGemini:
+    """Stands in for genai.Client: search once, then answer in text.
+
+    The first round returns a search_movies call built from the user's
+    message; once a tool response is in the contents it returns a short
+    reply naming the top result. Exposes both models.generate_content and
+    aio.models.generate_content.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.models = types.SimpleNamespace(generate_content=self._generate)
+        self.aio = types.SimpleNamespace(models=types.SimpleNamespace(generate_content=self._agenerate))
+
+    def respond(self, contents):
+        from google.genai import types as genai_types
+
+        last = contents[-1]
+        responses = [p.function_response for p in last.parts if getattr(p, 'function_response', None)]
+        if responses:
+            results = (responses[0].response or {}).get('results') or []
+            title = results[0].get('title') if results else None
+            text = f"You might enjoy [{title}]." if title else "I couldn't find a match in the catalog."
+            part = genai_types.Part(text=text)
+        else:
+            message = ' '.join(p.text for p in last.parts if getattr(p, 'text', None))
+            words = [w for w in _tokens(message) if w not in _CHAT_FILLER and not w.isdigit()][:3]
+            part = genai_types.Part(function_call=genai_types.FunctionCall(
+                name='search_movies', args={'query': ' '.join(words) or message, 'limit': 5}
+            ))
+
+        return genai_types.GenerateContentResponse(candidates=[genai_types.Candidate(
+            content=genai_types.Content(role='model', parts=[part])
+        )])
+
+    def _generate(self, model, contents, config=None):
+        _pause(self.latency)
+        return self.respond(contents)
+
+    async def _agenerate(self, model, contents, config=None):
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return self.respond(contents)
+
+
+YOUTUBE_REPLY = {'items': [{'id': {'videoId': 'bench000001'}, 'snippet': {'title': 'Official Trailer'}}]}
+
+
+# --- App factories ---
+
+def create_main_app():
+    """The Flask app with every backend not listed in BENCH_REAL faked."""
+    os.environ.setdefault('S3_BUCKET_NAME', 'bench-posters')
+    os.environ.setdefault('SQS_QUEUE_URL', 'https://sqs.local/000000000000/bench-search-events')
+    latency = latency_settings()
+    real = real_backends()
+    catalog = Catalog(int(os.getenv('BENCH_CATALOG_SIZE', '0')) or None)
+
+    if 'redis' not in real:
+        import fakeredis
+        from database import connections
+
+        server = fakeredis.FakeServer()
+        pools = {flag: fake_redis_pool(server, flag) for flag in (True, False)}
+        connections.get_redis_pool = lambda decode_responses=True: pools[decode_responses]
+
+    if 'postgres' not in real:
+        install_fake_postgres(FakePostgres(catalog.movies, latency['postgres']))
+
+    if 'meilisearch' not in real:
+        from database import meilisearch_sync
+
+        meili = FakeMeiliClient(latency['meilisearch'], catalog.movies)
+        meilisearch_sync.get_meili_client = lambda: meili
+
+    install_fake_boto3({
+        's3': FakeS3([m['poster_filename'] for m in catalog.movies], latency['s3'],
+                     int(os.getenv('BENCH_POSTER_BYTES', '60000'))),
+        'sqs': FakeSQS(latency['sqs']),
+        'lambda': FakeLambda(latency['lambda'], len(catalog.movies)),
+    })
+
+    from app import app
+    return app
+
+
+def _agent_module():
+    # The agent's app/instrumentation/profiler modules shadow the root ones
+    if AGENT_DIR not in sys.path[:1]:
+        sys.path.insert(0, AGENT_DIR)
+    for name, value in (('GEMINI_API_KEY', 'bench'), ('REDIS_HOST', 'localhost'),
+                        ('MEILISEARCH_HOST', 'localhost'), ('YOUTUBE_API_KEY', 'bench'),
+                        ('MOVIE_API_BASE_URL', 'http://127.0.0.1:5000')):
+        os.environ.setdefault(name, value)
+
+    import app as agent
+    return agent
+
+
+def create_agent_app(mode='asgi'):
+    """The agent ('asgi', as deployed, or 'flask') with fake Gemini/Redis/YouTube.
+
+    Movie API calls go over HTTP to MOVIE_API_BASE_URL, normally the
+    stand-in main app, so chat latency includes the real search path.
+    """
+    latency = latency_settings()
+    real = real_backends()
+    agent = _agent_module()
+    agent.client = ScriptedGemini(latency['gemini'])
+
+    if mode == 'flask':
+        import redis
+        import requests
+
+        if 'redis' not in real:
+            import fakeredis
+
+            agent.redis_pool = fake_redis_pool(fakeredis.FakeServer(), True)
+            scripts_client = redis.Redis(connection_pool=agent.redis_pool)
+            agent.rate_limit_scripts = {
+                'sliding_window': scripts_client.register_script(agent.RATE_LIMIT_LUA),
+                'token_bucket': scripts_client.register_script(agent.TOKEN_BUCKET_LUA),
+            }
+
+        def get(url, *args, **kwargs):
+            if url == agent.YOUTUBE_SEARCH_URL:
+                _pause(latency['youtube'])
+                response = requests.Response()
+                response.status_code = 200
+                response._content = json.dumps(YOUTUBE_REPLY).encode()
+                return response
+            return requests.get(url, *args, **kwargs)
+
+        agent.requests = types.SimpleNamespace(**dict(vars(requests), get=get))
+        return agent.app
+
+    import httpx
+    import asgi
+
+    async def youtube(request):
+        if latency['youtube'] > 0:
+            await asyncio.sleep(latency['youtube'])
+        return httpx.Response(200, json=YOUTUBE_REPLY)
+
+    def async_client(*args, **kwargs):
+        kwargs.setdefault('mounts', {'https://www.googleapis.com': httpx.MockTransport(youtube)})
+        return httpx.AsyncClient(*args, **kwargs)
+
+    asgi.httpx = types.SimpleNamespace(**dict(vars(httpx), AsyncClient=async_client))
+
+    if 'redis' not in real:
+        import fakeredis
+        import fakeredis.aioredis
+
+        server = fakeredis.FakeServer()
+        asgi.aioredis = types.SimpleNamespace(
+            Redis=lambda **kwargs: fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        )
+
+    return asgi.app
@@ -0,0 +1,97 @@
+"""Request mixes the load generator draws from.
+
+A workload is a list of (operation, weight); each operation turns a random
+generator and the catalog into one Request. Popular items are drawn from
+the catalog's Zipf distributions, so repeated queries and movies hit the
+caches about as often as real traffic would.
+"""
+from collections import namedtuple
+from urllib.parse import quote
+
+Request = namedtuple('Request', 'operation service method path body headers')
+
+GRID_PAGE_SIZE = 24
+
+CHAT_TEMPLATES = (
+    "I want something like {title}",
+    "Any good {genre} movies?",
+    "Show me films by {director}",
+    "Recommend a {genre} film from around {year}",
+)
+
+
+def search(rng, catalog):
+    query = catalog.popular_queries.sample(rng)
+    return Request('search', 'main', 'GET', f"/api/search?q={quote(query)}", None, {})
+
+
+def movie(rng, catalog):
+    movie_id = catalog.popular_movies.sample(rng)['id']
+    return Request('movie', 'main', 'GET', f"/movie/{movie_id}", None, {})
+
+
+def poster(rng, catalog):
+    filename = catalog.popular_movies.sample(rng)['poster_filename']
+    return Request('poster', 'main', 'GET', f"/api/poster/{quote(filename)}", None, {})
+
+
+def browse(rng, catalog):
+    # Most visitors stay on the first pages of the home grid
+    pages = max(1, (len(catalog.movies) + GRID_PAGE_SIZE - 1) // GRID_PAGE_SIZE)
+    page = min(pages, int(rng.paretovariate(1.5)))
+    return Request('browse', 'main', 'GET', f"/api/movies?page={page}&per_page={GRID_PAGE_SIZE}", None, {})
+
+
+def chat(rng, catalog):
+    movie = catalog.popular_movies.sample(rng)
+    message = rng.choice(CHAT_TEMPLATES).format(
+        title=movie['title'],
+        genre=rng.choice(movie.get('genres') or catalog.genres).lower(),
+        director=movie['director'],
+        year=movie['year']
+    )
+    history = []
+    for _ in range(rng.choice((0, 0, 2, 4))):
+        history.append({'role': 'user', 'content': f"Something like {catalog.popular_movies.sample(rng)['title']}?"})
+        history.append({'role': 'assistant', 'content': "Here are a few options from the catalog."})
+
+    # Distinct client addresses so per-user rate limits behave as in production
+    headers = {'X-Forwarded-For': f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}"}
+    return Request('chat', 'agent', 'POST', '/chat', {'message': message, 'history': history}, headers)
+
+
+OPERATIONS = {
+    'search': search,
+    'movie': movie,
+    'poster': poster,
+    'browse': browse,
+    'chat': chat,
+}
+
+WORKLOADS = {
+    'mixed': (('search', 40), ('movie', 25), ('poster', 20), ('browse', 10), ('chat', 5)),
+    'web': (('search', 45), ('movie', 25), ('poster', 20), ('browse', 10)),
+    'search': (('search', 1),),
+    'movie': (('movie', 1),),
+    'poster': (('poster', 1),),
+    'browse': (('browse', 1),),
+    'chat': (('chat', 1),),
+}
+
+
+class Workload:
+    def __init__(self, name, catalog):
+        if name not in WORKLOADS:
+            raise ValueError(f"Unknown workload {name!r}; choose from {', '.join(sorted(WORKLOADS))}")
+        self.name = name
+        self.catalog = catalog
+        self.operations = [OPERATIONS[op] for op, _ in WORKLOADS[name]]
+        self.weights = [weight for _, weight in WORKLOADS[name]]
+
+    @property
+    def services(self):
+        return {'agent' if op == 'chat' else 'main' for op, _ in WORKLOADS[self.name]}
+
+    def next_request(self, rng):
+        operation = rng.choices(self.operations, weights=self.weights)[0]
+        return operation(rng, self.catalog)
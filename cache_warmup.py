@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Pre-populate the Redis caches so the first users after a deploy or data
+sync don't pay cold-cache latency.
+
+Warms, in order: search results for the most popular recent queries, movie
+details for the top-rated and most-viewed movies, and posters for the first
+pages of the home grid. Every backend call is paced to
+WARMUP_RATE_PER_SECOND so the job never competes with live traffic, and a
+Redis lock keeps several workers/instances from warming at the same time.
+
+Run standalone (`python3 cache_warmup.py [--invalidate]`) or via
+start_background_warmup() from the Flask app.
+"""
+import sys
+import threading
+import time
+
+from config import Config
+from database import redis_lock
+from database.connections import get_redis
+
+LOCK_KEY = 'cache_warmup:lock'
+LOCK_TTL = 600
+
+# Home grid page size used by templates/ai_movies.html
+GRID_PAGE_SIZE = 24
+
+
+class Pacer:
+    """Spaces calls at most `rate` per second (blocking)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def warm_searches(pacer, limit):
+    from database.analytics_db import get_popular_searches
+    from database.meilisearch_sync import search_movies_meili
+    from database.redis_cache import set_cached_search
+
+    warmed = 0
+    for row in get_popular_searches(limit):
+        query = (row.get('query') or '').strip()
+        if not query:
+            continue
+        pacer.wait()
+        results = search_movies_meili(query)
+        if results:
+            set_cached_search(query, results)
+            warmed += 1
+    return warmed
+
+
+def warm_movies(pacer, limit):
+    from database.movie_cache import set_cached_movie
+    from database.movie_views import get_most_viewed
+    from database.movies_db import get_movie_by_id, get_movies_paginated
+
+    top_rated = get_movies_paginated(1, limit)['movies']
+    movies = {movie['id']: movie for movie in top_rated}
+
+    for movie_id, _ in get_most_viewed(limit):
+        if movie_id in movies:
+            continue
+        pacer.wait()
+        movie = get_movie_by_id(movie_id)
+        if movie:
+            movies[movie_id] = movie
+
+    for movie_id, movie in movies.items():
+        pacer.wait()
+        set_cached_movie(movie_id, dict(movie))
+    return len(movies)
+
+
+def warm_posters(pacer, pages):
+    from database.movies_db import get_movies_paginated
+    from database.s3_storage import download_poster, is_poster_cached
+
+    warmed = 0
+    for page in range(1, pages + 1):
+        for movie in get_movies_paginated(page, GRID_PAGE_SIZE)['movies']:
+            filename = movie.get('poster_filename')
+            if not filename or is_poster_cached(filename):
+                continue
+            pacer.wait()
+            if download_poster(filename):
+                warmed += 1
+    return warmed
+
+
+def warm_caches(invalidate=False):
+    """Run a full warm-up; returns per-cache counts, or None if one is already running."""
+    client = get_redis(decode_responses=True)
+    token = redis_lock.acquire(client, LOCK_KEY, LOCK_TTL)
+    if token is None:
+        print("Cache warm-up already running elsewhere, skipping")
+        return None
+
+    started = time.time()
+    summary = {}
+    try:
+        if invalidate:
+            from database.redis_cache import clear_search_cache
+            from database.movie_cache import clear_movie_cache
+            clear_search_cache()
+            clear_movie_cache()
+
+        pacer = Pacer(Config.WARMUP_RATE_PER_SECOND)
+        steps = (
+            ('searches', warm_searches, Config.WARMUP_SEARCH_QUERIES),
+            ('movies', warm_movies, Config.WARMUP_TOP_MOVIES),
+            ('posters', warm_posters, Config.WARMUP_POSTER_PAGES),
+        )
+        for name, step, limit in steps:
+            try:
+                summary[name] = step(pacer, limit)
+            except Exception as e:
+                print(f"Cache warm-up error ({name}): {e}")
+                summary[name] = 'error'
+
+        summary['seconds'] = round(time.time() - started, 2)
+        print(f"Cache warm-up complete: {summary}")
+        return summary
+    finally:
+        redis_lock.release(client, LOCK_KEY, token)
+
+
+def start_background_warmup(invalidate=False):
+    if not Config.WARMUP_ENABLED:
+        return False
+
+    def run():
+        try:
+            warm_caches(invalidate=invalidate)
+        except Exception as e:
+            print(f"Cache warm-up failed: {e}")
+
+    threading.Thread(target=run, name='cache-warmup', daemon=True).start()
+    return True
+
+
+if __name__ == '__main__':
+    if not Config.WARMUP_ENABLED:
+        print("Cache warm-up disabled")
+        sys.exit(0)
+    warm_caches(invalidate='--invalidate' in sys.argv)
@@ -0,0 +1,159 @@
+"""Catalog change events: tell every web worker which movies a write touched.
+
+Writers (catalog_sync.invalidate_changes() after a sync, insert_movie())
+append an event to the Redis stream STREAM_KEY. Each gunicorn worker runs a
+listener thread (start_listener(), from post_fork) blocked on XREAD that
+applies every event:
+
+- cached details of changed/deleted movies (movie:<id>) are unlinked, or the
+  whole 'movie' generation retired when an event lists more than
+  CATALOG_EVENT_MAX_IDS of them;
+- the 'search' and 'similar' generations are retired, since a new or edited
+  movie can enter or leave any result list;
+- the process's Postgres reads are pinned to the primary until read
+  replicas have replayed the change (see database/connections.py).
+
+The shared Redis work runs once per event, by whoever first claims it (SET
+NX) - normally the publisher itself, so a sync never waits on a worker. The
+other listeners only re-read the generations, so no worker keeps serving a
+retired one for up to CACHE_GENERATION_TTL. The id of the last applied event
+is kept at CURSOR_KEY and a starting listener reads on from there, so events
+published while no worker was up are applied by the first one to start.
+
+Not every catalog write publishes an event. The data-pipeline Lambda cannot
+reach the task-local Redis: its report is published only when the sync was
+requested through /api/data/sync. The syncs it runs on its own, for every
+S3 upload under data/ and when a backend task starts, publish nothing. For
+those the cache TTLs (MOVIE_CACHE_TTL, SEARCH_CACHE_TTL, SIMILAR_CACHE_TTL)
+remain the bound on how long a running task serves stale entries, so they
+keep their short defaults.
+"""
+import threading
+
+from config import Config
+from database import cache_namespace
+from database.connections import get_redis, pin_primary
+
+STREAM_KEY = 'catalog:changes'
+CURSOR_KEY = 'catalog:changes:applied'
+CLAIM_TTL = 86400
+
+# 'stale' value meaning "too many ids to list: every cached movie is stale"
+ALL = '*'
+
+RESULT_NAMESPACES = ('search', 'similar')
+
+_lock = threading.Lock()
+_listener = None
+
+
+def get_redis_client():
+    return get_redis(decode_responses=False)
+
+
+def _text(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else str(value)
+
+
+def encode(event):
+    stale = event['stale']
+    return {
+        'source': event.get('source', ''),
+        'new': int(event.get('new', 0)),
+        'stale': stale if stale == ALL else ','.join(str(int(movie_id)) for movie_id in stale),
+    }
+
+
+def decode(fields):
+    fields = {_text(key): _text(value) for key, value in fields.items()}
+    stale = fields.get('stale', '')
+    return {
+        'source': fields.get('source', ''),
+        'new': int(fields.get('new') or 0),
+        'stale': ALL if stale == ALL else [int(movie_id) for movie_id in stale.split(',') if movie_id],
+    }
+
+
+def claim_key(event_id):
+    return f"{STREAM_KEY}:claim:{_text(event_id)}"
+
+
+def apply(client, event_id, event):
+    """Invalidate what `event` made stale; returns True if this call did the Redis work."""
+    # Refill from the primary until replicas have replayed the change
+    pin_primary(Config.POSTGRES_REPLICA_MAX_LAG_SECONDS + Config.POSTGRES_REPLICA_CHECK_SECONDS)
+    if client.set(claim_key(event_id), '1', nx=True, ex=CLAIM_TTL):
+        if event['stale'] == ALL:
+            cache_namespace.invalidate(client, 'movie')
+        elif event['stale']:
+            cache_namespace.forget(client, 'movie', *(str(movie_id) for movie_id in event['stale']))
+        for namespace in RESULT_NAMESPACES:
+            cache_namespace.invalidate(client, namespace)
+        client.set(CURSOR_KEY, event_id)
+        return True
+
+    namespaces = RESULT_NAMESPACES + (('movie',) if event['stale'] == ALL else ())
+    for namespace in namespaces:
+        cache_namespace.refresh(client, namespace)
+    return False
+
+
+def publish(new=0, stale_ids=(), source=''):
+    """Record a catalog change and apply it; returns the event id, or None.
+
+    `new` counts inserted movies (nothing of theirs is cached yet) and
+    `stale_ids` are the changed or deleted ones.
+    """
+    stale_ids = list(stale_ids)
+    if not (new or stale_ids):
+        return None
+
+    event = {
+        'source': source,
+        'new': new,
+        'stale': ALL if len(stale_ids) > Config.CATALOG_EVENT_MAX_IDS else stale_ids,
+    }
+    try:
+        client = get_redis_client()
+        event_id = client.xadd(STREAM_KEY, encode(event),
+                               maxlen=Config.CATALOG_EVENTS_MAXLEN, approximate=True)
+        apply(client, event_id, event)
+        print(f"Catalog event {_text(event_id)} ({source}): {new} new, "
+              f"{'all' if event['stale'] == ALL else len(stale_ids)} stale")
+        return event_id
+    except Exception as e:
+        print(f"Catalog event publish error: {e}")
+        return None
+
+
+def read_events(client, last_id, block_ms=None):
+    """[(event_id, event)] published after `last_id`, waiting up to `block_ms`."""
+    entries = client.xread({STREAM_KEY: last_id}, count=100, block=block_ms)
+    return [(event_id, decode(fields)) for _, events in entries or [] for event_id, fields in events]
+
+
+def listen(stop):
+    """Apply events as they arrive until `stop` (a threading.Event) is set."""
+    last_id = None
+    while not stop.is_set():
+        try:
+            client = get_redis_client()
+            if last_id is None:
+                last_id = client.get(CURSOR_KEY) or '$'
+            for event_id, event in read_events(client, last_id, Config.CATALOG_EVENTS_BLOCK_MS):
+                apply(client, event_id, event)
+                last_id = event_id
+        except Exception as e:
+            print(f"Catalog event listener error: {e}")
+            stop.wait(Config.CATALOG_EVENTS_RETRY_SECONDS)
+
+
+def start_listener():
+    """Start this process's listener thread (once); returns its stop Event."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            stop = threading.Event()
+            threading.Thread(target=listen, args=(stop,), name='catalog-events', daemon=True).start()
+            _listener = stop
+        return _listener
@@ -0,0 +1,98 @@
+"""Stream movie records out of a catalog file without loading it whole.
+
+iter_records() reads a binary file-like object (an open file or an S3
+StreamingBody) in CHUNK_SIZE pieces and yields one record at a time, so
+memory is bounded by the chunk and the largest record, not the catalog.
+
+Formats are detected from the content rather than the file name: gzip by
+its magic bytes, then a JSON array if the first character is '[' and
+newline-delimited JSON (one object per line) otherwise.
+
+The data-pipeline Lambda (terraform/lambda_data_pipeline.tf) carries a copy
+of this reader.
+"""
+import codecs
+import json
+import zlib
+from itertools import chain
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+_SEPARATORS = ' \t\r\n,'
+
+
+def iter_text(fileobj, chunk_size=CHUNK_SIZE):
+    """Decoded text chunks of `fileobj`, gunzipped if it starts with the gzip magic."""
+    data = fileobj.read(max(chunk_size, len(GZIP_MAGIC)))
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if data[:2] == GZIP_MAGIC else None
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+
+    while data:
+        text = decoder.decode(inflate.decompress(data) if inflate else data)
+        if text:
+            yield text
+        data = fileobj.read(chunk_size)
+
+    text = decoder.decode(inflate.flush() if inflate else b'', final=True)
+    if text:
+        yield text
+
+
+def _iter_array(chunks):
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+
+    for chunk in chain(chunks, [None]):
+        if chunk is not None:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if chunk is None:
+                    raise
+                break  # record continues in the next chunk
+            yield record
+
+    raise ValueError('Catalog JSON array is not terminated')
+
+
+def _iter_lines(chunks):
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+def iter_records(fileobj, chunk_size=CHUNK_SIZE):
+    """Yield each record of a JSON array or NDJSON catalog, gzipped or not."""
+    chunks = iter_text(fileobj, chunk_size)
+    head = ''
+    for chunk in chunks:
+        head += chunk
+        if head.strip():
+            break
+
+    head = head.lstrip()
+    if head.startswith('['):
+        yield from _iter_array(chain([head[1:]], chunks))
+    else:
+        yield from _iter_lines(chain([head], chunks))
+
+
+def iter_file(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        yield from iter_records(f, chunk_size)
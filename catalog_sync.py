@@ -0,0 +1,241 @@
+"""Incremental catalog sync: write only the movies that changed.
+
+Every row in `movies` carries a content_hash of the fields that come from
+movies.json. A sync hashes the incoming catalog, compares it with the stored
+hashes and classifies each movie as new, changed, unchanged or deleted;
+only new/changed rows are upserted and only deleted ids removed. The same
+classification drives Meilisearch (upsert/delete just those documents) and
+Redis (a catalog_events event that drops just those cached movies).
+
+New/changed rows are written with COPY FROM STDIN into a temporary staging
+table and merged with one INSERT ... SELECT ... ON CONFLICT, so a first load
+of a large catalog is a single round trip instead of one statement per row.
+sync_catalog() takes any iterable (e.g. catalog_reader.iter_file()): movies
+are hashed and classified as COPY pulls them, so only ids and hashes are
+held in memory, never the catalog itself.
+
+The data-pipeline Lambda (terraform/lambda_data_pipeline.tf) carries its own
+copy of content_hash()/classify(); keep the two in step, or every row
+will look changed to one of them.
+"""
+import hashlib
+import json
+import time
+
+HASH_FIELDS = ('title', 'year', 'rating', 'genres', 'director', 'description', 'poster_filename')
+
+COPY_COLUMNS = ('id',) + HASH_FIELDS + ('content_hash',)
+
+STAGING_SQL = """
+    CREATE TEMP TABLE movies_staging (
+        id INTEGER,
+        title TEXT,
+        year INTEGER,
+        rating NUMERIC,
+        genres TEXT[],
+        director TEXT,
+        description TEXT,
+        poster_filename TEXT,
+        content_hash TEXT
+    ) ON COMMIT DROP
+"""
+
+COPY_SQL = f"COPY movies_staging ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+
+MERGE_SQL = f"""
+    INSERT INTO movies ({', '.join(COPY_COLUMNS)})
+    SELECT {', '.join(COPY_COLUMNS)} FROM movies_staging
+    ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title,
+        year = EXCLUDED.year,
+        rating = EXCLUDED.rating,
+        genres = EXCLUDED.genres,
+        director = EXCLUDED.director,
+        description = EXCLUDED.description,
+        poster_filename = EXCLUDED.poster_filename,
+        content_hash = EXCLUDED.content_hash
+"""
+
+# Only catalog rows carry a content_hash; movies added at runtime are kept
+DELETE_SQL = 'DELETE FROM movies WHERE id = ANY(%s) AND content_hash IS NOT NULL'
+
+# COPY writes explicit ids; move the serial past them so insert_movie() cannot collide
+SEQUENCE_SQL = "SELECT setval(pg_get_serial_sequence('movies', 'id'), GREATEST((SELECT MAX(id) FROM movies), 1))"
+
+
+def normalize_movie(movie):
+    """The synced fields of a movies.json record, in their stored form."""
+    genres = movie.get('genres')
+    if genres is None:
+        genres = [movie['genre']] if movie.get('genre') else []
+    return {
+        'id': int(movie['id']),
+        'title': movie['title'],
+        'year': int(movie['year']),
+        'rating': round(float(movie['rating']), 1),
+        'genres': list(genres),
+        'director': movie['director'],
+        'description': movie['description'],
+        'poster_filename': movie['poster_filename'],
+    }
+
+
+def content_hash(movie):
+    canonical = json.dumps([movie[field] for field in HASH_FIELDS], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CatalogDiff:
+    """Ids classified against the stored hashes, filled in by classify()."""
+
+    def __init__(self):
+        self.new_ids = []
+        self.changed_ids = []
+        self.deleted_ids = []
+        self.unchanged = 0
+        self.received = 0
+
+    def __bool__(self):
+        return bool(self.new_ids or self.changed_ids or self.deleted_ids)
+
+    def report(self):
+        return {
+            'received': self.received,
+            'new': len(self.new_ids),
+            'changed': len(self.changed_ids),
+            'deleted': len(self.deleted_ids),
+            'unchanged': self.unchanged,
+            'new_ids': list(self.new_ids),
+            'changed_ids': list(self.changed_ids),
+            'deleted_ids': list(self.deleted_ids),
+        }
+
+
+def classify(movies, stored_hashes, diff, force=False):
+    """Yield the new/changed normalized `movies` (with their content_hash).
+
+    Every movie is recorded in `diff` against {id: content_hash} from the
+    table; deleted_ids is set once `movies` is exhausted. Rows without a
+    stored hash (written before hashing existed) count as changed, so the
+    first sync backfills them, but are never deleted: insert_movie() rows
+    have no hash and are not part of the catalog. A hashless row is told
+    apart only by its id, though: if the catalog later ships a movie with
+    the id of an insert_movie() row, that row is classified changed and
+    MERGE_SQL overwrites it. SEQUENCE_SQL keeps runtime ids above the
+    catalog's at sync time, so this needs a catalog that grows into them.
+    `force` treats every movie as changed.
+    """
+    seen = set()
+    for movie in movies:
+        movie = dict(movie, content_hash=content_hash(movie))
+        diff.received += 1
+        seen.add(movie['id'])
+        if movie['id'] not in stored_hashes:
+            diff.new_ids.append(movie['id'])
+            yield movie
+        elif force or stored_hashes[movie['id']] != movie['content_hash']:
+            diff.changed_ids.append(movie['id'])
+            yield movie
+        else:
+            diff.unchanged += 1
+
+    diff.deleted_ids = sorted(
+        movie_id for movie_id, stored in stored_hashes.items() if stored is not None and movie_id not in seen
+    )
+
+
+def fetch_hashes(cursor):
+    cursor.execute('SELECT id, content_hash FROM movies')
+    return dict(cursor.fetchall())
+
+
+def _copy_field(value):
+    """One field in COPY text format (lists become array literals)."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = '{' + ','.join(
+            '"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value
+        ) + '}'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_line(movie):
+    return '\t'.join(_copy_field(movie[column]) for column in COPY_COLUMNS) + '\n'
+
+
+class CopyStream:
+    """File-like reader over COPY lines, generated as copy_expert() reads."""
+
+    def __init__(self, movies):
+        self._lines = (copy_line(movie) for movie in movies)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def sync_catalog(conn, movies, force=False):
+    """Stream `movies` through the diff into the table in one transaction.
+
+    Returns (diff, report) where report holds the counts plus timings in ms:
+    'copy' covers reading, hashing and streaming the changed rows, 'merge'
+    the upsert/delete and commit.
+    """
+    started = time.perf_counter()
+    diff = CatalogDiff()
+
+    try:
+        with conn.cursor() as cursor:
+            changed = classify((normalize_movie(m) for m in movies), fetch_hashes(cursor), diff, force=force)
+
+            cursor.execute(STAGING_SQL)
+            cursor.copy_expert(COPY_SQL, CopyStream(changed))
+            if not diff.received:
+                raise ValueError('Refusing to sync an empty catalog (would delete every movie)')
+            copied = time.perf_counter()
+
+            cursor.execute(MERGE_SQL)
+            if diff.deleted_ids:
+                cursor.execute(DELETE_SQL, (diff.deleted_ids,))
+            cursor.execute(SEQUENCE_SQL)
+            cursor.execute('SELECT COUNT(*) FROM movies')
+            total = cursor.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    merged = time.perf_counter()
+
+    report = dict(diff.report(), total=total, timings_ms={
+        'copy': round((copied - started) * 1000, 1),
+        'merge': round((merged - copied) * 1000, 1),
+    })
+    return diff, report
+
+
+def invalidate_changes(report, source='sync'):
+    """Announce what the sync changed; returns True if anything changed.
+
+    `report` is a sync report (here or from the pipeline Lambda). It becomes
+    one catalog_events event: changed and deleted movies lose their cached
+    details in every worker, and any change at all retires the search and
+    similar-movie generations since results embed movie fields.
+    """
+    if not (report.get('new') or report.get('changed') or report.get('deleted')):
+        return False
+
+    from catalog_events import publish
+
+    stale_ids = list(report.get('changed_ids') or []) + list(report.get('deleted_ids') or [])
+    publish(new=report.get('new') or 0, stale_ids=stale_ids, source=source)
+    return True
@@ -6,6 +6,29 @@ class Config:
     FLASK_PORT = int(os.getenv('FLASK_PORT', '5000'))
     FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
 
+    # Production server (gunicorn.conf.py)
+    # Fixed, not from os.cpu_count(): that is the host's CPUs, not the task's CPU/memory share
+    GUNICORN_WORKERS = int(os.getenv('GUNICORN_WORKERS', '2'))
+    GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '4'))
+    GUNICORN_TIMEOUT = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+    GUNICORN_MAX_REQUESTS = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+    GUNICORN_MAX_REQUESTS_JITTER = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '500'))
+
+    # /debug/profile is disabled unless a token is set; slow-request recorder is off at 0
+    PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+    PROFILER_SLOW_REQUEST_MS = int(os.getenv('PROFILER_SLOW_REQUEST_MS', '0'))
+    PROFILER_SLOW_REQUEST_HZ = int(os.getenv('PROFILER_SLOW_REQUEST_HZ', '50'))
+
+    # Tracing: spans go to a JSONL file and/or a local OTLP/HTTP collector
+    TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'flask-app')
+    TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', '')
+    TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', '')
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+
+    METRICS_TOP_MOVIES = int(os.getenv('METRICS_TOP_MOVIES', '20'))
+    PROMETHEUS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', '')
+
     AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 
     POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
@@ -13,15 +36,61 @@ class Config:
     POSTGRES_DB = os.getenv('POSTGRES_DB', 'movies')
     POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
     POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'postgres')
+    POSTGRES_POOL_MIN = int(os.getenv('POSTGRES_POOL_MIN', '1'))
+    # Per worker process: one connection per request thread plus one for background jobs
+    POSTGRES_POOL_MAX = int(os.getenv('POSTGRES_POOL_MAX', str(GUNICORN_THREADS + 1)))
+    # Read replicas, 'host[:port],...' with the primary's database and credentials
+    POSTGRES_REPLICA_HOSTS = os.getenv('POSTGRES_REPLICA_HOSTS', '')
+    POSTGRES_REPLICA_MAX_LAG_SECONDS = float(os.getenv('POSTGRES_REPLICA_MAX_LAG_SECONDS', '5'))
+    POSTGRES_REPLICA_CHECK_SECONDS = float(os.getenv('POSTGRES_REPLICA_CHECK_SECONDS', '5'))
+    # Per-statement limits in ms (0 = none); analytics reports get the tighter one
+    POSTGRES_STATEMENT_TIMEOUT_MS = int(os.getenv('POSTGRES_STATEMENT_TIMEOUT_MS', '5000'))
+    POSTGRES_ANALYTICS_STATEMENT_TIMEOUT_MS = int(os.getenv('POSTGRES_ANALYTICS_STATEMENT_TIMEOUT_MS', '2000'))
 
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', '6379'))
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+
+    # Cache value encoding: 'msgpack' (binary with header) or 'json' (legacy format)
+    CACHE_CODEC = os.getenv('CACHE_CODEC', 'msgpack')
+    CACHE_COMPRESSION = os.getenv('CACHE_COMPRESSION', 'zstd')
+    CACHE_COMPRESSION_THRESHOLD = int(os.getenv('CACHE_COMPRESSION_THRESHOLD', '1024'))
+
+    # Namespace generations: how long a worker may reuse the generation it last read
+    CACHE_GENERATION_TTL = float(os.getenv('CACHE_GENERATION_TTL', '1.0'))
+    CACHE_CLEANUP_SCAN_COUNT = int(os.getenv('CACHE_CLEANUP_SCAN_COUNT', '500'))
+    CACHE_CLEANUP_BATCH_SIZE = int(os.getenv('CACHE_CLEANUP_BATCH_SIZE', '200'))
+
+    # Still the staleness bound: syncs the pipeline Lambda runs on S3 uploads
+    # publish no catalog event (see catalog_events.py)
+    MOVIE_CACHE_TTL = int(os.getenv('MOVIE_CACHE_TTL', '600'))
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '300'))
+    SIMILAR_CACHE_TTL = int(os.getenv('SIMILAR_CACHE_TTL', '600'))
+    CATALOG_EVENTS_MAXLEN = int(os.getenv('CATALOG_EVENTS_MAXLEN', '1000'))
+    CATALOG_EVENT_MAX_IDS = int(os.getenv('CATALOG_EVENT_MAX_IDS', '1000'))
+    CATALOG_EVENTS_BLOCK_MS = int(os.getenv('CATALOG_EVENTS_BLOCK_MS', '2000'))  # below the Redis socket timeout
+    CATALOG_EVENTS_RETRY_SECONDS = float(os.getenv('CATALOG_EVENTS_RETRY_SECONDS', '5'))
+
+    # Cache warm-up after deploy / data sync (see cache_warmup.py)
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+    WARMUP_SEARCH_QUERIES = int(os.getenv('WARMUP_SEARCH_QUERIES', '50'))
+    WARMUP_TOP_MOVIES = int(os.getenv('WARMUP_TOP_MOVIES', '50'))
+    WARMUP_POSTER_PAGES = int(os.getenv('WARMUP_POSTER_PAGES', '2'))
+    WARMUP_RATE_PER_SECOND = float(os.getenv('WARMUP_RATE_PER_SECOND', '20'))
+
+    # Written by init_data.py, read by /ready (see startup_status.py); unset = no gate
+    STARTUP_STATUS_FILE = os.getenv('STARTUP_STATUS_FILE', '')
 
     SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', '')
 
     MEILISEARCH_HOST = os.getenv('MEILISEARCH_HOST', 'localhost')
     MEILISEARCH_PORT = int(os.getenv('MEILISEARCH_PORT', '7700'))
     MEILISEARCH_KEY = os.getenv('MEILISEARCH_KEY', None)
+    # Document sync: batch size, batches in flight, per-task wait, startup wait
+    MEILISEARCH_BATCH_SIZE = int(os.getenv('MEILISEARCH_BATCH_SIZE', '1000'))
+    MEILISEARCH_BATCH_CONCURRENCY = int(os.getenv('MEILISEARCH_BATCH_CONCURRENCY', '4'))
+    MEILISEARCH_TASK_TIMEOUT = float(os.getenv('MEILISEARCH_TASK_TIMEOUT', '300'))
+    MEILISEARCH_WAIT_SECONDS = float(os.getenv('MEILISEARCH_WAIT_SECONDS', '150'))
 
     S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'service-checker-movie-posters')
 
@@ -0,0 +1,144 @@
+"""Binary codec for values stored in Redis.
+
+Encoded values start with a 4-byte header:
+
+    0xC1 | version | serializer | compression
+
+0xC1 is the one byte msgpack never emits and cannot start JSON text or a
+JPEG/PNG/WebP file, so values written before this codec existed (plain JSON
+strings, raw poster bytes) are still readable and can be rolled forward
+without flushing the cache.
+"""
+import zlib
+from datetime import date, datetime
+
+import serialization
+from config import Config
+from metrics import CACHE_PAYLOAD_BYTES
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = 0xC1
+VERSION = 1
+
+SERIALIZER_RAW = 0
+SERIALIZER_MSGPACK = 1
+SERIALIZER_JSON = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+# Compressed output must be at least this much smaller to be kept
+MIN_COMPRESSION_SAVING = 0.1
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return serialization._default(obj)
+
+
+def _compression():
+    choice = Config.CACHE_COMPRESSION
+    if choice == 'zstd' and _zstd_compressor is None:
+        choice = 'zlib'
+    return {
+        'zstd': COMPRESSION_ZSTD,
+        'zlib': COMPRESSION_ZLIB,
+    }.get(choice, COMPRESSION_NONE)
+
+
+def _compress(payload):
+    compression = _compression()
+    if compression == COMPRESSION_NONE or len(payload) < Config.CACHE_COMPRESSION_THRESHOLD:
+        return COMPRESSION_NONE, payload
+
+    if compression == COMPRESSION_ZSTD:
+        compressed = _zstd_compressor.compress(payload)
+    else:
+        compressed = zlib.compress(payload, 6)
+
+    if len(compressed) > len(payload) * (1 - MIN_COMPRESSION_SAVING):
+        return COMPRESSION_NONE, payload
+    return compression, compressed
+
+
+def _decompress(compression, payload):
+    if compression == COMPRESSION_ZSTD:
+        if _zstd_decompressor is None:
+            raise ValueError("zstd-compressed cache value but zstandard is not installed")
+        return _zstd_decompressor.decompress(payload)
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    return payload
+
+
+def _pack(serializer, payload, namespace):
+    compression, body = _compress(payload)
+    encoded = bytes((MAGIC, VERSION, serializer, compression)) + body
+    CACHE_PAYLOAD_BYTES.labels(namespace=namespace, kind='raw').inc(len(payload))
+    CACHE_PAYLOAD_BYTES.labels(namespace=namespace, kind='stored').inc(len(encoded))
+    return encoded
+
+
+def encode(obj, namespace):
+    """Encode a JSON-compatible value for Redis (serialized exactly once)."""
+    if Config.CACHE_CODEC == 'json':
+        # Rollout fallback: write the pre-codec format
+        legacy_json = serialization.dumps(obj)
+        CACHE_PAYLOAD_BYTES.labels(namespace=namespace, kind='raw').inc(len(legacy_json))
+        CACHE_PAYLOAD_BYTES.labels(namespace=namespace, kind='stored').inc(len(legacy_json))
+        return legacy_json
+
+    if msgpack is not None:
+        payload = msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+        serializer = SERIALIZER_MSGPACK
+    else:
+        payload = serialization.dumps(obj)
+        serializer = SERIALIZER_JSON
+
+    return _pack(serializer, payload, namespace)
+
+
+def encode_blob(data, namespace):
+    """Encode raw bytes (e.g. poster images); compressed only if it pays off."""
+    if Config.CACHE_CODEC == 'json':
+        return data
+    return _pack(SERIALIZER_RAW, data, namespace)
+
+
+def _split(value):
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if len(value) >= 4 and value[0] == MAGIC:
+        version, serializer, compression = value[1], value[2], value[3]
+        if version != VERSION:
+            raise ValueError(f"Unsupported cache codec version {version}")
+        return serializer, _decompress(compression, value[4:])
+    return None, value
+
+
+def decode(value):
+    """Decode a value written by encode(), or a legacy JSON string."""
+    serializer, payload = _split(value)
+    if serializer == SERIALIZER_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return serialization.loads(payload)
+
+
+def decode_blob(value):
+    """Decode a value written by encode_blob(), or legacy raw bytes."""
+    _, payload = _split(value)
+    return payload
@@ -0,0 +1,180 @@
+"""Generation-based key namespaces for the Redis cache.
+
+Every namespace ('search', 'movie') has a generation counter at
+cache:gen:<namespace> and cache keys embed it (search:g3:<query>), so
+clearing a namespace is a single INCR. Keys of retired generations stop being
+read immediately and are removed later by a background SCAN + UNLINK, which
+never blocks Redis the way KEYS + DEL on the whole keyspace does.
+
+Each generation also keeps a sorted-set index (member=key, score=expiry) so
+live key counts per namespace come from ZCARD instead of scanning.
+"""
+import threading
+import time
+
+from config import Config
+from database.connections import get_redis
+
+_local_generations = {}
+_cleanup_lock = threading.Lock()
+_cleanups_running = set()
+
+
+def generation_key(namespace):
+    return f"cache:gen:{namespace}"
+
+
+def index_key(namespace, generation):
+    return f"cache:index:{namespace}:{generation}"
+
+
+def make_key(namespace, generation, suffix):
+    return f"{namespace}:g{generation}:{suffix}"
+
+
+def key_generation(namespace, key):
+    """Generation embedded in a cache key, or None for pre-namespace keys."""
+    if isinstance(key, bytes):
+        key = key.decode('utf-8', 'replace')
+    prefix = f"{namespace}:g"
+    if not key.startswith(prefix):
+        return None
+    generation, sep, _ = key[len(prefix):].partition(':')
+    if not sep or not generation.isdigit():
+        return None
+    return int(generation)
+
+
+def index_generation(namespace, key):
+    if isinstance(key, bytes):
+        key = key.decode('utf-8', 'replace')
+    generation = key[len(index_key(namespace, '')):]
+    return int(generation) if generation.isdigit() else None
+
+
+def get_generation(client, namespace):
+    """Current generation, cached in-process for CACHE_GENERATION_TTL seconds."""
+    now = time.monotonic()
+    cached = _local_generations.get(namespace)
+    if cached and now - cached[1] < Config.CACHE_GENERATION_TTL:
+        return cached[0]
+
+    value = client.get(generation_key(namespace))
+    generation = int(value) if value else 0
+    _local_generations[namespace] = (generation, now)
+    return generation
+
+
+def refresh(client, namespace):
+    """Re-read the generation now instead of waiting out CACHE_GENERATION_TTL."""
+    _local_generations.pop(namespace, None)
+    return get_generation(client, namespace)
+
+
+def store(client, namespace, suffix, value, ttl):
+    generation = get_generation(client, namespace)
+    key = make_key(namespace, generation, suffix)
+    index = index_key(namespace, generation)
+
+    pipe = client.pipeline(transaction=False)
+    pipe.setex(key, ttl, value)
+    pipe.zadd(index, {key: time.time() + ttl})
+    pipe.expire(index, ttl)
+    return pipe.execute()[0]
+
+
+def fetch(client, namespace, suffix):
+    return client.get(make_key(namespace, get_generation(client, namespace), suffix))
+
+
+def forget(client, namespace, *suffixes):
+    """UNLINK keys of the current generation; returns how many existed."""
+    generation = get_generation(client, namespace)
+    keys = [make_key(namespace, generation, suffix) for suffix in suffixes]
+    if not keys:
+        return 0
+
+    pipe = client.pipeline(transaction=False)
+    pipe.unlink(*keys)
+    pipe.zrem(index_key(namespace, generation), *keys)
+    return pipe.execute()[0]
+
+
+def count_keys(client, namespace, generation=None):
+    if generation is None:
+        generation = get_generation(client, namespace)
+    index = index_key(namespace, generation)
+
+    pipe = client.pipeline(transaction=False)
+    pipe.zremrangebyscore(index, '-inf', time.time())
+    pipe.zcard(index)
+    return pipe.execute()[1]
+
+
+def invalidate(client, namespace):
+    """Retire the current generation; returns how many live keys it held."""
+    generation = client.incr(generation_key(namespace))
+    _local_generations[namespace] = (generation, time.monotonic())
+
+    retired = count_keys(client, namespace, generation - 1)
+    schedule_cleanup(namespace)
+    return retired
+
+
+def cleanup(client, namespace):
+    """SCAN + UNLINK every key older than the current generation.
+
+    Returns (generation, removed) so callers can tell whether another
+    invalidation happened while the scan was running.
+    """
+    generation = int(client.get(generation_key(namespace)) or 0)
+    removed = 0
+
+    sweeps = (
+        (f"{namespace}:*", key_generation),
+        (index_key(namespace, '*'), index_generation),
+    )
+    for pattern, parse in sweeps:
+        batch = []
+        for key in client.scan_iter(match=pattern, count=Config.CACHE_CLEANUP_SCAN_COUNT):
+            key_gen = parse(namespace, key)
+            if key_gen is not None and key_gen >= generation:
+                continue
+
+            batch.append(key)
+            if len(batch) >= Config.CACHE_CLEANUP_BATCH_SIZE:
+                removed += client.unlink(*batch)
+                batch = []
+        if batch:
+            removed += client.unlink(*batch)
+
+    return generation, removed
+
+
+def _run_cleanup(namespace):
+    try:
+        client = get_redis(decode_responses=False)
+        while True:
+            generation, removed = cleanup(client, namespace)
+            print(f"Cache cleanup {namespace}: unlinked {removed} stale keys")
+            if int(client.get(generation_key(namespace)) or 0) == generation:
+                break
+    except Exception as e:
+        print(f"Cache cleanup error ({namespace}): {e}")
+    finally:
+        with _cleanup_lock:
+            _cleanups_running.discard(namespace)
+
+
+def schedule_cleanup(namespace):
+    """Run cleanup() in a daemon thread; one at a time per namespace."""
+    with _cleanup_lock:
+        if namespace in _cleanups_running:
+            return False
+        _cleanups_running.add(namespace)
+
+    threading.Thread(
+        target=_run_cleanup, args=(namespace,),
+        name=f"cache-cleanup-{namespace}", daemon=True
+    ).start()
+    return True
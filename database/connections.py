@@ -0,0 +1,268 @@
+"""Process-wide Redis and PostgreSQL connection pools and AWS clients.
+
+Pools are created lazily and keyed by PID, so a preloaded gunicorn master
+never hands its sockets to forked workers; gunicorn.conf.py also calls
+reset_pools() from post_fork to make that explicit.
+
+The driver and SDK modules (redis, psycopg2, boto3) are imported on first
+use rather than at import time, so `import app` and routes that never
+touch a backend (/health, /ready before init) don't pay for them.
+
+Reads can go to PostgreSQL replicas (POSTGRES_REPLICA_HOSTS): callers pass
+pg_connection(read_only=True) and get a replica in round-robin order, or
+the primary when none is usable. A replica's lag is measured on a borrowed
+connection at most every POSTGRES_REPLICA_CHECK_SECONDS; one that lags more
+than POSTGRES_REPLICA_MAX_LAG_SECONDS, or cannot be reached, is skipped
+until the next check. After a catalog change pin_primary() sends this
+process's reads to the primary until replicas have caught up, so a cache
+refilled right after the change never stores what a replica still had.
+
+Every pooled connection runs with statement_timeout set to
+POSTGRES_STATEMENT_TIMEOUT_MS; pg_connection(statement_timeout_ms=...)
+overrides it for one transaction.
+"""
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+
+_lock = threading.Lock()
+_pools = {'pid': None, 'redis': {}, 'postgres': {}, 'aws': {}, 'replicas': {}, 'primary_until': 0.0}
+_round_robin = itertools.count()
+
+PRIMARY = 'primary'
+
+# Seconds the standby is behind; 0 when fully replayed or not a standby at all
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity')
+    END
+"""
+
+
+def _current_pools():
+    pid = os.getpid()
+    if _pools['pid'] != pid:
+        with _lock:
+            if _pools['pid'] != pid:
+                # Inherited across fork: drop references without closing the
+                # parent's sockets.
+                _pools['redis'] = {}
+                _pools['postgres'] = {}
+                _pools['aws'] = {}
+                _pools['replicas'] = {}
+                _pools['primary_until'] = 0.0
+                _pools['pid'] = pid
+    return _pools
+
+
+def reset_pools():
+    with _lock:
+        _pools['pid'] = None
+        _pools['redis'] = {}
+        _pools['postgres'] = {}
+        _pools['aws'] = {}
+        _pools['replicas'] = {}
+        _pools['primary_until'] = 0.0
+
+
+def get_redis_pool(decode_responses=True):
+    pools = _current_pools()
+    pool = pools['redis'].get(decode_responses)
+    if pool is None:
+        with _lock:
+            pool = pools['redis'].get(decode_responses)
+            if pool is None:
+                import redis
+                pool = redis.ConnectionPool(
+                    host=Config.REDIS_HOST,
+                    port=Config.REDIS_PORT,
+                    db=0,
+                    decode_responses=decode_responses,
+                    socket_connect_timeout=5,
+                    socket_timeout=5,
+                    max_connections=Config.REDIS_MAX_CONNECTIONS
+                )
+                pools['redis'][decode_responses] = pool
+    return pool
+
+
+def get_redis(decode_responses=True):
+    import redis
+    return redis.Redis(connection_pool=get_redis_pool(decode_responses))
+
+
+def replica_targets():
+    """'host:port' of each POSTGRES_REPLICA_HOSTS entry ('host[:port],...')."""
+    targets = []
+    for entry in Config.POSTGRES_REPLICA_HOSTS.split(','):
+        host, _, port = entry.strip().partition(':')
+        if host:
+            targets.append(f"{host}:{port or Config.POSTGRES_PORT}")
+    return targets
+
+
+def get_pg_pool(target=PRIMARY):
+    pools = _current_pools()
+    pool = pools['postgres'].get(target)
+    if pool is None:
+        with _lock:
+            pool = pools['postgres'].get(target)
+            if pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+                if target == PRIMARY:
+                    host, port = Config.POSTGRES_HOST, Config.POSTGRES_PORT
+                else:
+                    host, _, port = target.rpartition(':')
+                pool = ThreadedConnectionPool(
+                    Config.POSTGRES_POOL_MIN,
+                    Config.POSTGRES_POOL_MAX,
+                    host=host,
+                    port=int(port),
+                    database=Config.POSTGRES_DB,
+                    user=Config.POSTGRES_USER,
+                    password=Config.POSTGRES_PASSWORD,
+                    sslmode='require',
+                    connect_timeout=10,
+                    options=f"-c statement_timeout={Config.POSTGRES_STATEMENT_TIMEOUT_MS}"
+                )
+                pools['postgres'][target] = pool
+    return pool
+
+
+def pin_primary(seconds):
+    """Serve this process's reads from the primary for the next `seconds`."""
+    pools = _current_pools()
+    pools['primary_until'] = max(pools['primary_until'], time.monotonic() + seconds)
+
+
+def _replica_ok(target, now):
+    """True/False from a check younger than POSTGRES_REPLICA_CHECK_SECONDS, else None."""
+    checked = _current_pools()['replicas'].get(target)
+    if checked is None or now - checked['checked_at'] >= Config.POSTGRES_REPLICA_CHECK_SECONDS:
+        return None
+    return checked['ok']
+
+
+def _record_replica(target, lag):
+    ok = lag is not None and lag <= Config.POSTGRES_REPLICA_MAX_LAG_SECONDS
+    _current_pools()['replicas'][target] = {'ok': ok, 'lag': lag, 'checked_at': time.monotonic()}
+    if not ok:
+        print(f"Postgres replica {target} skipped (lag: {lag})")
+    return ok
+
+
+def replica_candidates(now=None):
+    """Replicas to try for a read, rotated per call; [] means use the primary."""
+    now = time.monotonic() if now is None else now
+    targets = replica_targets()
+    if not targets or now < _current_pools()['primary_until']:
+        return []
+
+    start = next(_round_robin) % len(targets)
+    rotated = targets[start:] + targets[:start]
+    return [target for target in rotated if _replica_ok(target, now) is not False]
+
+
+def replica_status():
+    """{target: {'ok', 'lag', 'checked_at'}} as last measured by this process."""
+    return dict(_current_pools()['replicas'])
+
+
+def _replica_usable(target, conn):
+    import psycopg2
+
+    if _replica_ok(target, time.monotonic()):
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+        conn.rollback()
+    except psycopg2.Error:
+        lag = None
+    return _record_replica(target, lag)
+
+
+def _borrow(read_only):
+    """(target, pool, conn): a usable replica for reads if there is one, else the primary."""
+    import psycopg2
+
+    if read_only:
+        for target in replica_candidates():
+            try:
+                pool = get_pg_pool(target)
+                conn = pool.getconn()
+            except psycopg2.Error as e:
+                print(f"Postgres replica {target} unavailable: {e}")
+                if isinstance(e, psycopg2.OperationalError):
+                    _record_replica(target, None)
+                continue
+            if _replica_usable(target, conn):
+                return target, pool, conn
+            pool.putconn(conn, close=bool(conn.closed))
+
+    pool = get_pg_pool()
+    return PRIMARY, pool, pool.getconn()
+
+
+@contextmanager
+def pg_connection(read_only=False, statement_timeout_ms=None):
+    """Borrow a pooled connection; rolls back on error, always returns it.
+
+    read_only=True lets a replica serve it. statement_timeout_ms replaces
+    POSTGRES_STATEMENT_TIMEOUT_MS for the current transaction (SET LOCAL).
+    """
+    import psycopg2
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+    target, pool, conn = _borrow(read_only)
+    broken = False
+    try:
+        if statement_timeout_ms is not None:
+            with conn.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout = %s', (int(statement_timeout_ms),))
+        yield conn
+        if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            # End read-only transactions so the connection returns clean
+            conn.rollback()
+    except Exception as e:
+        if target != PRIMARY and isinstance(e, psycopg2.OperationalError):
+            _record_replica(target, None)
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+def dict_cursor(conn):
+    """A cursor returning rows as dicts (RealDictCursor)."""
+    from psycopg2.extras import RealDictCursor
+    return conn.cursor(cursor_factory=RealDictCursor)
+
+
+def get_aws_client(service):
+    """A boto3 client for `service`, built once per process.
+
+    Clients are thread-safe once built, but building one is slow (tens of
+    ms) and goes through boto3's default session, which is not; the lock
+    covers that.
+    """
+    pools = _current_pools()
+    client = pools['aws'].get(service)
+    if client is None:
+        with _lock:
+            client = pools['aws'].get(service)
+            if client is None:
+                import boto3
+                client = boto3.client(service, region_name=Config.AWS_REGION)
+                pools['aws'][service] = client
+    return client
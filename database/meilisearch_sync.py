@@ -1,8 +1,97 @@
-import meilisearch
+"""Meilisearch search plus the document sync used by init_data.py and reindexing.
+
+sync_documents() sends upserts and deletes in batches of
+MEILISEARCH_BATCH_SIZE documents, keeps up to MEILISEARCH_BATCH_CONCURRENCY
+batches in flight (pulling the next batch from its input only when a slot
+frees, so a streamed input is never held whole), and waits for each batch's Meilisearch task (polling with
+exponential backoff) so a sync only reports success once the documents are
+searchable. The report lists every batch with its task uid, status and
+timings.
+
+reindex_shadow() is the blue/green rebuild behind /api/meilisearch/reindex:
+it builds a fresh movies_<version> index (settings first, then documents),
+checks its document count, swaps it with `movies` in one Meilisearch task
+and drops the old copy, so searches keep hitting a complete, settled index
+throughout.
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
 from config import Config
+from instrumentation import timed
+
+MOVIES_INDEX = 'movies'
+
+DOCUMENT_FIELDS = ('id', 'title', 'description', 'poster_filename', 'year', 'rating', 'genres', 'director')
+
+MOVIES_INDEX_SETTINGS = {
+    'searchableAttributes': [
+        'title',
+        'director',
+        'description',
+        'genres'
+    ],
+    'filterableAttributes': ['genres', 'year', 'rating', 'director'],
+    'sortableAttributes': ['year', 'rating', 'title'],
+
+    'rankingRules': [
+        'words',
+        'typo',
+        'proximity',
+        'attribute',
+        'sort',
+        'exactness'
+    ],
+
+    'typoTolerance': {
+        'enabled': True,
+        'minWordSizeForTypos': {
+            'oneTypo': 4,
+            'twoTypos': 8
+        }
+    },
+
+    'stopWords': [
+        'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
+        'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was',
+        'are', 'were', 'been', 'be', 'have', 'has', 'had',
+        'it', 'its', 'this', 'that', 'i', 'you', 'he', 'she',
+        'we', 'they', 'what', 'which', 'who', 'where', 'when'
+    ],
+
+    'synonyms': {
+        'film': ['movie'],
+        'movie': ['film'],
+        'scary': ['horror', 'thriller'],
+        'horror': ['scary', 'thriller'],
+        'funny': ['comedy'],
+        'comedy': ['funny'],
+        'sci-fi': ['science fiction', 'scifi'],
+        'scifi': ['science fiction', 'sci-fi'],
+        'crime': ['gangster', 'mafia'],
+        'gangster': ['crime', 'mafia']
+    }
+}
+
+TASK_DONE_STATUSES = ('succeeded', 'failed', 'canceled')
+TASK_POLL_INITIAL = 0.05
+TASK_POLL_MAX = 2.0
+
+REINDEX_LOCK_KEY = 'meilisearch:reindex:lock'
+REINDEX_LOCK_TTL = 3600
+REINDEX_STATUS_KEY = 'meilisearch:reindex:last'
+REINDEX_STATUS_TTL = 86400
 
 
 def get_meili_client():
+    # Imported here: meilisearch (+pydantic) is the slowest import in the app.
+    # Not memoized: a Client mutates its shared headers on every request.
+    import meilisearch
+
     api_key = Config.MEILISEARCH_KEY if Config.MEILISEARCH_KEY else None
 
     return meilisearch.Client(
@@ -14,12 +103,13 @@ def get_meili_client():
 def search_movies_meili(query, limit=20):
     try:
         client = get_meili_client()
-        index = client.get_index('movies')
 
-        results = index.search(query, {
-            'limit': limit,
-            'matchingStrategy': 'all'
-        })
+        with timed('meilisearch', 'search'):
+            index = client.index(MOVIES_INDEX)
+            results = index.search(query, {
+                'limit': limit,
+                'matchingStrategy': 'all'
+            })
 
         movies = []
         for hit in results.get('hits', []):
@@ -44,13 +134,14 @@ def search_movies_meili(query, limit=20):
 def search_movies_by_genre(genre, limit=20):
     try:
         client = get_meili_client()
-        index = client.get_index('movies')
 
-        results = index.search('', {
-            'limit': limit,
-            'filter': f'genres = "{genre}"',
-            'sort': ['rating:desc']
-        })
+        with timed('meilisearch', 'search_by_genre'):
+            index = client.index(MOVIES_INDEX)
+            results = index.search('', {
+                'limit': limit,
+                'filter': f'genres = "{genre}"',
+                'sort': ['rating:desc']
+            })
 
         movies = []
         for hit in results.get('hits', []):
@@ -72,76 +163,260 @@ def search_movies_by_genre(genre, limit=20):
         return []
 
 
+def wait_for_task(client, task_uid, timeout=None):
+    """Poll a task until it finishes, backing off from 50ms to 2s; returns the Task."""
+    timeout = Config.MEILISEARCH_TASK_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    delay = TASK_POLL_INITIAL
+
+    while True:
+        with timed('meilisearch', 'get_task'):
+            task = client.get_task(task_uid)
+        if task.status in TASK_DONE_STATUSES:
+            return task
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Meilisearch task {task_uid} still {task.status} after {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, TASK_POLL_MAX)
+
+
+def ensure_index(client, index_uid=MOVIES_INDEX):
+    """Create the index if missing and apply MOVIES_INDEX_SETTINGS, waiting for both."""
+    with timed('meilisearch', 'create_index'):
+        task = client.create_index(index_uid, {'primaryKey': 'id'})
+    wait_for_task(client, task.task_uid)  # fails with index_already_exists when present
+
+    with timed('meilisearch', 'update_settings'):
+        task = client.index(index_uid).update_settings(MOVIES_INDEX_SETTINGS)
+    settings_task = wait_for_task(client, task.task_uid)
+    if settings_task.status != 'succeeded':
+        raise RuntimeError(f"Meilisearch settings update failed: {settings_task.error}")
+
+
+def movie_document(movie):
+    """A movies row as a JSON-safe Meilisearch document (DECIMAL rating -> float)."""
+    document = {field: movie.get(field) for field in DOCUMENT_FIELDS}
+    if document['rating'] is not None:
+        document['rating'] = float(document['rating'])
+    document['genres'] = list(document['genres'] or [])
+    return document
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run_batch(client, index_uid, kind, batch):
+    index = client.index(index_uid)
+    started = time.perf_counter()
+    with timed('meilisearch', f"{kind}_documents"):
+        if kind == 'upsert':
+            info = index.add_documents(batch, primary_key='id')
+        else:
+            info = index.delete_documents(batch)
+    enqueued = time.perf_counter()
+
+    task = wait_for_task(client, info.task_uid)
+    return {
+        'kind': kind,
+        'documents': len(batch),
+        'task_uid': info.task_uid,
+        'status': task.status,
+        'enqueue_ms': round((enqueued - started) * 1000, 1),
+        'total_ms': round((time.perf_counter() - started) * 1000, 1),
+        'task_duration': task.duration,
+        'error': (task.error or {}).get('message')
+    }
+
+
+def _batch_result(future, kind, documents):
+    try:
+        return future.result()
+    except Exception as e:
+        return {'kind': kind, 'documents': documents, 'status': 'error', 'error': str(e)}
+
+
+def sync_documents(upserts=(), delete_ids=(), index_uid=MOVIES_INDEX, client=None,
+                   batch_size=None, concurrency=None):
+    """Upsert `upserts` (movie rows) and delete `delete_ids` in batches.
+
+    Both may be any iterable, e.g. a server-side cursor. Returns a report:
+    status ('ok' or 'error' if any batch did not succeed), counts, seconds
+    and one entry per batch.
+    """
+    client = client or get_meili_client()
+    batch_size = batch_size or Config.MEILISEARCH_BATCH_SIZE
+    concurrency = concurrency or Config.MEILISEARCH_BATCH_CONCURRENCY
+
+    jobs = chain((('upsert', batch) for batch in _batches(map(movie_document, upserts), batch_size)),
+                 (('delete', batch) for batch in _batches(delete_ids, batch_size)))
+    counts = {'upsert': 0, 'delete': 0}
+
+    started = time.perf_counter()
+    batches = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = deque()
+        for kind, batch in jobs:
+            if len(in_flight) == concurrency:
+                batches.append(_batch_result(*in_flight.popleft()))
+            counts[kind] += len(batch)
+            in_flight.append((pool.submit(_run_batch, client, index_uid, kind, batch), kind, len(batch)))
+        while in_flight:
+            batches.append(_batch_result(*in_flight.popleft()))
+
+    failed = sum(1 for batch in batches if batch['status'] != 'succeeded')
+    return {
+        'status': 'error' if failed else 'ok',
+        'upserted': counts['upsert'],
+        'deleted': counts['delete'],
+        'failed_batches': failed,
+        'seconds': round(time.perf_counter() - started, 3),
+        'batches': batches
+    }
+
+
 def index_all_movies():
-    from database.postgres import get_all_movies
+    from database.movies_db import get_all_movies
 
     try:
         client = get_meili_client()
-        try:
-            client.create_index('movies', {'primaryKey': 'id'})
-        except Exception:
-            pass
-
-        index = client.index('movies')
-
-        index.update_settings({
-            'searchableAttributes': [
-                'title',
-                'director',
-                'description',
-                'genres'
-            ],
-
-            'filterableAttributes': ['genres', 'year', 'rating', 'director'],
-            'sortableAttributes': ['year', 'rating', 'title'],
-
-            'rankingRules': [
-                'words',
-                'typo',
-                'proximity',
-                'attribute',
-                'sort',
-                'exactness'
-            ],
-
-            'typoTolerance': {
-                'enabled': True,
-                'minWordSizeForTypos': {
-                    'oneTypo': 4,
-                    'twoTypos': 8
-                }
-            },
-
-            'stopWords': [
-                'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
-                'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was',
-                'are', 'were', 'been', 'be', 'have', 'has', 'had',
-                'it', 'its', 'this', 'that', 'i', 'you', 'he', 'she',
-                'we', 'they', 'what', 'which', 'who', 'where', 'when'
-            ],
-
-            'synonyms': {
-                'film': ['movie'],
-                'movie': ['film'],
-                'scary': ['horror', 'thriller'],
-                'horror': ['scary', 'thriller'],
-                'funny': ['comedy'],
-                'comedy': ['funny'],
-                'sci-fi': ['science fiction', 'scifi'],
-                'scifi': ['science fiction', 'sci-fi'],
-                'crime': ['gangster', 'mafia'],
-                'gangster': ['crime', 'mafia']
-            }
-        })
-
-        movies = get_all_movies()
-        movies_list = [dict(movie) for movie in movies]
-
-        index.add_documents(movies_list)
-
-        print(f"Indexed {len(movies_list)} movies to Meilisearch")
-        return True
+        ensure_index(client)
+
+        report = sync_documents(get_all_movies(), client=client)
+        print(f"Indexed {report['upserted']} movies to Meilisearch in {len(report['batches'])} batches "
+              f"({report['seconds']}s, {report['failed_batches']} failed)")
+        return report['status'] == 'ok'
 
     except Exception as e:
         print(f"Indexing error: {e}")
         return False
+
+
+def _document_count(client, index_uid):
+    stats = client.index(index_uid).get_stats()
+    return stats.get('numberOfDocuments', 0) if isinstance(stats, dict) else stats.number_of_documents
+
+
+def _index_uids(client):
+    return [index.uid for index in client.get_indexes({'limit': 1000})['results']]
+
+
+def _drop_index(client, index_uid):
+    with timed('meilisearch', 'delete_index'):
+        task = client.delete_index(index_uid)
+    wait_for_task(client, task.task_uid)
+
+
+def reindex_shadow(client=None, movies=None):
+    """Rebuild `movies` in a shadow index and swap it in atomically.
+
+    Leftover shadows from interrupted runs are dropped first. Nothing touches
+    the live index until the shadow holds every movie with settings applied;
+    on any failure the shadow is dropped and the live index is left as is.
+    Returns a report with the shadow uid, counts, the sync report and
+    timings.
+    """
+    from database.redis_cache import clear_search_cache
+
+    client = client or get_meili_client()
+    shadow = f"{MOVIES_INDEX}_{time.strftime('%Y%m%d%H%M%S', time.gmtime())}"
+    started = time.perf_counter()
+    report = {'index': shadow}
+
+    try:
+        uids = _index_uids(client)
+        for uid in uids:
+            if uid.startswith(f"{MOVIES_INDEX}_"):
+                _drop_index(client, uid)
+
+        if movies is None:
+            from database.movies_db import get_all_movies
+            movies = get_all_movies()
+        if not movies:
+            raise ValueError('Refusing to swap in an empty movies index')
+
+        ensure_index(client, shadow)
+        report['settings_seconds'] = round(time.perf_counter() - started, 3)
+
+        sync = sync_documents(movies, index_uid=shadow, client=client)
+        report['sync'] = {key: sync[key] for key in ('status', 'upserted', 'failed_batches', 'seconds')}
+        if sync['status'] != 'ok':
+            raise RuntimeError(f"{sync['failed_batches']} document batches failed")
+
+        report['documents'] = _document_count(client, shadow)
+        if report['documents'] != len(movies):
+            raise RuntimeError(f"Shadow index has {report['documents']} documents, expected {len(movies)}")
+
+        if MOVIES_INDEX not in uids:
+            # swap needs both sides to exist
+            ensure_index(client, MOVIES_INDEX)
+        with timed('meilisearch', 'swap_indexes'):
+            task = client.swap_indexes([{'indexes': [MOVIES_INDEX, shadow]}])
+        swap_task = wait_for_task(client, task.task_uid)
+        if swap_task.status != 'succeeded':
+            raise RuntimeError(f"Index swap failed: {swap_task.error}")
+        clear_search_cache()
+
+        # After the swap the shadow uid holds the previous documents
+        _drop_index(client, shadow)
+        report['status'] = 'ok'
+    except Exception as e:
+        print(f"Shadow reindex error: {e}")
+        report.update(status='error', error=str(e))
+        try:
+            if shadow in _index_uids(client):
+                _drop_index(client, shadow)
+        except Exception as cleanup_error:
+            print(f"Shadow index cleanup error: {cleanup_error}")
+
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def get_reindex_status():
+    """Last shadow reindex report (any instance), or None."""
+    from database.connections import get_redis
+
+    try:
+        payload = get_redis(decode_responses=True).get(REINDEX_STATUS_KEY)
+        return json.loads(payload) if payload else None
+    except Exception as e:
+        print(f"Reindex status error: {e}")
+        return None
+
+
+def start_background_reindex(on_swap=None):
+    """Run reindex_shadow() in a thread; False if one is already running.
+
+    A Redis lock covers every worker and instance; `on_swap` runs after a
+    successful swap (the app re-warms its caches there).
+    """
+    from database import redis_lock
+    from database.connections import get_redis
+
+    client = get_redis(decode_responses=True)
+    token = redis_lock.acquire(client, REINDEX_LOCK_KEY, REINDEX_LOCK_TTL)
+    if token is None:
+        return False
+    client.set(REINDEX_STATUS_KEY, json.dumps({'status': 'running'}), ex=REINDEX_STATUS_TTL)
+
+    def run():
+        try:
+            report = reindex_shadow()
+            client.set(REINDEX_STATUS_KEY, json.dumps(report), ex=REINDEX_STATUS_TTL)
+            if report['status'] == 'ok' and on_swap:
+                on_swap()
+        except Exception as e:
+            print(f"Background reindex failed: {e}")
+        finally:
+            redis_lock.release(client, REINDEX_LOCK_KEY, token)
+
+    threading.Thread(target=run, name='meilisearch-reindex', daemon=True).start()
+    return True
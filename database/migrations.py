@@ -0,0 +1,158 @@
+"""Versioned PostgreSQL schema migrations.
+
+MIGRATIONS lists (version, name, step, in_transaction) in order; migrate()
+applies the versions missing from schema_migrations and records each one.
+init_data.py runs it before the startup sync and the data-pipeline Lambda
+(terraform/lambda_data_pipeline.tf) runs its own copy before every sync, so
+whichever starts first brings the schema up to date; keep the two lists
+identical. A session advisory lock, polled with pg_try_advisory_lock so a
+waiting runner holds no snapshot, stops two runners from interleaving.
+
+Table changes run in a transaction together with their schema_migrations
+row. Index builds use CREATE INDEX CONCURRENTLY, which cannot run inside a
+transaction and does not block writes; an index left INVALID by an
+interrupted build is dropped and rebuilt.
+"""
+import time
+
+LOCK_ID = 7240519
+LOCK_WAIT_SECONDS = 300
+
+SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _baseline(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movies (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            year INTEGER NOT NULL,
+            rating DECIMAL(3, 1) NOT NULL,
+            genres TEXT[],
+            director VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            poster_filename VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute('ALTER TABLE movies ADD COLUMN IF NOT EXISTS content_hash TEXT')
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS search_queries (
+            id SERIAL PRIMARY KEY,
+            query VARCHAR(255) NOT NULL,
+            results_count INTEGER NOT NULL,
+            searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _genres_array(cursor):
+    """Bring older layouts to genres TEXT[].
+
+    The app once stored a single 'genre' column; tables first created by
+    the pipeline Lambda have genres VARCHAR holding array literals.
+    """
+    cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'movies'
+    """)
+    columns = dict(cursor.fetchall())
+
+    if 'genre' in columns:
+        cursor.execute('ALTER TABLE movies ADD COLUMN IF NOT EXISTS genres TEXT[]')
+        cursor.execute('UPDATE movies SET genres = ARRAY[genre] WHERE genre IS NOT NULL AND genres IS NULL')
+        cursor.execute('ALTER TABLE movies DROP COLUMN genre')
+    elif columns.get('genres') == 'character varying':
+        cursor.execute("""
+            ALTER TABLE movies
+            ALTER COLUMN genres DROP NOT NULL,
+            ALTER COLUMN genres TYPE TEXT[] USING CASE
+                WHEN genres LIKE '{%}' THEN genres::TEXT[]
+                ELSE ARRAY[genres]
+            END
+        """)
+
+
+def concurrent_index(name, definition):
+    """A step building index `name` ON `definition` without blocking writes."""
+    def step(cursor):
+        cursor.execute("""
+            SELECT i.indisvalid FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+        """, (name,))
+        row = cursor.fetchone()
+        if row and not row[0]:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        cursor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}')
+    return step
+
+
+MIGRATIONS = [
+    (1, 'baseline', _baseline, True),
+    (2, 'genres_text_array', _genres_array, True),
+    # Every listing is ORDER BY rating DESC, id LIMIT n
+    (3, 'movies_rating_index', concurrent_index('idx_movies_rating', 'movies (rating DESC, id)'), False),
+    # genres && ..., genres @> ...
+    (4, 'movies_genres_gin', concurrent_index('idx_movies_genres', 'movies USING GIN (genres)'), False),
+    # Analytics reports cover the last 7 days
+    (5, 'search_queries_searched_at', concurrent_index('idx_search_queries_searched_at',
+                                                       'search_queries (searched_at)'), False),
+]
+
+
+def _lock(cursor, wait):
+    deadline = time.monotonic() + wait
+    while True:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (LOCK_ID,))
+        if cursor.fetchone()[0]:
+            return
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Another migration runner held the lock for {wait}s")
+        time.sleep(1)
+
+
+def pending(cursor):
+    cursor.execute(SCHEMA_MIGRATIONS_SQL)
+    cursor.execute('SELECT version FROM schema_migrations')
+    applied = {row[0] for row in cursor.fetchall()}
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def migrate(conn, wait=LOCK_WAIT_SECONDS):
+    """Apply pending migrations on an idle connection; returns the applied names."""
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    applied = []
+    try:
+        with conn.cursor() as cursor:
+            _lock(cursor, wait)
+            try:
+                for version, name, step, in_transaction in pending(cursor):
+                    started = time.perf_counter()
+                    conn.autocommit = not in_transaction
+                    try:
+                        step(cursor)
+                        cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                                       (version, name))
+                        if in_transaction:
+                            conn.commit()
+                    except Exception:
+                        if in_transaction:
+                            conn.rollback()
+                        raise
+                    finally:
+                        conn.autocommit = True
+                    print(f"Migration {version} {name} applied in {(time.perf_counter() - started) * 1000:.0f}ms")
+                    applied.append(name)
+            finally:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (LOCK_ID,))
+    finally:
+        conn.autocommit = autocommit
+    return applied
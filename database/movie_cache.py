@@ -1,37 +1,28 @@
-import redis
-import json
 from config import Config
-from decimal import Decimal
+from database import cache_codec, cache_namespace
+from database.connections import get_redis
+from instrumentation import timed
 
 
-def get_redis_client():
-    return redis.Redis(
-        host=Config.REDIS_HOST,
-        port=Config.REDIS_PORT,
-        decode_responses=True
-    )
+NAMESPACE = 'movie'
+SIMILAR_NAMESPACE = 'similar'
 
 
-def serialize_movie(movie_data):
-    serialized = {}
-    for key, value in movie_data.items():
-        if isinstance(value, Decimal):
-            serialized[key] = float(value)
-        else:
-            serialized[key] = value
-    return serialized
+def get_redis_client():
+    return get_redis(decode_responses=False)
 
 
 def get_cached_movie(movie_id):
     client = get_redis_client()
-    key = f"movie:{movie_id}"
+    key = str(movie_id)
 
     try:
-        cached = client.get(key)
+        with timed('redis', 'get_movie'):
+            cached = cache_namespace.fetch(client, NAMESPACE, key)
         print(f"Redis GET {key}: {cached is not None}")
 
         if cached:
-            movie_data = json.loads(cached)
+            movie_data = cache_codec.decode(cached)
             print(f"Found in cache: {movie_data.get('title')}")
             return movie_data, True
 
@@ -42,18 +33,17 @@ def get_cached_movie(movie_id):
         return None, False
 
 
-def set_cached_movie(movie_id, movie_data, ttl=600):
+def set_cached_movie(movie_id, movie_data, ttl=None):
     client = get_redis_client()
-    key = f"movie:{movie_id}"
+    key = str(movie_id)
 
     try:
-        serialized = serialize_movie(movie_data)
-        json_data = json.dumps(serialized)
+        payload = cache_codec.encode(movie_data, NAMESPACE)
 
-        result = client.setex(key, ttl, json_data)
+        with timed('redis', 'set_movie'):
+            result = cache_namespace.store(client, NAMESPACE, key, payload, ttl or Config.MOVIE_CACHE_TTL)
 
-        print(f"Redis SET {key}: {result}")
-        print(f"Data: {json_data[:100]}...")
+        print(f"Redis SET {key}: {result} ({len(payload)} bytes)")
 
         return result
     except Exception as e:
@@ -65,16 +55,51 @@ def clear_movie_cache(movie_id=None):
     client = get_redis_client()
 
     try:
-        if movie_id:
-            key = f"movie:{movie_id}"
-            client.delete(key)
-            return 1
-        else:
-            keys = client.keys("movie:*")
-            if keys:
-                client.delete(*keys)
-                return len(keys)
-            return 0
+        with timed('redis', 'clear_movie'):
+            if movie_id:
+                return cache_namespace.forget(client, NAMESPACE, str(movie_id))
+            return cache_namespace.invalidate(client, NAMESPACE)
     except Exception as e:
         print(f"Redis clear error: {e}")
         return 0
+
+
+def clear_cached_movies(movie_ids):
+    """Drop the cached details of just these movies (e.g. after a catalog sync)."""
+    client = get_redis_client()
+
+    try:
+        with timed('redis', 'clear_movies'):
+            return cache_namespace.forget(client, NAMESPACE, *(str(movie_id) for movie_id in movie_ids))
+    except Exception as e:
+        print(f"Redis clear error: {e}")
+        return 0
+
+
+def similar_key(movie_id, limit):
+    return f"{movie_id}:{limit}"
+
+
+def get_cached_similar(movie_id, limit):
+    """Cached similar-movie list, or None; retired by every catalog change."""
+    client = get_redis_client()
+
+    try:
+        with timed('redis', 'get_similar'):
+            cached = cache_namespace.fetch(client, SIMILAR_NAMESPACE, similar_key(movie_id, limit))
+        return cache_codec.decode(cached) if cached else None
+    except Exception as e:
+        print(f"Redis get error: {e}")
+        return None
+
+
+def set_cached_similar(movie_id, limit, movies, ttl=None):
+    client = get_redis_client()
+
+    try:
+        payload = cache_codec.encode(movies, SIMILAR_NAMESPACE)
+        with timed('redis', 'set_similar'):
+            cache_namespace.store(client, SIMILAR_NAMESPACE, similar_key(movie_id, limit), payload,
+                                  ttl or Config.SIMILAR_CACHE_TTL)
+    except Exception as e:
+        print(f"Redis set error: {e}")
@@ -0,0 +1,23 @@
+from database.connections import get_redis
+from instrumentation import timed
+
+VIEWS_KEY = 'movie_views'
+
+
+def record_view(movie_id):
+    try:
+        with timed('redis', 'record_view'):
+            get_redis(decode_responses=True).zincrby(VIEWS_KEY, 1, str(movie_id))
+    except Exception as e:
+        print(f"Redis view count error: {e}")
+
+
+def get_most_viewed(limit=10):
+    """[(movie_id, views), ...] ordered by views, highest first."""
+    try:
+        with timed('redis', 'most_viewed'):
+            rows = get_redis(decode_responses=True).zrevrange(VIEWS_KEY, 0, limit - 1, withscores=True)
+        return [(int(movie_id), int(views)) for movie_id, views in rows]
+    except Exception as e:
+        print(f"Redis view count error: {e}")
+        return []
@@ -1,9 +1,12 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from catalog_events import publish
 from config import Config
+from database.connections import dict_cursor, pg_connection
+from database.migrations import migrate
+from instrumentation import instrument
 
 
 def get_db_connection():
+    import psycopg2
     return psycopg2.connect(
         host=Config.POSTGRES_HOST,
         port=Config.POSTGRES_PORT,
@@ -16,131 +19,104 @@ def get_db_connection():
 
 def init_database():
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    with open('database/schema.sql', 'r', encoding='utf-8') as f:
-        schema = f.read()
-
-    cursor.execute(schema)
-    conn.commit()
-
-    cursor.close()
-    conn.close()
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
 
-    print("Database schema created!")
+    print(f"Database schema up to date ({len(applied)} migrations applied)")
 
 
+@instrument('postgres')
 def insert_movie(movie_data):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO movies (title, year, rating, genres, director, description, poster_filename)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        RETURNING id
-    """, (
-        movie_data['title'],
-        movie_data['year'],
-        movie_data['rating'],
-        movie_data.get('genres', []),
-        movie_data['director'],
-        movie_data['description'],
-        movie_data['poster_filename']
-    ))
-
-    movie_id = cursor.fetchone()[0]
-    conn.commit()
-
-    cursor.close()
-    conn.close()
-
+    with pg_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO movies (title, year, rating, genres, director, description, poster_filename)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (
+            movie_data['title'],
+            movie_data['year'],
+            movie_data['rating'],
+            movie_data.get('genres', []),
+            movie_data['director'],
+            movie_data['description'],
+            movie_data['poster_filename']
+        ))
+
+        movie_id = cursor.fetchone()[0]
+        conn.commit()
+
+    # Search and similar-movie results may now include it
+    publish(new=1, source='insert_movie')
     return movie_id
 
 
+@instrument('postgres')
 def get_all_movies():
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("""
-        SELECT id, title, year, rating, genres, director, description, poster_filename
-        FROM movies
-        ORDER BY rating DESC
-    """)
-
-    movies = cursor.fetchall()
+    # Feeds the search index, so it reads the primary rather than a lagging replica
+    with pg_connection() as conn, dict_cursor(conn) as cursor:
+        cursor.execute("""
+            SELECT id, title, year, rating, genres, director, description, poster_filename
+            FROM movies
+            ORDER BY rating DESC, id
+        """)
 
-    cursor.close()
-    conn.close()
+        movies = cursor.fetchall()
 
     return movies
 
 
+@instrument('postgres')
 def get_movie_by_id(movie_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("""
-        SELECT id, title, year, rating, genres, director, description, poster_filename
-        FROM movies
-        WHERE id = %s
-    """, (movie_id,))
+    with pg_connection(read_only=True) as conn, dict_cursor(conn) as cursor:
+        cursor.execute("""
+            SELECT id, title, year, rating, genres, director, description, poster_filename
+            FROM movies
+            WHERE id = %s
+        """, (movie_id,))
 
-    movie = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
+        movie = cursor.fetchone()
 
     return movie
 
 
+@instrument('postgres')
 def count_movies():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT COUNT(*) FROM movies")
-    count = cursor.fetchone()[0]
-
-    cursor.close()
-    conn.close()
+    with pg_connection(read_only=True) as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM movies")
+        count = cursor.fetchone()[0]
 
     return count
 
 
+@instrument('postgres')
 def log_search_query(query, results_count):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO search_queries (query, results_count)
-        VALUES (%s, %s)
-    """, (query, results_count))
+    with pg_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO search_queries (query, results_count)
+            VALUES (%s, %s)
+        """, (query, results_count))
 
-    conn.commit()
-
-    cursor.close()
-    conn.close()
+        conn.commit()
 
 
+@instrument('postgres')
 def get_movies_paginated(page=1, per_page=20):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
     offset = (page - 1) * per_page
 
-    cursor.execute("SELECT COUNT(*) FROM movies")
-    total = cursor.fetchone()['count']
+    with pg_connection(read_only=True) as conn, dict_cursor(conn) as cursor:
+        cursor.execute("SELECT COUNT(*) FROM movies")
+        total = cursor.fetchone()['count']
 
-    cursor.execute("""
-        SELECT id, title, year, rating, genres, director, description, poster_filename
-        FROM movies
-        ORDER BY rating DESC
-        LIMIT %s OFFSET %s
-    """, (per_page, offset))
+        cursor.execute("""
+            SELECT id, title, year, rating, genres, director, description, poster_filename
+            FROM movies
+            ORDER BY rating DESC, id
+            LIMIT %s OFFSET %s
+        """, (per_page, offset))
 
-    movies = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+        movies = cursor.fetchall()
 
     total_pages = (total + per_page - 1) // per_page
 
@@ -153,91 +129,73 @@ def get_movies_paginated(page=1, per_page=20):
     }
 
 
+@instrument('postgres')
 def get_all_genres():
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with pg_connection(read_only=True) as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT DISTINCT UNNEST(genres) as genre
+            FROM movies
+            WHERE genres IS NOT NULL
+            ORDER BY genre
+        """)
 
-    cursor.execute("""
-        SELECT DISTINCT UNNEST(genres) as genre
-        FROM movies
-        WHERE genres IS NOT NULL
-        ORDER BY genre
-    """)
-
-    genres = [row[0] for row in cursor.fetchall()]
-
-    cursor.close()
-    conn.close()
+        genres = [row[0] for row in cursor.fetchall()]
 
     return genres
 
 
+@instrument('postgres')
 def get_movies_by_genre(genre, limit=10):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("""
-        SELECT id, title, year, rating, genres, director, description, poster_filename
-        FROM movies
-        WHERE %s = ANY(genres)
-        ORDER BY rating DESC
-        LIMIT %s
-    """, (genre, limit))
+    with pg_connection(read_only=True) as conn, dict_cursor(conn) as cursor:
+        cursor.execute("""
+            SELECT id, title, year, rating, genres, director, description, poster_filename
+            FROM movies
+            WHERE genres @> ARRAY[%s]::TEXT[]
+            ORDER BY rating DESC, id
+            LIMIT %s
+        """, (genre, limit))
 
-    movies = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+        movies = cursor.fetchall()
 
     return movies
 
 
+@instrument('postgres')
 def get_movies_by_genres(genres_list, limit=10):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("""
-        SELECT id, title, year, rating, genres, director, description, poster_filename
-        FROM movies
-        WHERE genres && %s
-        ORDER BY rating DESC
-        LIMIT %s
-    """, (genres_list, limit))
-
-    movies = cursor.fetchall()
+    with pg_connection(read_only=True) as conn, dict_cursor(conn) as cursor:
+        cursor.execute("""
+            SELECT id, title, year, rating, genres, director, description, poster_filename
+            FROM movies
+            WHERE genres && %s
+            ORDER BY rating DESC, id
+            LIMIT %s
+        """, (genres_list, limit))
 
-    cursor.close()
-    conn.close()
+        movies = cursor.fetchall()
 
     return movies
 
 
+@instrument('postgres')
 def get_similar_movies(movie_id, limit=5):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("SELECT genres FROM movies WHERE id = %s", (movie_id,))
-    result = cursor.fetchone()
-
-    if not result or not result['genres']:
-        cursor.close()
-        conn.close()
-        return []
+    with pg_connection(read_only=True) as conn, dict_cursor(conn) as cursor:
+        cursor.execute("SELECT genres FROM movies WHERE id = %s", (movie_id,))
+        result = cursor.fetchone()
 
-    genres = result['genres']
+        if not result or not result['genres']:
+            return []
 
-    cursor.execute("""
-        SELECT id, title, year, rating, genres, director, description, poster_filename,
-               (SELECT COUNT(*) FROM UNNEST(genres) g WHERE g = ANY(%s)) as overlap
-        FROM movies
-        WHERE id != %s AND genres && %s
-        ORDER BY overlap DESC, rating DESC
-        LIMIT %s
-    """, (genres, movie_id, genres, limit))
+        genres = result['genres']
 
-    movies = cursor.fetchall()
+        cursor.execute("""
+            SELECT id, title, year, rating, genres, director, description, poster_filename,
+                   (SELECT COUNT(*) FROM UNNEST(genres) g WHERE g = ANY(%s)) as overlap
+            FROM movies
+            WHERE id != %s AND genres && %s
+            ORDER BY overlap DESC, rating DESC, id
+            LIMIT %s
+        """, (genres, movie_id, genres, limit))
 
-    cursor.close()
-    conn.close()
+        movies = cursor.fetchall()
 
     return movies
@@ -1,20 +1,14 @@
-import redis
 import time
 import logging
-from config import Config
+from database.connections import get_redis
+from instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
 
 def get_redis_client():
     try:
-        return redis.Redis(
-            host=Config.REDIS_HOST,
-            port=Config.REDIS_PORT,
-            db=0,
-            decode_responses=True,
-            socket_timeout=5
-        )
+        return get_redis(decode_responses=True)
     except Exception as e:
         logger.error(f"Redis connection failed: {e}")
         return None
@@ -29,7 +23,8 @@ def check_rate_limit(action: str, cooldown_seconds: int = 300) -> dict:
     key = f"rate_limit:{action}"
 
     try:
-        last_call = r.get(key)
+        with timed('redis', 'rate_limit_get'):
+            last_call = r.get(key)
 
         if last_call:
             last_call_time = float(last_call)
@@ -43,7 +38,8 @@ def check_rate_limit(action: str, cooldown_seconds: int = 300) -> dict:
                     'message': f'Rate limited. Try again in {int(remaining)} seconds.'
                 }
 
-        r.setex(key, cooldown_seconds, str(time.time()))
+        with timed('redis', 'rate_limit_set'):
+            r.setex(key, cooldown_seconds, str(time.time()))
 
         return {'allowed': True, 'retry_after': 0, 'message': 'ok'}
 
@@ -60,7 +56,8 @@ def get_rate_limit_status(action: str, cooldown_seconds: int = 300) -> dict:
     key = f"rate_limit:{action}"
 
     try:
-        last_call = r.get(key)
+        with timed('redis', 'rate_limit_get'):
+            last_call = r.get(key)
 
         if last_call:
             last_call_time = float(last_call)
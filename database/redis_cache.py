@@ -1,19 +1,18 @@
-import redis
-import json
 from config import Config
+from database import cache_codec, cache_namespace
+from database.connections import get_redis
+from instrumentation import timed
+
+
+NAMESPACE = 'search'
 
 
 def get_redis_client():
-    return redis.Redis(
-        host=Config.REDIS_HOST,
-        port=Config.REDIS_PORT,
-        decode_responses=True
-    )
+    return get_redis(decode_responses=False)
 
 
 def cache_key(query):
-    normalized = query.lower().strip()
-    return f"search:{normalized}"
+    return query.lower().strip()
 
 
 def get_cached_search(query):
@@ -21,25 +20,24 @@ def get_cached_search(query):
     key = cache_key(query)
 
     try:
-        cached = client.get(key)
+        with timed('redis', 'get_search'):
+            cached = cache_namespace.fetch(client, NAMESPACE, key)
         if cached:
-            return json.loads(cached)
+            return cache_codec.decode(cached)
         return None
     except Exception as e:
         print(f"Redis get error: {e}")
         return None
 
 
-def set_cached_search(query, results, ttl=300):
+def set_cached_search(query, results, ttl=None):
     client = get_redis_client()
     key = cache_key(query)
 
     try:
-        client.setex(
-            key,
-            ttl,
-            json.dumps(results)
-        )
+        payload = cache_codec.encode(results, NAMESPACE)
+        with timed('redis', 'set_search'):
+            cache_namespace.store(client, NAMESPACE, key, payload, ttl or Config.SEARCH_CACHE_TTL)
     except Exception as e:
         print(f"Redis set error: {e}")
 
@@ -48,11 +46,8 @@ def clear_search_cache():
     client = get_redis_client()
 
     try:
-        keys = client.keys("search:*")
-        if keys:
-            client.delete(*keys)
-            return len(keys)
-        return 0
+        with timed('redis', 'clear_search'):
+            return cache_namespace.invalidate(client, NAMESPACE)
     except Exception as e:
         print(f"Redis clear error: {e}")
         return 0
@@ -62,11 +57,15 @@ def get_cache_stats():
     client = get_redis_client()
 
     try:
-        info = client.info('stats')
+        with timed('redis', 'cache_stats'):
+            info = client.info('stats')
+            search_keys = cache_namespace.count_keys(client, NAMESPACE)
+            movie_keys = cache_namespace.count_keys(client, 'movie')
         return {
             'hits': info.get('keyspace_hits', 0),
             'misses': info.get('keyspace_misses', 0),
-            'keys_count': client.dbsize()
+            'keys_count': search_keys,
+            'movie_keys_count': movie_keys
         }
     except Exception as e:
         print(f"Redis stats error: {e}")
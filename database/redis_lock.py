@@ -0,0 +1,29 @@
+"""Redis locks that only their holder can release.
+
+acquire() stores a random token with SET NX EX and returns it (None if the
+lock is taken); release() deletes the key only while it still holds that
+token. A holder that outlives the TTL therefore cannot delete the lock a
+later run has taken since.
+"""
+import uuid
+
+# Compare-and-delete: GET and DEL in one atomic step
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def acquire(client, key, ttl):
+    """Take the lock at `key` for `ttl` seconds; returns its token, or None."""
+    token = uuid.uuid4().hex
+    if client.set(key, token, nx=True, ex=ttl):
+        return token
+    return None
+
+
+def release(client, key, token):
+    """Delete `key` if it still holds `token`; returns True if it did."""
+    return bool(client.eval(RELEASE_LUA, 1, key, token))
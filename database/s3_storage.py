@@ -1,36 +1,45 @@
-import boto3
-import redis
 import logging
 from botocore.exceptions import ClientError, NoCredentialsError
 from config import Config
+from database import cache_codec
+from database.connections import get_aws_client, get_redis
+from instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
 
 def get_s3_client():
-    return boto3.client('s3', region_name=Config.AWS_REGION)
+    return get_aws_client('s3')
 
 
 def get_redis_client():
-    return redis.Redis(
-        host=Config.REDIS_HOST,
-        port=Config.REDIS_PORT,
-        socket_connect_timeout=5,
-        socket_timeout=5,
-        decode_responses=False
-    )
+    return get_redis(decode_responses=False)
+
+
+def poster_cache_key(filename):
+    return f"poster:{filename}"
+
+
+def is_poster_cached(filename):
+    try:
+        with timed('redis', 'poster_exists'):
+            return bool(get_redis_client().exists(poster_cache_key(filename)))
+    except Exception as e:
+        logger.error(f"Redis cache error: {e}")
+        return False
 
 
 def download_poster(filename):
-    cache_key = f"poster:{filename}"
+    cache_key = poster_cache_key(filename)
 
     try:
         redis_client = get_redis_client()
-        cached = redis_client.get(cache_key)
+        with timed('redis', 'get_poster'):
+            cached = redis_client.get(cache_key)
 
         if cached:
             logger.info(f"Cache HIT: {filename}")
-            return cached
+            return cache_codec.decode_blob(cached)
     except Exception as e:
         logger.error(f"Redis cache error: {e}")
 
@@ -38,12 +47,15 @@ def download_poster(filename):
         logger.info(f"Cache MISS: {filename} - downloading from S3")
 
         s3 = get_s3_client()
-        response = s3.get_object(Bucket=Config.S3_BUCKET_NAME, Key=filename)
-        data = response['Body'].read()
+        with timed('s3', 'get_object'):
+            response = s3.get_object(Bucket=Config.S3_BUCKET_NAME, Key=filename)
+            data = response['Body'].read()
 
         try:
             redis_client = get_redis_client()
-            redis_client.setex(cache_key, 3600, data)
+            payload = cache_codec.encode_blob(data, 'poster')
+            with timed('redis', 'set_poster'):
+                redis_client.setex(cache_key, 3600, payload)
             logger.info(f"Cached {filename} in Redis")
         except Exception as e:
             logger.error(f"Redis set error: {e}")
@@ -65,7 +77,8 @@ def download_poster(filename):
 def poster_exists(filename):
     try:
         s3 = get_s3_client()
-        s3.head_object(Bucket=Config.S3_BUCKET_NAME, Key=filename)
+        with timed('s3', 'head_object'):
+            s3.head_object(Bucket=Config.S3_BUCKET_NAME, Key=filename)
         return True
     except Exception:
         return False
@@ -75,13 +88,14 @@ def upload_poster(filename, file_data, content_type='image/jpeg'):
     try:
         s3 = get_s3_client()
 
-        s3.put_object(
-            Bucket=Config.S3_BUCKET_NAME,
-            Key=filename,
-            Body=file_data,
-            ContentType=content_type,
-            CacheControl='max-age=31536000'
-        )
+        with timed('s3', 'put_object'):
+            s3.put_object(
+                Bucket=Config.S3_BUCKET_NAME,
+                Key=filename,
+                Body=file_data,
+                ContentType=content_type,
+                CacheControl='max-age=31536000'
+            )
 
         url = f"https://{Config.S3_BUCKET_NAME}.s3.{Config.AWS_REGION}.amazonaws.com/{filename}"
         return url
@@ -1,12 +1,14 @@
-import boto3
 import json
 import time
 from config import Config
+import tracing
+from database.connections import get_aws_client
+from instrumentation import timed
 
 
 def send_search_event(query, results_count, cached):
     try:
-        sqs = boto3.client('sqs', region_name=Config.AWS_REGION)
+        sqs = get_aws_client('sqs')
 
         event = {
             'query': query,
@@ -15,10 +17,12 @@ def send_search_event(query, results_count, cached):
             'timestamp': time.time()
         }
 
-        response = sqs.send_message(
-            QueueUrl=Config.SQS_QUEUE_URL,
-            MessageBody=json.dumps(event)
-        )
+        with timed('sqs', 'send_message'):
+            response = sqs.send_message(
+                QueueUrl=Config.SQS_QUEUE_URL,
+                MessageBody=json.dumps(event),
+                MessageAttributes=tracing.sqs_message_attributes()
+            )
 
         print(f"Sent to SQS: {query} (MessageId: {response['MessageId']})")
         return True
@@ -30,16 +34,17 @@ def send_search_event(query, results_count, cached):
 
 def get_queue_stats():
     try:
-        sqs = boto3.client('sqs', region_name=Config.AWS_REGION)
-
-        response = sqs.get_queue_attributes(
-            QueueUrl=Config.SQS_QUEUE_URL,
-            AttributeNames=[
-                'ApproximateNumberOfMessages',
-                'ApproximateNumberOfMessagesNotVisible',
-                'ApproximateNumberOfMessagesDelayed'
-            ]
-        )
+        sqs = get_aws_client('sqs')
+
+        with timed('sqs', 'get_queue_attributes'):
+            response = sqs.get_queue_attributes(
+                QueueUrl=Config.SQS_QUEUE_URL,
+                AttributeNames=[
+                    'ApproximateNumberOfMessages',
+                    'ApproximateNumberOfMessagesNotVisible',
+                    'ApproximateNumberOfMessagesDelayed'
+                ]
+            )
 
         attrs = response['Attributes']
 
@@ -0,0 +1,45 @@
+"""Gunicorn settings for the Flask app (see startup.sh).
+
+The app is preloaded in the master so workers fork with modules already
+imported; Redis/Postgres pools are created lazily per worker and reset in
+post_fork, which also starts the worker's catalog change listener (see
+catalog_events.py). Graceful reload: `kill -HUP <master>` restarts workers
+with the current config; to pick up new code with preload_app, send USR2
+(start a new master) and then WINCH/QUIT to the old one.
+"""
+from config import Config
+
+bind = f"{Config.FLASK_HOST}:{Config.FLASK_PORT}"
+
+workers = Config.GUNICORN_WORKERS
+worker_class = 'gthread'
+threads = Config.GUNICORN_THREADS
+
+timeout = Config.GUNICORN_TIMEOUT
+graceful_timeout = Config.GUNICORN_GRACEFUL_TIMEOUT
+keepalive = 5
+
+# Recycle workers periodically; jitter avoids all of them restarting at once
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = Config.GUNICORN_MAX_REQUESTS_JITTER
+
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+
+
+def post_fork(server, worker):
+    from database.connections import reset_pools
+    reset_pools()
+    server.log.info(f"Worker {worker.pid} initialized connection pools")
+
+    from catalog_events import start_listener
+    start_listener()
+
+
+def child_exit(server, worker):
+    if Config.PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
-import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 import psycopg2
 from botocore.exceptions import ClientError
+from psycopg2.extras import RealDictCursor
+
+from catalog_reader import iter_file
+from catalog_sync import invalidate_changes, sync_catalog
+from database.migrations import migrate
+import startup_status
+
+STEPS = ("postgres", "s3", "meilisearch")
 
 
 def init_postgres():
@@ -21,112 +30,33 @@ def init_postgres():
             sslmode="require",
         )
 
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS movies (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                year INTEGER NOT NULL,
-                rating DECIMAL(3, 1) NOT NULL,
-                genres TEXT[],
-                director VARCHAR(255) NOT NULL,
-                description TEXT NOT NULL,
-                poster_filename VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-
-        # Migration: if old 'genre' column exists, migrate data and drop it
-        cursor.execute("""
-            SELECT column_name FROM information_schema.columns
-            WHERE table_name = 'movies' AND column_name = 'genre'
-        """)
-        if cursor.fetchone():
-            print("Migrating from 'genre' to 'genres'...")
-
-            cursor.execute("""
-                ALTER TABLE movies
-                ADD COLUMN IF NOT EXISTS genres TEXT[]
-            """)
-
-            cursor.execute("""
-                UPDATE movies
-                SET genres = ARRAY[genre]
-                WHERE genre IS NOT NULL AND genres IS NULL
-            """)
-
-            cursor.execute("""
-                ALTER TABLE movies
-                DROP COLUMN genre
-            """)
-            conn.commit()
-            print("Migration complete")
-
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS search_queries (
-                id SERIAL PRIMARY KEY,
-                query VARCHAR(255) NOT NULL,
-                results_count INTEGER NOT NULL,
-                searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-
-        print("Syncing movies from data/movies.json ...")
+        for name in migrate(conn):
+            print(f"Schema migration applied: {name}")
 
+        # JSON array or NDJSON, optionally gzipped; streamed, never loaded whole
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        data_path = os.path.join(base_dir, "data", "movies.json")
-
-        with open(data_path, "r", encoding="utf-8") as f:
-            movies = json.load(f)
-
-        values = [
-            (
-                m["id"],
-                m["title"],
-                m["year"],
-                m["rating"],
-                m.get("genres", [m["genre"]] if "genre" in m else []),
-                m["director"],
-                m["description"],
-                m["poster_filename"],
-            )
-            for m in movies
-        ]
-
-        cursor.executemany(
-            """
-            INSERT INTO movies (id, title, year, rating, genres, director, description, poster_filename)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (id) DO UPDATE SET
-                title = EXCLUDED.title,
-                year = EXCLUDED.year,
-                rating = EXCLUDED.rating,
-                genres = EXCLUDED.genres,
-                director = EXCLUDED.director,
-                description = EXCLUDED.description,
-                poster_filename = EXCLUDED.poster_filename;
-            """,
-            values,
-        )
+        data_path = os.getenv("MOVIES_DATA_PATH", os.path.join(base_dir, "data", "movies.json"))
+        print(f"Syncing movies from {data_path} ...")
 
-        conn.commit()
+        _, report = sync_catalog(conn, iter_file(data_path))
 
-        cursor.execute("SELECT COUNT(*) FROM movies;")
-        total = cursor.fetchone()[0]
+        print(
+            f"PostgreSQL OK ({report['total']} movies; {report['new']} new, "
+            f"{report['changed']} changed, {report['deleted']} deleted, "
+            f"{report['unchanged']} unchanged in {sum(report['timings_ms'].values()):.0f}ms)"
+        )
 
-        print(f"PostgreSQL OK ({total} movies)")
+        try:
+            invalidate_changes(report, source='init_data')
+        except Exception as e:
+            print(f"Cache invalidation skipped: {e}")
 
-        cursor.close()
         conn.close()
-        return True
+        return report
 
     except Exception as e:
         print(f"PostgreSQL error: {e}")
-        return False
+        return None
 
 
 def init_s3():
@@ -186,70 +116,44 @@ def init_s3():
         return False
 
 
-def init_meilisearch():
+def connect_meilisearch():
+    """A client once Meilisearch is healthy, or None after MEILISEARCH_WAIT_SECONDS."""
+    try:
+        from database.meilisearch_sync import get_meili_client
+
+        client = get_meili_client()
+        deadline = time.monotonic() + float(os.getenv("MEILISEARCH_WAIT_SECONDS", "150"))
+        while not client.is_healthy():
+            if time.monotonic() >= deadline:
+                print("Meilisearch not accessible")
+                return None
+            print("  Meilisearch not ready, waiting 5s...")
+            time.sleep(5)
+        return client
+
+    except Exception as e:
+        print(f"Meilisearch connection error: {e}")
+        return None
+
+
+def init_meilisearch(report=None, client=None):
+    """Apply init_postgres()'s changes to Meilisearch in batches; index every
+    movie instead if the index is missing or out of step with the table."""
     print("Checking Meilisearch...")
 
     try:
-        import requests
+        from database.meilisearch_sync import MOVIES_INDEX, ensure_index, sync_documents
 
-        meili_host = os.getenv("MEILISEARCH_HOST", "localhost")
-        meili_port = os.getenv("MEILISEARCH_PORT", "7700")
-        base_url = f"http://{meili_host}:{meili_port}"
-
-        try:
-            health = requests.get(f"{base_url}/health", timeout=5)
-            if health.status_code != 200:
-                print("Meilisearch not accessible, skipping")
-                return False
-        except Exception:
+        client = client or connect_meilisearch()
+        if client is None:
             print("Meilisearch not accessible, skipping")
             return False
 
-        existing_ids = set()
-        index_exists = False
-
         try:
-            stats = requests.get(f"{base_url}/indexes/movies/stats", timeout=5)
-            if stats.status_code == 200:
-                index_exists = True
-                doc_count = stats.json().get("numberOfDocuments", 0)
-                print(f"Meilisearch movies index currently has {doc_count} documents")
+            stats = client.index(MOVIES_INDEX).get_stats()
+            doc_count = stats.get("numberOfDocuments", 0) if isinstance(stats, dict) else stats.number_of_documents
         except Exception:
-            pass
-
-        if index_exists:
-            limit = 1000
-            offset = 0
-            while True:
-                try:
-                    resp = requests.get(
-                        f"{base_url}/indexes/movies/documents",
-                        params={"fields": "id", "limit": limit, "offset": offset},
-                        timeout=10,
-                    )
-                    if resp.status_code != 200:
-                        break
-
-                    payload = resp.json()
-                    if isinstance(payload, dict) and "results" in payload:
-                        docs = payload["results"]
-                    else:
-                        docs = payload
-
-                    if not docs:
-                        break
-
-                    for doc in docs:
-                        if "id" in doc:
-                            existing_ids.add(doc["id"])
-
-                    if len(docs) < limit:
-                        break
-                    offset += limit
-                except Exception:
-                    break
-
-        print("Fetching movies from database...")
+            doc_count = None
 
         conn = psycopg2.connect(
             host=os.getenv("POSTGRES_HOST"),
@@ -259,94 +163,76 @@ def init_meilisearch():
             password=os.getenv("POSTGRES_PASSWORD"),
             sslmode="require",
         )
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM movies")
+            total = cursor.fetchone()[0]
+
+        # Server-side cursor: rows reach sync_documents() a batch at a time
+        cursor = conn.cursor(name="meilisearch_sync", cursor_factory=RealDictCursor)
+        cursor.itersize = int(os.getenv("MEILISEARCH_BATCH_SIZE", "1000"))
+        columns = "id, title, description, poster_filename, year, rating, genres, director"
+        expected = total - report["new"] + report["deleted"] if report else None
+
+        if doc_count is not None and doc_count == expected:
+            ids = report["new_ids"] + report["changed_ids"]
+            delete_ids = report["deleted_ids"]
+            cursor.execute(f"SELECT {columns} FROM movies WHERE id = ANY(%s)", (ids,))  # nosec B608
+            print(f"Applying {len(ids)} upserts and {len(delete_ids)} deletes to Meilisearch...")
+        else:
+            # Missing or drifted index: upsert every row
+            if doc_count is None:
+                ensure_index(client)
+            cursor.execute(f"SELECT {columns} FROM movies ORDER BY id")  # nosec B608
+            delete_ids = []
+            print(f"Meilisearch has {doc_count} documents for {total} movies, indexing all...")
 
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, title, description, poster_filename, year, rating, genres, director
-            FROM movies
-            ORDER BY id;
-            """
-        )
-
-        rows = cursor.fetchall()
-
-        movies = []
-        for row in rows:
-            movies.append(
-                {
-                    "id": row[0],
-                    "title": row[1],
-                    "description": row[2],
-                    "poster_filename": row[3],
-                    "year": row[4],
-                    "rating": float(row[5]),
-                    "genres": row[6] if row[6] else [],
-                    "director": row[7],
-                }
-            )
-
-        cursor.close()
-        conn.close()
-
-        if not movies:
-            print("No movies found")
-            return False
-
-        missing_movies = [m for m in movies if m["id"] not in existing_ids]
-
-        if not index_exists:
-            requests.post(
-                f"{base_url}/indexes",
-                json={"uid": "movies", "primaryKey": "id"},
-                timeout=10,
-            )
-
-            requests.put(
-                f"{base_url}/indexes/movies/settings/searchable-attributes",
-                json=["title", "description", "director", "genres"],
-                timeout=10,
-            )
-
-            requests.put(
-                f"{base_url}/indexes/movies/settings/filterable-attributes",
-                json=["genres", "year", "rating"],
-                timeout=10,
-            )
-
-        if not missing_movies:
-            print("Meilisearch index is up to date")
-            return True
-
-        print(f"Indexing {len(missing_movies)} new movies...")
-
-        response = requests.post(
-            f"{base_url}/indexes/movies/documents",
-            json=missing_movies,
-            timeout=30,
+        try:
+            result = sync_documents(cursor, delete_ids, client=client)
+        finally:
+            cursor.close()
+            conn.close()
+
+        print(
+            f"Meilisearch {'OK' if result['status'] == 'ok' else 'sync had errors'} "
+            f"({result['upserted']} upserted, {result['deleted']} deleted, "
+            f"{len(result['batches'])} batches, {result['failed_batches']} failed, {result['seconds']}s)"
         )
-
-        if response.status_code in [200, 202]:
-            print(f"Meilisearch OK ({len(missing_movies)} movies indexed)")
-            return True
-
-        print(f"Meilisearch indexing returned {response.status_code}")
-        return False
+        return result["status"] == "ok"
 
     except Exception as e:
         print(f"Meilisearch error: {e}")
         return False
 
 
-def main():
-    print("\nData Initialization\n")
+def run_step(name, func, *args):
+    """Run one init step, recording its progress for /ready."""
+    startup_status.record(name, "running")
+    started = time.perf_counter()
+    result = func(*args)
+    failed = "error" if name in startup_status.CRITICAL_STEPS else "failed"
+    startup_status.record(name, "ok" if result else failed, seconds=round(time.perf_counter() - started, 2))
+    return result
 
-    if not init_postgres():
-        print("PostgreSQL initialization failed - CRITICAL")
-        sys.exit(1)
 
-    init_s3()
-    init_meilisearch()
+def main():
+    print("\nData Initialization\n")
+    startup_status.reset(STEPS)
+
+    # S3 and the wait for Meilisearch don't depend on Postgres: run them alongside it
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pool.submit(run_step, "s3", init_s3)
+        meilisearch = pool.submit(connect_meilisearch)
+
+        report = run_step("postgres", init_postgres)
+        if report is None:
+            print("PostgreSQL initialization failed - CRITICAL")
+            sys.exit(1)
+
+        client = meilisearch.result()
+        if client is None:
+            startup_status.record("meilisearch", "failed", reason="not accessible")
+        else:
+            run_step("meilisearch", init_meilisearch, report, client)
 
     print("\nInitialization complete\n")
 
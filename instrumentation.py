@@ -0,0 +1,85 @@
+"""Per-dependency latency instrumentation.
+
+Wrap every call to a backing service in `timed(dependency, operation)` (or
+decorate the function with `@instrument(dependency)`). Each call is recorded
+in the flask_dependency_duration_seconds histogram and, on exceptions, in
+flask_dependency_errors_total. Calls made while handling a request are also
+summed per dependency and returned to the client as a Server-Timing header,
+e.g. `redis;dur=1.4;desc="2 calls", postgres;dur=12.0, app;dur=15.2`.
+Inside a traced request each call is also a client span (see tracing.py).
+"""
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g
+
+import tracing
+from metrics import DEPENDENCY_ERRORS, DEPENDENCY_LATENCY
+
+# {dependency: [seconds, calls]} for the current request, None outside one
+_request_timings = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def timed(dependency, operation):
+    start = time.perf_counter()
+    try:
+        with tracing.child_span(f"{dependency} {operation}", **{'peer.service': dependency}):
+            yield
+    except Exception:
+        DEPENDENCY_ERRORS.labels(dependency=dependency, operation=operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        DEPENDENCY_LATENCY.labels(dependency=dependency, operation=operation).observe(elapsed)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            entry = timings.setdefault(dependency, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def instrument(dependency, operation=None):
+    """Decorator form of timed(); the operation defaults to the function name."""
+    def decorator(f):
+        name = operation or f.__name__
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with timed(dependency, name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings, total):
+    parts = []
+    for dependency, (seconds, calls) in sorted(timings.items(), key=lambda item: -item[1][0]):
+        part = f"{dependency};dur={seconds * 1000:.1f}"
+        if calls > 1:
+            part += f';desc="{calls} calls"'
+        parts.append(part)
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ', '.join(parts)
+
+
+def init_app(app):
+    @app.before_request
+    def _start_request_timings():
+        g.request_started = time.perf_counter()
+        _request_timings.set({})
+
+    @app.after_request
+    def _add_server_timing(response):
+        timings = _request_timings.get()
+        if timings is not None and 'request_started' in g:
+            total = time.perf_counter() - g.request_started
+            response.headers['Server-Timing'] = server_timing_header(timings, total)
+        return response
+
+    @app.teardown_request
+    def _clear_request_timings(exc):
+        _request_timings.set(None)
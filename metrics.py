@@ -1,7 +1,11 @@
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
-from flask import Response
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, REGISTRY,
+    generate_latest, multiprocess, CONTENT_TYPE_LATEST
+)
+from prometheus_client.core import GaugeMetricFamily
+from flask import Response, g, request
+from config import Config
 import time
-import functools
 
 
 REQUEST_COUNT = Counter(
@@ -19,7 +23,8 @@ REQUEST_DURATION = Histogram(
 
 DB_CONNECTION_COUNT = Gauge(
     'flask_db_connections',
-    'Number of active database connections'
+    'Number of active database connections',
+    multiprocess_mode='livesum'
 )
 
 
@@ -45,47 +50,102 @@ SEARCH_RESULTS_COUNT = Histogram(
 )
 
 
+DEPENDENCY_LATENCY = Histogram(
+    'flask_dependency_duration_seconds',
+    'Latency of calls to backing services',
+    ['dependency', 'operation'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+
+DEPENDENCY_ERRORS = Counter(
+    'flask_dependency_errors_total',
+    'Failed calls to backing services',
+    ['dependency', 'operation']
+)
+
+
+CACHE_PAYLOAD_BYTES = Counter(
+    'flask_cache_payload_bytes_total',
+    'Bytes written to the Redis cache: serialized (raw) and after header + compression (stored)',
+    ['namespace', 'kind']
+)
+
+
 MOVIE_VIEWS = Counter(
     'flask_movie_views_total',
-    'Total movie page views',
-    ['movie_id']
+    'Total movie page views'
 )
 
+# Standard methods; anything else is reported as 'other' to bound cardinality
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
 
-def track_request(f):
-    @functools.wraps(f)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
 
-        try:
-            response = f(*args, **kwargs)
-            status_code = response.status_code if hasattr(response, 'status_code') else 200
+class TopMoviesCollector:
+    """Exposes view counts of the METRICS_TOP_MOVIES most viewed movies.
 
-            # Track metrics
-            REQUEST_COUNT.labels(
-                method=f.__name__,
-                endpoint=f.__name__,
-                http_status=status_code
-            ).inc()
+    Full per-movie counts live in a Redis sorted set (database/movie_views.py),
+    shared by all workers; only the top K become series, so scrape size stays
+    flat no matter how many movies get views.
+    """
 
-            duration = time.time() - start_time
-            REQUEST_DURATION.labels(
-                method=f.__name__,
-                endpoint=f.__name__
-            ).observe(duration)
+    def _family(self):
+        return GaugeMetricFamily(
+            'flask_movie_views_top',
+            'All-time page views of the most viewed movies',
+            labels=['movie_id']
+        )
 
+    def describe(self):
+        # Lets the registry learn the metric name without querying Redis
+        yield self._family()
+
+    def collect(self):
+        from database.movie_views import get_most_viewed
+
+        gauge = self._family()
+        for movie_id, views in get_most_viewed(Config.METRICS_TOP_MOVIES):
+            gauge.add_metric([str(movie_id)], views)
+        yield gauge
+
+
+REGISTRY.register(TopMoviesCollector())
+
+
+def init_app(app):
+    """Record request count/latency for every route, labelled by URL rule."""
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
             return response
 
-        except Exception:
-            REQUEST_COUNT.labels(
-                method=f.__name__,
-                endpoint=f.__name__,
-                http_status=500
-            ).inc()
-            raise
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+
+        REQUEST_COUNT.labels(
+            method=method,
+            endpoint=endpoint,
+            http_status=response.status_code
+        ).inc()
+        REQUEST_DURATION.labels(
+            method=method,
+            endpoint=endpoint
+        ).observe(time.perf_counter() - started)
 
-    return wrapper
+        return response
 
 
 def metrics_endpoint():
-    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+    # Under gunicorn each worker writes to PROMETHEUS_MULTIPROC_DIR; aggregate
+    # all workers so a scrape doesn't only see whichever one answered.
+    if Config.PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(TopMoviesCollector())
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(REGISTRY), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,70 @@
+"""Fast JSON encoding shared by API responses and Redis cache payloads.
+
+Backed by orjson, which serializes datetime/date/UUID and dict subclasses
+such as psycopg2's RealDictRow natively; Decimal (NUMERIC columns like
+movies.rating) is converted to float here.
+
+API responses keep the output of Flask's default provider instead: dates in
+RFC 822 format ('Tue, 02 Jan 2024 03:04:05 GMT') and Decimal as a string.
+"""
+from datetime import date
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+_RESPONSE_OPTIONS = _OPTIONS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _response_default(obj):
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _default(obj)
+
+
+def dumps(obj):
+    """Serialize to UTF-8 bytes."""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def dumps_response(obj):
+    """Serialize to UTF-8 bytes the way Flask's default provider would."""
+    return orjson.dumps(obj, default=_response_default, option=_RESPONSE_OPTIONS)
+
+
+def dumps_str(obj):
+    return dumps(obj).decode('utf-8')
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider used by jsonify() and request.get_json()."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_response(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_response(obj), mimetype=self.mimetype)
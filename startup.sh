@@ -5,22 +5,30 @@ echo "  PostgreSQL: ${POSTGRES_HOST}"
 echo "  S3 Bucket: ${S3_BUCKET_NAME}"
 echo "  Meilisearch: ${MEILISEARCH_HOST:-10.0.2.242}:${MEILISEARCH_PORT:-7700}"
 
-python3 /app/init_data.py || echo "Data initialization failed, continuing..."
+# Data init runs beside gunicorn instead of before it: the server takes
+# traffic at once, /api/* and /ready answer 503 until the Postgres sync is
+# done. A failed init (RDS not reachable yet, say) is retried with a backoff
+# while /health stays green, so a database outage never restarts the task.
+# init_data.py runs S3 and the Meilisearch wait alongside Postgres, then
+# applies the same changes to Meilisearch. The Redis warm-up follows it
+# (paced, lock-protected). No --invalidate: init_data.py already dropped
+# exactly the entries its sync made stale.
+export STARTUP_STATUS_FILE="${STARTUP_STATUS_FILE:-/tmp/startup_status.json}"
+rm -f "${STARTUP_STATUS_FILE}"
+(
+    delay=10
+    until python3 /app/init_data.py; do
+        echo "Data initialization failed, retrying in ${delay}s..."
+        sleep "${delay}"
+        delay=$(( delay * 2 > 300 ? 300 : delay * 2 ))
+    done
+    python3 /app/cache_warmup.py
+) &
 
-MEILI_HOST="${MEILISEARCH_HOST:-10.0.2.242}"
-MEILI_PORT="${MEILISEARCH_PORT:-7700}"
-MEILI_URL="http://${MEILI_HOST}:${MEILI_PORT}"
+# Prometheus multiprocess mode: every gunicorn worker writes its samples here
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
 
-echo "Waiting for Meilisearch at ${MEILI_URL}..."
-for i in $(seq 1 30); do
-    if curl -s --connect-timeout 3 "${MEILI_URL}/health" > /dev/null 2>&1; then
-        echo "Meilisearch is ready (attempt $i)"
-        echo "Indexing movies..."
-        python3 -c "from database.meilisearch_sync import index_all_movies; index_all_movies()" || echo "Meilisearch indexing failed"
-        break
-    fi
-    echo "  attempt $i/30 — not ready, waiting 5s..."
-    sleep 5
-done
-
-exec python3 /app/app.py
+cd /app
+exec gunicorn --config /app/gunicorn.conf.py app:app
@@ -0,0 +1,66 @@
+"""Startup progress shared between init_data.py and the web workers.
+
+startup.sh starts gunicorn straight away and runs init_data.py beside it;
+init_data.py records each step here (a small JSON file written atomically)
+and /ready reports 503 until every CRITICAL_STEPS entry is 'ok'. Without
+STARTUP_STATUS_FILE (local runs) there is nothing to wait for and the gate
+is open.
+
+If init_data.py fails, startup.sh runs it again with a backoff; each attempt
+starts from reset(). The container health check stays on /health, so a
+database outage holds traffic at 503 rather than getting the task (and the
+Redis and Meilisearch containers beside it) replaced.
+"""
+import json
+import os
+import threading
+import time
+
+from config import Config
+
+CRITICAL_STEPS = ('postgres',)
+
+_lock = threading.Lock()
+
+
+def _write(status):
+    path = Config.STARTUP_STATUS_FILE
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(status, f)
+    os.replace(tmp, path)
+
+
+def read():
+    """The recorded status, or None if init has not written one yet."""
+    try:
+        with open(Config.STARTUP_STATUS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def reset(steps):
+    if not Config.STARTUP_STATUS_FILE:
+        return
+    with _lock:
+        _write({'started_at': time.time(), 'steps': {name: {'status': 'pending'} for name in steps}})
+
+
+def record(step, status, **details):
+    """Set one step's status ('running', 'ok', 'failed', 'error') plus details."""
+    if not Config.STARTUP_STATUS_FILE:
+        return
+    with _lock:
+        current = read() or {'started_at': time.time(), 'steps': {}}
+        current['steps'][step] = dict(details, status=status)
+        _write(current)
+
+
+def is_ready(status):
+    if not Config.STARTUP_STATUS_FILE:
+        return True
+    if status is None:
+        return False
+    steps = status.get('steps', {})
+    return all(steps.get(name, {}).get('status') == 'ok' for name in CRITICAL_STEPS)
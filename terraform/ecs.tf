@@ -299,6 +299,8 @@ resource "aws_ecs_task_definition" "backend" {
         }
       ]
 
+      # /health, not /ready: /ready also probes Postgres, and an RDS outage
+      # must not get this essential container (and the task) replaced
       healthCheck = {
         command     = ["CMD-SHELL", "curl -f http://localhost:5000/health || exit 1"]
         interval    = 30
@@ -325,8 +327,6 @@ resource "aws_ecs_task_definition" "backend" {
       memory            = 1024
       memoryReservation = 512
 
-      command = ["gunicorn", "--bind", "0.0.0.0:5001", "--workers", "1", "--timeout", "120", "app:app"]
-
       portMappings = [
         {
           containerPort = 5001
@@ -349,8 +349,10 @@ resource "aws_ecs_task_definition" "backend" {
           { name = "MOVIE_API_BASE_URL", value = "http://127.0.0.1:5000" },
           { name = "LAMBDA_API_URL", value = aws_apigatewayv2_api.ai_agent_control.api_endpoint },
           { name = "HEARTBEAT_INTERVAL_SECONDS", value = "30" },
+          { name = "AI_AGENT_WORKERS", value = tostring(var.ai_agent_workers) },
           { name = "AI_CHAT_MAX_REQUESTS", value = tostring(var.ai_chat_max_requests) },
           { name = "AI_CHAT_WINDOW_SECONDS", value = tostring(var.ai_chat_window_seconds) },
+          { name = "AI_CHAT_RATE_LIMIT_ALGORITHM", value = var.ai_chat_rate_limit_algorithm },
           { name = "AI_CHAT_IDLE_TIMEOUT_MINUTES", value = tostring(var.ai_chat_idle_timeout_minutes) }
         ],
         var.gemini_api_key != "" ? [
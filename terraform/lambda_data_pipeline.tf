@@ -17,11 +17,16 @@ data "archive_file" "lambda_data_pipeline" {
 
   source {
     content  = <<-PYTHON
+import codecs
+import hashlib
 import json
 import os
 import logging
 import time
-from decimal import Decimal
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
 
@@ -45,6 +50,9 @@ PG_PASSWORD = os.environ['POSTGRES_PASSWORD']
 
 MEILI_HOST = os.environ.get('MEILISEARCH_HOST', '')
 MEILI_PORT = os.environ.get('MEILISEARCH_PORT', '7700')
+MEILI_BATCH_SIZE = int(os.environ.get('MEILISEARCH_BATCH_SIZE', '1000'))
+MEILI_BATCH_CONCURRENCY = int(os.environ.get('MEILISEARCH_BATCH_CONCURRENCY', '4'))
+MEILI_TASK_TIMEOUT = float(os.environ.get('MEILISEARCH_TASK_TIMEOUT', '60'))
 
 s3 = boto3.client('s3')
 
@@ -64,87 +72,343 @@ def get_db_connection():
     )
 
 
-def ensure_tables(cursor):
+# Schema migrations: same list as database/migrations.py in the app repo
+
+MIGRATION_LOCK_ID = 7240519
+MIGRATION_LOCK_WAIT_SECONDS = 300
+
+SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _baseline(cursor):
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS movies (
             id SERIAL PRIMARY KEY,
             title VARCHAR(255) NOT NULL,
             year INTEGER NOT NULL,
             rating DECIMAL(3, 1) NOT NULL,
-            genres VARCHAR(255) NOT NULL,
+            genres TEXT[],
             director VARCHAR(255) NOT NULL,
             description TEXT NOT NULL,
             poster_filename VARCHAR(255) NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+        )
     """)
+    cursor.execute('ALTER TABLE movies ADD COLUMN IF NOT EXISTS content_hash TEXT')
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS search_queries (
             id SERIAL PRIMARY KEY,
             query VARCHAR(255) NOT NULL,
             results_count INTEGER NOT NULL,
             searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+        )
+    """)
+
+
+def _genres_array(cursor):
+    """Bring older layouts to genres TEXT[].
+
+    The app once stored a single 'genre' column; tables first created by
+    the pipeline Lambda have genres VARCHAR holding array literals.
+    """
+    cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'movies'
     """)
+    columns = dict(cursor.fetchall())
+
+    if 'genre' in columns:
+        cursor.execute('ALTER TABLE movies ADD COLUMN IF NOT EXISTS genres TEXT[]')
+        cursor.execute('UPDATE movies SET genres = ARRAY[genre] WHERE genre IS NOT NULL AND genres IS NULL')
+        cursor.execute('ALTER TABLE movies DROP COLUMN genre')
+    elif columns.get('genres') == 'character varying':
+        cursor.execute("""
+            ALTER TABLE movies
+            ALTER COLUMN genres DROP NOT NULL,
+            ALTER COLUMN genres TYPE TEXT[] USING CASE
+                WHEN genres LIKE '{%}' THEN genres::TEXT[]
+                ELSE ARRAY[genres]
+            END
+        """)
+
+
+def concurrent_index(name, definition):
+    """A step building index `name` ON `definition` without blocking writes."""
+    def step(cursor):
+        cursor.execute("""
+            SELECT i.indisvalid FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+        """, (name,))
+        row = cursor.fetchone()
+        if row and not row[0]:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        cursor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}')
+    return step
+
+
+MIGRATIONS = [
+    (1, 'baseline', _baseline, True),
+    (2, 'genres_text_array', _genres_array, True),
+    # Every listing is ORDER BY rating DESC, id LIMIT n
+    (3, 'movies_rating_index', concurrent_index('idx_movies_rating', 'movies (rating DESC, id)'), False),
+    # genres && ..., genres @> ...
+    (4, 'movies_genres_gin', concurrent_index('idx_movies_genres', 'movies USING GIN (genres)'), False),
+    # Analytics reports cover the last 7 days
+    (5, 'search_queries_searched_at', concurrent_index('idx_search_queries_searched_at',
+                                                       'search_queries (searched_at)'), False),
+]
+
+
+def _lock(cursor, wait):
+    deadline = time.monotonic() + wait
+    while True:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (MIGRATION_LOCK_ID,))
+        if cursor.fetchone()[0]:
+            return
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Another migration runner held the lock for {wait}s")
+        time.sleep(1)
+
+
+def pending(cursor):
+    cursor.execute(SCHEMA_MIGRATIONS_SQL)
+    cursor.execute('SELECT version FROM schema_migrations')
+    applied = {row[0] for row in cursor.fetchall()}
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def migrate(conn, wait=MIGRATION_LOCK_WAIT_SECONDS):
+    """Apply pending migrations on an idle connection; returns the applied names."""
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    applied = []
+    try:
+        with conn.cursor() as cursor:
+            _lock(cursor, wait)
+            try:
+                for version, name, step, in_transaction in pending(cursor):
+                    started = time.perf_counter()
+                    conn.autocommit = not in_transaction
+                    try:
+                        step(cursor)
+                        cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                                       (version, name))
+                        if in_transaction:
+                            conn.commit()
+                    except Exception:
+                        if in_transaction:
+                            conn.rollback()
+                        raise
+                    finally:
+                        conn.autocommit = True
+                    logger.info(f"Migration {version} {name} applied in {(time.perf_counter() - started) * 1000:.0f}ms")
+                    applied.append(name)
+            finally:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_ID,))
+    finally:
+        conn.autocommit = autocommit
+    return applied
+
+
+# Incremental sync: same hashing as catalog_sync.py in the app repo
+
+HASH_FIELDS = ('title', 'year', 'rating', 'genres', 'director', 'description', 'poster_filename')
+
+
+def normalize_movie(movie):
+    genres = movie.get('genres')
+    if genres is None:
+        genres = [movie['genre']] if movie.get('genre') else []
+    return {
+        'id': int(movie['id']),
+        'title': movie['title'],
+        'year': int(movie['year']),
+        'rating': round(float(movie['rating']), 1),
+        'genres': list(genres),
+        'director': movie['director'],
+        'description': movie['description'],
+        'poster_filename': movie['poster_filename'],
+    }
+
+
+def content_hash(movie):
+    canonical = json.dumps([movie[field] for field in HASH_FIELDS], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
 
 
-def sync_movies_to_postgres(movies):
-    logger.info(f"Syncing {len(movies)} movies to PostgreSQL")
-    
+def new_diff():
+    return {'new_ids': [], 'changed_ids': [], 'deleted_ids': [], 'unchanged': 0, 'received': 0}
+
+
+def classify(movies, stored_hashes, diff, force=False):
+    """Yield new/changed movies (with hashes), recording ids in diff; deleted_ids set at the end."""
+    seen = set()
+    for movie in movies:
+        movie = dict(movie, content_hash=content_hash(movie))
+        diff['received'] += 1
+        seen.add(movie['id'])
+        if movie['id'] not in stored_hashes:
+            diff['new_ids'].append(movie['id'])
+            yield movie
+        elif force or stored_hashes[movie['id']] != movie['content_hash']:
+            diff['changed_ids'].append(movie['id'])
+            yield movie
+        else:
+            diff['unchanged'] += 1
+    # Rows without a hash were added at runtime (insert_movie), not by the catalog
+    diff['deleted_ids'] = sorted(
+        movie_id for movie_id, stored in stored_hashes.items() if stored is not None and movie_id not in seen
+    )
+
+
+# Bulk write: COPY into a staging table, then one set-based upsert
+
+COPY_COLUMNS = ('id',) + HASH_FIELDS + ('content_hash',)
+
+STAGING_SQL = """
+    CREATE TEMP TABLE movies_staging (
+        id INTEGER,
+        title TEXT,
+        year INTEGER,
+        rating NUMERIC,
+        genres TEXT[],
+        director TEXT,
+        description TEXT,
+        poster_filename TEXT,
+        content_hash TEXT
+    ) ON COMMIT DROP;
+"""
+
+MERGE_SQL = """
+    INSERT INTO movies (id, title, year, rating, genres, director, description, poster_filename, content_hash)
+    SELECT id, title, year, rating, genres, director, description, poster_filename, content_hash
+    FROM movies_staging
+    ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title,
+        year = EXCLUDED.year,
+        rating = EXCLUDED.rating,
+        genres = EXCLUDED.genres,
+        director = EXCLUDED.director,
+        description = EXCLUDED.description,
+        poster_filename = EXCLUDED.poster_filename,
+        content_hash = EXCLUDED.content_hash;
+"""
+
+DELETE_SQL = "DELETE FROM movies WHERE id = ANY(%s) AND content_hash IS NOT NULL;"
+
+# COPY writes explicit ids; move the serial past them so runtime inserts cannot collide
+SEQUENCE_SQL = "SELECT setval(pg_get_serial_sequence('movies', 'id'), GREATEST((SELECT MAX(id) FROM movies), 1));"
+
+
+def copy_field(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = '{' + ','.join(
+            '"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value
+        ) + '}'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class CopyStream:
+    """File-like reader that renders COPY lines as copy_expert() reads them."""
+
+    def __init__(self, movies):
+        self.lines = ('\t'.join(copy_field(m[c]) for c in COPY_COLUMNS) + '\n' for m in movies)
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer += line
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+def sync_movies_to_postgres(movies, force=False):
+    """Stream movies through the diff into PostgreSQL; returns the sync report."""
+    logger.info("Syncing movies to PostgreSQL")
+
+    started = time.perf_counter()
     conn = get_db_connection()
     cursor = conn.cursor()
-    
+    diff = new_diff()
+
     try:
-        ensure_tables(cursor)
-        
-        values = [
-            (
-                m['id'], m['title'], m['year'], m['rating'],
-                 m.get('genres', []),
-                m['director'], m['description'], m['poster_filename']
-            )
-            for m in movies
-        ]
-        
-        cursor.executemany("""
-            INSERT INTO movies (id, title, year, rating, genres, director, description, poster_filename)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (id) DO UPDATE SET
-                title = EXCLUDED.title,
-                year = EXCLUDED.year,
-                rating = EXCLUDED.rating,
-                genres = EXCLUDED.genres,
-                director = EXCLUDED.director,
-                description = EXCLUDED.description,
-                poster_filename = EXCLUDED.poster_filename;
-        """, values)
-        
-        conn.commit()
-        
+        migrate(conn, wait=60)
+
+        cursor.execute("SELECT id, content_hash FROM movies;")
+        changed = classify((normalize_movie(m) for m in movies), dict(cursor.fetchall()), diff, force=force)
+
+        cursor.execute(STAGING_SQL)
+        cursor.copy_expert(
+            f"COPY movies_staging ({', '.join(COPY_COLUMNS)}) FROM STDIN", CopyStream(changed)
+        )
+        if not diff['received']:
+            raise ValueError("Refusing to sync an empty catalog (would delete every movie)")
+        copied = time.perf_counter()
+
+        cursor.execute(MERGE_SQL)
+        if diff['deleted_ids']:
+            cursor.execute(DELETE_SQL, (diff['deleted_ids'],))
+        cursor.execute(SEQUENCE_SQL)
         cursor.execute("SELECT COUNT(*) FROM movies;")
         total = cursor.fetchone()[0]
-        
-        logger.info(f"PostgreSQL sync complete: {total} movies total")
-        return {'status': 'ok', 'synced': len(movies), 'total': total}
-        
+        conn.commit()
+        merged = time.perf_counter()
+
+        report = {
+            'status': 'ok',
+            'received': diff['received'],
+            'new': len(diff['new_ids']),
+            'changed': len(diff['changed_ids']),
+            'deleted': len(diff['deleted_ids']),
+            'unchanged': diff['unchanged'],
+            'new_ids': diff['new_ids'],
+            'changed_ids': diff['changed_ids'],
+            'deleted_ids': diff['deleted_ids'],
+            'total': total,
+            'timings_ms': {
+                'copy': round((copied - started) * 1000, 1),
+                'merge': round((merged - copied) * 1000, 1)
+            }
+        }
+        logger.info(f"PostgreSQL sync complete: {total} movies total, "
+                    f"{report['new']} new, {report['changed']} changed, {report['deleted']} deleted")
+        return report
+
     finally:
         cursor.close()
         conn.close()
 
 
-def get_movies_from_postgres():
+def get_movies_from_postgres(ids=None):
+    """Yield movies (all, or just `ids`) through a server-side cursor, a batch at a time."""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    cursor = conn.cursor(name='meilisearch_sync')
+    cursor.itersize = MEILI_BATCH_SIZE
+
     try:
-        cursor.execute("""
-            SELECT id, title, description, poster_filename, year, rating, genres, director
-            FROM movies ORDER BY id;
-        """)
-        
-        movies = []
-        for row in cursor.fetchall():
-            movies.append({
+        columns = "id, title, description, poster_filename, year, rating, genres, director"
+        if ids is None:
+            cursor.execute(f"SELECT {columns} FROM movies ORDER BY id;")
+        else:
+            cursor.execute(f"SELECT {columns} FROM movies WHERE id = ANY(%s);", (ids,))
+
+        for row in cursor:
+            yield {
                 'id': row[0],
                 'title': row[1],
                 'description': row[2],
@@ -153,10 +417,8 @@ def get_movies_from_postgres():
                 'rating': float(row[5]),
                 'genres': row[6],
                 'director': row[7]
-            })
-        
-        return movies
-        
+            }
+
     finally:
         cursor.close()
         conn.close()
@@ -165,15 +427,82 @@ def get_movies_from_postgres():
 # S3 Functions
 
 
-def load_movies_from_s3():
-    logger.info(f"Loading movies from s3://{S3_BUCKET}/{MOVIES_KEY}")
-    
+# Streaming catalog reader: same as catalog_reader.py in the app repo.
+# JSON array or NDJSON, gzip detected by magic bytes, read in CHUNK_SIZE pieces.
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_text(fileobj, chunk_size=CHUNK_SIZE):
+    data = fileobj.read(max(chunk_size, 2))
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if data[:2] == b'\x1f\x8b' else None
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    while data:
+        text = decoder.decode(inflate.decompress(data) if inflate else data)
+        if text:
+            yield text
+        data = fileobj.read(chunk_size)
+    text = decoder.decode(inflate.flush() if inflate else b'', final=True)
+    if text:
+        yield text
+
+
+def iter_array(chunks):
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+    for chunk in chain(chunks, [None]):
+        if chunk is not None:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if chunk is None:
+                    raise
+                break
+            yield record
+    raise ValueError('Catalog JSON array is not terminated')
+
+
+def iter_lines(chunks):
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+def iter_records(fileobj, chunk_size=CHUNK_SIZE):
+    chunks = iter_text(fileobj, chunk_size)
+    head = ''
+    for chunk in chunks:
+        head += chunk
+        if head.strip():
+            break
+    head = head.lstrip()
+    if head.startswith('['):
+        yield from iter_array(chain([head[1:]], chunks))
+    else:
+        yield from iter_lines(chain([head], chunks))
+
+
+def open_movies_from_s3():
+    """The catalog object's streaming body, or None if it does not exist."""
+    logger.info(f"Streaming movies from s3://{S3_BUCKET}/{MOVIES_KEY}")
+
     try:
-        response = s3.get_object(Bucket=S3_BUCKET, Key=MOVIES_KEY)
-        content = response['Body'].read().decode('utf-8')
-        movies = json.loads(content)
-        logger.info(f"Loaded {len(movies)} movies from S3")
-        return movies
+        return s3.get_object(Bucket=S3_BUCKET, Key=MOVIES_KEY)['Body']
     except ClientError as e:
         if e.response['Error']['Code'] == 'NoSuchKey':
             logger.warning(f"Movies file not found: {MOVIES_KEY}")
@@ -186,14 +515,14 @@ def load_movies_from_s3():
 def meili_request(method, path, data=None, timeout=10):
     if not MEILI_HOST:
         return None
-    
+
     url = f"http://{MEILI_HOST}:{MEILI_PORT}{path}"
-    
+
     headers = {'Content-Type': 'application/json'}
     body = json.dumps(data).encode('utf-8') if data else None
-    
+
     req = Request(url, data=body, headers=headers, method=method)
-    
+
     try:
         with urlopen(req, timeout=timeout) as response:
             return json.loads(response.read().decode('utf-8'))
@@ -212,36 +541,6 @@ def check_meilisearch_health():
     return result is not None and result.get('status') == 'available'
 
 
-def get_indexed_movie_ids():
-    existing_ids = set()
-    
-    stats = meili_request('GET', '/indexes/movies/stats')
-    if stats is None:
-        return existing_ids, False
-    
-    limit = 1000
-    offset = 0
-    
-    while True:
-        result = meili_request('GET', f'/indexes/movies/documents?fields=id&limit={limit}&offset={offset}')
-        if result is None:
-            break
-        
-        docs = result.get('results', result) if isinstance(result, dict) else result
-        if not docs:
-            break
-        
-        for doc in docs:
-            if 'id' in doc:
-                existing_ids.add(doc['id'])
-        
-        if len(docs) < limit:
-            break
-        offset += limit
-    
-    return existing_ids, True
-
-
 def wait_for_meilisearch(max_wait=90, interval=10):
     """Wait for Meilisearch to become available after EC2/ECS boot."""
     logger.info(f"Waiting up to {max_wait}s for Meilisearch at {MEILI_HOST}:{MEILI_PORT}...")
@@ -257,37 +556,137 @@ def wait_for_meilisearch(max_wait=90, interval=10):
     return False
 
 
+# Batched document sync, same approach as database/meilisearch_sync.py
+
+MOVIES_INDEX_SETTINGS = {
+    'searchableAttributes': ['title', 'director', 'description', 'genres'],
+    'filterableAttributes': ['genres', 'year', 'rating', 'director'],
+    'sortableAttributes': ['year', 'rating', 'title']
+}
+
+
+def wait_for_task(task_uid, timeout=MEILI_TASK_TIMEOUT):
+    """Poll a Meilisearch task until it finishes, backing off from 50ms to 2s."""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        task = meili_request('GET', f'/tasks/{task_uid}')
+        if task and task.get('status') in ('succeeded', 'failed', 'canceled'):
+            return task
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Meilisearch task {task_uid} not finished after {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 2.0)
+
+
+def ensure_index():
+    task = meili_request('POST', '/indexes', {'uid': 'movies', 'primaryKey': 'id'})
+    if task:
+        wait_for_task(task['taskUid'])
+    task = meili_request('PATCH', '/indexes/movies/settings', MOVIES_INDEX_SETTINGS)
+    if task:
+        wait_for_task(task['taskUid'])
+
+
+def run_batch(kind, batch):
+    started = time.perf_counter()
+    if kind == 'upsert':
+        task = meili_request('POST', '/indexes/movies/documents?primaryKey=id', batch, timeout=30)
+    else:
+        task = meili_request('POST', '/indexes/movies/documents/delete-batch', batch, timeout=30)
+    if not task:
+        raise RuntimeError(f"Meilisearch rejected {kind} batch")
+    enqueued = time.perf_counter()
+
+    done = wait_for_task(task['taskUid'])
+    return {
+        'kind': kind,
+        'documents': len(batch),
+        'task_uid': task['taskUid'],
+        'status': done['status'],
+        'enqueue_ms': round((enqueued - started) * 1000, 1),
+        'total_ms': round((time.perf_counter() - started) * 1000, 1),
+        'task_duration': done.get('duration'),
+        'error': (done.get('error') or {}).get('message')
+    }
+
+
+def batches_of(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def batch_result(future, kind, documents):
+    try:
+        return future.result()
+    except Exception as e:
+        return {'kind': kind, 'documents': documents, 'status': 'error', 'error': str(e)}
+
+
+def sync_documents(upserts, delete_ids):
+    """Upsert/delete in MEILI_BATCH_SIZE batches, at most MEILI_BATCH_CONCURRENCY in flight.
+
+    Both arguments may be iterators; the next batch is only built when a slot frees.
+    """
+    jobs = chain((('upsert', b) for b in batches_of(upserts, MEILI_BATCH_SIZE)),
+                 (('delete', b) for b in batches_of(delete_ids, MEILI_BATCH_SIZE)))
+    counts = {'upsert': 0, 'delete': 0}
+
+    started = time.perf_counter()
+    batches = []
+    with ThreadPoolExecutor(max_workers=MEILI_BATCH_CONCURRENCY) as pool:
+        in_flight = deque()
+        for kind, batch in jobs:
+            if len(in_flight) == MEILI_BATCH_CONCURRENCY:
+                batches.append(batch_result(*in_flight.popleft()))
+            counts[kind] += len(batch)
+            in_flight.append((pool.submit(run_batch, kind, batch), kind, len(batch)))
+        while in_flight:
+            batches.append(batch_result(*in_flight.popleft()))
+
+    failed = sum(1 for b in batches if b['status'] != 'succeeded')
+    return {
+        'status': 'error' if failed else 'ok',
+        'upserted': counts['upsert'],
+        'deleted': counts['delete'],
+        'failed_batches': failed,
+        'seconds': round(time.perf_counter() - started, 3),
+        'batches': batches
+    }
+
+
 def reindex_meilisearch(movies):
+    """Upsert every movie (index missing or out of step with the table)."""
+    logger.info("Reindexing all movies into Meilisearch")
+    if meili_request('GET', '/indexes/movies') is None:
+        ensure_index()
+    return dict(sync_documents(movies, []), mode='full')
+
+
+def sync_meilisearch_changes(report):
+    """Push only the synced deltas; fall back to reindex_meilisearch if the index drifted."""
     if not MEILI_HOST:
         logger.info("Meilisearch not configured, skipping")
         return {'status': 'skipped', 'reason': 'not_configured'}
-    
+
     if not wait_for_meilisearch():
         logger.warning("Meilisearch not accessible after waiting")
         return {'status': 'skipped', 'reason': 'not_accessible'}
-    
-    logger.info("Reindexing Meilisearch...")
-    
-    existing_ids, index_exists = get_indexed_movie_ids()
-    
-    if not index_exists:
-        meili_request('POST', '/indexes', {'uid': 'movies', 'primaryKey': 'id'})
-        meili_request('PUT', '/indexes/movies/settings/searchable-attributes',
-                      ['title', 'description', 'director', 'genres'])
-    
-    missing_movies = [m for m in movies if m['id'] not in existing_ids]
-    
-    if not missing_movies:
-        logger.info("Meilisearch index is up to date")
-        return {'status': 'ok', 'indexed': 0, 'message': 'already_up_to_date'}
-    
-    logger.info(f"Indexing {len(missing_movies)} new movies")
-    result = meili_request('POST', '/indexes/movies/documents', missing_movies, timeout=30)
-    
-    if result:
-        return {'status': 'ok', 'indexed': len(missing_movies), 'task': result.get('taskUid')}
-    
-    return {'status': 'error', 'message': 'indexing_failed'}
+
+    stats = meili_request('GET', '/indexes/movies/stats')
+    if stats is None or stats.get('numberOfDocuments') != report['total'] - report['new'] + report['deleted']:
+        # Index missing or out of step with the table: repair from Postgres
+        return reindex_meilisearch(get_movies_from_postgres())
+
+    ids = report['new_ids'] + report['changed_ids']
+    upserts = get_movies_from_postgres(ids) if ids else []
+    return dict(sync_documents(upserts, report['deleted_ids']), mode='incremental')
 
 
 # Pipeline Actions
@@ -296,33 +695,43 @@ def run_full_sync(force=False):
     results = {
         's3': {'status': 'pending'},
         'postgres': {'status': 'pending'},
-        'meilisearch': {'status': 'pending'}
+        'meilisearch': {'status': 'pending'},
+        'timings_ms': {}
     }
-    
-    # Step 1: Load movies from S3
-    movies = load_movies_from_s3()
-    if movies is None:
+    timings = results['timings_ms']
+
+    # Step 1: Open the catalog; it is streamed, never loaded whole
+    started = time.perf_counter()
+    body = open_movies_from_s3()
+    timings['s3'] = round((time.perf_counter() - started) * 1000, 1)
+    if body is None:
         results['s3'] = {'status': 'error', 'message': 'movies.json not found'}
         return results
-    
-    results['s3'] = {'status': 'ok', 'movies_count': len(movies)}
-    
-    # Step 2: Sync to PostgreSQL
+
+    results['s3'] = {'status': 'ok', 'key': MOVIES_KEY}
+
+    # Step 2: Diff against PostgreSQL and write only the deltas
+    started = time.perf_counter()
     try:
-        results['postgres'] = sync_movies_to_postgres(movies)
+        results['postgres'] = sync_movies_to_postgres(iter_records(body), force=force)
+        results['s3']['movies_count'] = results['postgres']['received']
     except Exception as e:
         logger.error(f"PostgreSQL sync failed: {e}")
         results['postgres'] = {'status': 'error', 'message': str(e)}
         return results
-    
-    # Step 3: Reindex Meilisearch (get fresh data from DB)
+    finally:
+        body.close()
+        timings['postgres'] = round((time.perf_counter() - started) * 1000, 1)
+
+    # Step 3: Apply the same deltas to Meilisearch
+    started = time.perf_counter()
     try:
-        db_movies = get_movies_from_postgres()
-        results['meilisearch'] = reindex_meilisearch(db_movies)
+        results['meilisearch'] = sync_meilisearch_changes(results['postgres'])
     except Exception as e:
-        logger.error(f"Meilisearch reindex failed: {e}")
+        logger.error(f"Meilisearch sync failed: {e}")
         results['meilisearch'] = {'status': 'error', 'message': str(e)}
-    
+    timings['meilisearch'] = round((time.perf_counter() - started) * 1000, 1)
+
     return results
 
 
@@ -332,7 +741,7 @@ def get_pipeline_status():
         'postgres': {'status': 'unknown'},
         'meilisearch': {'status': 'unknown'}
     }
-    
+
     # Check S3
     try:
         s3.head_object(Bucket=S3_BUCKET, Key=MOVIES_KEY)
@@ -342,7 +751,7 @@ def get_pipeline_status():
             status['s3'] = {'status': 'missing', 'message': 'movies.json not found'}
         else:
             status['s3'] = {'status': 'error', 'message': str(e)}
-    
+
     # Check PostgreSQL
     try:
         conn = get_db_connection()
@@ -354,7 +763,7 @@ def get_pipeline_status():
         status['postgres'] = {'status': 'ok', 'movies_count': count}
     except Exception as e:
         status['postgres'] = {'status': 'error', 'message': str(e)}
-    
+
     # Check Meilisearch
     if MEILI_HOST:
         if check_meilisearch_health():
@@ -370,17 +779,18 @@ def get_pipeline_status():
             status['meilisearch'] = {'status': 'unreachable'}
     else:
         status['meilisearch'] = {'status': 'not_configured'}
-    
+
     return status
 
+
 # Lambda Handler
 
 def handler(event, context):
     logger.info(f"Event: {json.dumps(event)}")
-    
+
     action = 'sync'
     source = 'unknown'
-    
+
     # Determine action from event source
     if 'Records' in event:
         # S3 Event
@@ -389,48 +799,48 @@ def handler(event, context):
         if record.get('eventSource') == 'aws:s3':
             key = record['s3']['object']['key']
             logger.info(f"S3 event for key: {key}")
-            
+
             if key == MOVIES_KEY or key.endswith('movies.json'):
                 action = 'sync'
             else:
                 logger.info(f"Ignoring S3 event for {key}")
                 return {'statusCode': 200, 'body': json.dumps({'status': 'ignored', 'key': key})}
-    
+
     elif 'requestContext' in event:
         # API Gateway (if added later)
         source = 'api'
         path = event.get('rawPath', event.get('path', ''))
         method = event.get('requestContext', {}).get('http', {}).get('method', 'GET')
-        
+
         if '/sync' in path and method == 'POST':
             action = 'sync'
         elif '/status' in path:
             action = 'status'
         else:
             action = 'status'
-    
+
     elif event.get('source') == 'aws.events':
         # EventBridge scheduled event
         source = 'eventbridge'
         action = event.get('action', 'sync')
-    
+
     else:
         # Direct invocation (from Flask via boto3)
         source = 'direct'
         action = event.get('action', 'sync')
-    
+
     logger.info(f"Action: {action}, Source: {source}")
-    
+
     try:
         if action == 'sync':
-            result = run_full_sync()
+            result = run_full_sync(force=bool(event.get('force', False)))
         elif action == 'status':
             result = get_pipeline_status()
         else:
             result = {'error': f'Unknown action: {action}'}
-        
+
         result['_meta'] = {'action': action, 'source': source}
-        
+
         return {
             'statusCode': 200,
             'headers': {
@@ -439,7 +849,7 @@ def handler(event, context):
             },
             'body': json.dumps(result, default=str)
         }
-        
+
     except Exception as e:
         logger.error(f"Pipeline error: {e}", exc_info=True)
         return {
@@ -3,6 +3,7 @@ import boto3
 import os
 import logging
 import base64
+import threading
 from datetime import datetime, timezone
 from decimal import Decimal
 from urllib.request import Request, urlopen
@@ -12,9 +13,20 @@ from botocore.exceptions import ClientError, WaiterError
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-ec2 = boto3.client('ec2')
-dynamodb = boto3.resource('dynamodb')
-ssm = boto3.client('ssm')
+# Clients are built on first use (each costs tens of ms on a cold start and
+# most actions need only one) and reused by warm invocations.
+_aws = {}
+_aws_lock = threading.Lock()
+
+
+def aws(service, kind='client'):
+    key = (service, kind)
+    if key not in _aws:
+        with _aws_lock:
+            if key not in _aws:
+                _aws[key] = getattr(boto3, kind)(service)
+    return _aws[key]
+
 
 AI_AGENT_INSTANCE_ID = os.environ['AI_AGENT_INSTANCE_ID']
 DYNAMODB_TABLE = os.environ['DYNAMODB_TABLE']
@@ -22,12 +34,12 @@ HEARTBEAT_TIMEOUT = int(os.environ.get('HEARTBEAT_TIMEOUT_MINUTES', '5'))
 
 
 def get_table():
-    return dynamodb.Table(DYNAMODB_TABLE)
+    return aws('dynamodb', 'resource').Table(DYNAMODB_TABLE)
 
 
 def get_instance_state():
     try:
-        response = ec2.describe_instances(InstanceIds=[AI_AGENT_INSTANCE_ID])
+        response = aws('ec2').describe_instances(InstanceIds=[AI_AGENT_INSTANCE_ID])
         if response['Reservations']:
             instance = response['Reservations'][0]['Instances'][0]
             state_info = {
@@ -69,9 +81,9 @@ def start_ai_agent():
             }
 
         logger.info(f"Starting instance {AI_AGENT_INSTANCE_ID}")
-        ec2.start_instances(InstanceIds=[AI_AGENT_INSTANCE_ID])
+        aws('ec2').start_instances(InstanceIds=[AI_AGENT_INSTANCE_ID])
 
-        waiter = ec2.get_waiter('instance_running')
+        waiter = aws('ec2').get_waiter('instance_running')
         try:
             waiter.wait(
                 InstanceIds=[AI_AGENT_INSTANCE_ID],
@@ -130,9 +142,9 @@ def stop_ai_agent():
             }
 
         logger.info(f"Stopping instance {AI_AGENT_INSTANCE_ID}")
-        ec2.stop_instances(InstanceIds=[AI_AGENT_INSTANCE_ID])
+        aws('ec2').stop_instances(InstanceIds=[AI_AGENT_INSTANCE_ID])
 
-        waiter = ec2.get_waiter('instance_stopped')
+        waiter = aws('ec2').get_waiter('instance_stopped')
         try:
             waiter.wait(
                 InstanceIds=[AI_AGENT_INSTANCE_ID],
@@ -312,7 +324,7 @@ def get_status():
 
 def find_ai_agent_instance():
     try:
-        response = ec2.describe_instances(
+        response = aws('ec2').describe_instances(
             Filters=[
                 {'Name': 'tag:Role', 'Values': ['ai-agent']},
                 {'Name': 'instance-state-name', 'Values': ['running']}
@@ -348,7 +360,7 @@ def deploy_ai_agent(env_vars_b64):
     ]
 
     try:
-        response = ssm.send_command(
+        response = aws('ssm').send_command(
             InstanceIds=[instance_id],
             DocumentName="AWS-RunShellScript",
             Parameters={'commands': commands},
@@ -358,14 +370,14 @@ def deploy_ai_agent(env_vars_b64):
         command_id = response['Command']['CommandId']
         logger.info(f"SSM command sent: {command_id}")
 
-        waiter = ssm.get_waiter('command_executed')
+        waiter = aws('ssm').get_waiter('command_executed')
         waiter.wait(
             CommandId=command_id,
             InstanceId=instance_id,
             WaiterConfig={'Delay': 5, 'MaxAttempts': 60}
         )
 
-        output = ssm.get_command_invocation(
+        output = aws('ssm').get_command_invocation(
             CommandId=command_id,
             InstanceId=instance_id
         )
@@ -293,6 +293,12 @@ variable "ai_chat_window_seconds" {
   default     = 60
 }
 
+variable "ai_chat_rate_limit_algorithm" {
+  description = "AI chat rate limiter: sliding_window (exact) or token_bucket (O(1) memory, bursty)"
+  type        = string
+  default     = "sliding_window"
+}
+
 variable "ai_chat_idle_timeout_minutes" {
   description = "Minutes of inactivity before shutting down AI agent instance"
   type        = number
@@ -413,6 +419,12 @@ variable "ai_agent_image" {
   default     = "ghcr.io/miracleqxz/k8s-flask-app:ai-agent"
 }
 
+variable "ai_agent_workers" {
+  description = "Uvicorn worker processes in the AI agent container (each runs its own event loop)"
+  type        = number
+  default     = 2
+}
+
 variable "gemini_api_key" {
   description = "API key for Google Gemini API (AI chat)"
   type        = string
@@ -0,0 +1,30 @@
+"""Load the agent's copies of web-app modules and compare them with the originals.
+
+The agent image is built from ai_agent/ alone, so instrumentation.py and
+profiler.py exist twice. `import profiler` in a test is the web app's copy
+(pytest.ini puts the repo root first); agent_module() loads ai_agent's by path.
+"""
+import ast
+import importlib.util
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def agent_module(name):
+    module_name = f'ai_agent_{name}'
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT_DIR, 'ai_agent', f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return sys.modules[module_name]
+
+
+def definition_source(path, name):
+    """Source of the top-level def/class `name` in the file at `path`."""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    node = next(n for n in ast.parse(source).body if getattr(n, 'name', None) == name)
+    return ast.get_source_segment(source, node)
@@ -0,0 +1,33 @@
+import random
+
+from benchmarks import report
+from benchmarks.catalog import Catalog
+from benchmarks.standins import FakeMeiliIndex
+from benchmarks.workloads import Workload
+
+
+def test_percentiles_and_regressions():
+    samples = [(ms / 1000.0, ms != 100) for ms in range(1, 101)]
+    summary = report.summarize(samples, elapsed=10)
+
+    assert summary['count'] == 100
+    assert summary['errors'] == 1
+    assert summary['rps'] == 10
+    assert (summary['p50_ms'], summary['p99_ms']) == (50, 99)
+
+    baseline = {'operations': {'search': summary}}
+    slower = {'operations': {'search': dict(summary, p95_ms=summary['p95_ms'] * 1.5, rps=5)}}
+    assert report.compare({'operations': {'search': summary}}, baseline) == []
+    assert len(report.compare(slower, baseline)) == 2
+
+
+def test_workload_and_fake_search():
+    catalog = Catalog(seed=3)
+    workload = Workload('mixed', catalog)
+    first = [workload.next_request(random.Random(7)).path for _ in range(5)]
+    assert first == [workload.next_request(random.Random(7)).path for _ in range(5)]
+    assert workload.services == {'main', 'agent'}
+
+    index = FakeMeiliIndex('movies', latency=0, documents=catalog.movies)
+    hits = index.search('godf', {'limit': 5})['hits']
+    assert hits and 'Godfather' in hits[0]['title']
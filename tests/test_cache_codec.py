@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import pytest
+
+from config import Config
+from database import cache_codec
+
+
+def test_round_trip_compresses_large_payloads():
+    results = [{'id': i, 'rating': Decimal('8.1'), 'description': 'A long story. ' * 40} for i in range(20)]
+
+    encoded = cache_codec.encode(results, 'search')
+
+    assert encoded[0] == cache_codec.MAGIC
+    assert encoded[3] != cache_codec.COMPRESSION_NONE
+    assert len(encoded) < len(cache_codec.serialization.dumps(results))
+    assert cache_codec.decode(encoded)[0]['rating'] == 8.1
+
+
+def test_reads_legacy_values():
+    assert cache_codec.decode('{"title": "Heat"}') == {'title': 'Heat'}
+    assert cache_codec.decode_blob(b'\xff\xd8\xff\xe0jpeg') == b'\xff\xd8\xff\xe0jpeg'
+
+
+def test_json_codec_writes_legacy_format(monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_CODEC', 'json')
+
+    assert cache_codec.encode({'id': 1}, 'movie') == b'{"id":1}'
+
+
+def test_msgpack_path_serializes_once(monkeypatch):
+    if cache_codec.msgpack is None:
+        pytest.skip('msgpack not installed')
+
+    def fail(obj):
+        raise AssertionError('value was also serialized to JSON')
+
+    monkeypatch.setattr(cache_codec.serialization, 'dumps', fail)
+    assert cache_codec.decode(cache_codec.encode({'id': 1}, 'movie')) == {'id': 1}
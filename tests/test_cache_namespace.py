@@ -0,0 +1,14 @@
+from database import cache_namespace
+
+
+def test_keys_embed_generation():
+    key = cache_namespace.make_key('search', 3, 'the matrix')
+
+    assert key == 'search:g3:the matrix'
+    assert cache_namespace.key_generation('search', key.encode()) == 3
+
+
+def test_pre_namespace_keys_have_no_generation():
+    assert cache_namespace.key_generation('search', b'search:the matrix') is None
+    assert cache_namespace.key_generation('search', 'search:gone girl') is None
+    assert cache_namespace.index_generation('movie', b'cache:index:movie:7') == 7
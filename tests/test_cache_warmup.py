@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+import cache_warmup
+from cache_warmup import Pacer
+from database import redis_lock
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+def test_pacer_spaces_calls():
+    pacer = Pacer(rate=50)
+
+    start = time.monotonic()
+    for _ in range(5):
+        pacer.wait()
+
+    # First call is immediate, the next four wait 20ms each
+    assert time.monotonic() - start >= 0.075
+
+
+def test_lock_is_released_only_by_its_holder():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    token = redis_lock.acquire(client, 'lock', 60)
+    assert token and redis_lock.acquire(client, 'lock', 60) is None
+
+    # The holder outlived the TTL and another run took the lock
+    client.delete('lock')
+    other = redis_lock.acquire(client, 'lock', 60)
+    assert not redis_lock.release(client, 'lock', token)
+    assert client.get('lock') == other
+    assert redis_lock.release(client, 'lock', other) and client.get('lock') is None
+
+
+def test_warmup_keeps_a_lock_taken_over_by_another_run(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(cache_warmup, 'get_redis', lambda decode_responses=True: client)
+    monkeypatch.setattr(cache_warmup.Config, 'WARMUP_RATE_PER_SECOND', 0)
+
+    def slow_step(pacer, limit):
+        # This run's lock expires mid-step and another instance takes it
+        client.set(cache_warmup.LOCK_KEY, 'other')
+        return 0
+
+    for name in ('warm_searches', 'warm_movies', 'warm_posters'):
+        monkeypatch.setattr(cache_warmup, name, slow_step)
+
+    assert cache_warmup.warm_caches()['searches'] == 0
+    assert client.get(cache_warmup.LOCK_KEY) == 'other'
@@ -0,0 +1,55 @@
+import pytest
+
+import catalog_events
+from catalog_sync import invalidate_changes
+from database import cache_namespace
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(catalog_events, 'get_redis_client', lambda: client)
+    monkeypatch.setattr(cache_namespace, 'schedule_cleanup', lambda namespace: False)
+    monkeypatch.setattr(cache_namespace, '_local_generations', {})
+    return client
+
+
+def test_event_roundtrip():
+    event = {'source': 'sync', 'new': 2, 'stale': [3, 4]}
+    fields = {key.encode(): str(value).encode() for key, value in catalog_events.encode(event).items()}
+
+    assert catalog_events.decode(fields) == event
+    assert catalog_events.decode({b'stale': b'*'})['stale'] == catalog_events.ALL
+
+
+def test_sync_report_drops_stale_movies_and_retires_results(client):
+    for movie_id in (1, 2, 3):
+        cache_namespace.store(client, 'movie', str(movie_id), b'x', 60)
+
+    report = {'new': 1, 'changed': 1, 'deleted': 1, 'changed_ids': [1], 'deleted_ids': [2]}
+    assert invalidate_changes(report)
+    assert not invalidate_changes({'new': 0, 'changed': 0, 'deleted': 0})
+
+    assert [cache_namespace.fetch(client, 'movie', str(i)) for i in (1, 2, 3)] == [None, None, b'x']
+    assert cache_namespace.get_generation(client, 'search') == 1
+    assert cache_namespace.get_generation(client, 'similar') == 1
+
+    # Another worker sees the event already applied and only re-reads generations
+    (event_id, event), = catalog_events.read_events(client, '0')
+    assert event == {'source': 'sync', 'new': 1, 'stale': [1, 2]}
+    client.incr(cache_namespace.generation_key('search'))
+    assert not catalog_events.apply(client, event_id, event)
+    assert cache_namespace.get_generation(client, 'search') == 2
+    assert client.get(catalog_events.CURSOR_KEY) == event_id
+
+
+def test_large_event_retires_movie_generation(client, monkeypatch):
+    monkeypatch.setattr('config.Config.CATALOG_EVENT_MAX_IDS', 2)
+
+    catalog_events.publish(stale_ids=[1, 2, 3], source='sync')
+
+    (_, event), = catalog_events.read_events(client, '0')
+    assert event['stale'] == catalog_events.ALL
+    assert cache_namespace.get_generation(client, 'movie') == 1
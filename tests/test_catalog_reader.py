@@ -0,0 +1,26 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from catalog_reader import iter_records
+
+MOVIES = [{'id': i, 'title': f"Movie {i}", 'description': 'Line one\nline "two" é'} for i in range(50)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_reads_arrays_and_ndjson_plain_or_gzipped(chunk_size):
+    array = json.dumps(MOVIES, indent=2, ensure_ascii=False).encode('utf-8')
+    ndjson = b'\n'.join(json.dumps(m).encode('utf-8') for m in MOVIES) + b'\n'
+
+    for data in (array, gzip.compress(array), b'\xef\xbb\xbf' + array, ndjson, gzip.compress(ndjson)):
+        assert list(iter_records(io.BytesIO(data), chunk_size)) == MOVIES
+
+
+def test_truncated_catalogs_fail_instead_of_syncing_partially():
+    with pytest.raises(ValueError):
+        list(iter_records(io.BytesIO(b'[{"id": 1}, {"id": 2}'), 4))
+    with pytest.raises(ValueError):
+        list(iter_records(io.BytesIO(b'[{"id": 1}, {"id": '), 4))
+    assert list(iter_records(io.BytesIO(b'[]'))) == []
@@ -0,0 +1,117 @@
+from catalog_sync import (
+    DELETE_SQL, CatalogDiff, CopyStream, classify, content_hash, copy_line, normalize_movie, sync_catalog
+)
+
+MOVIE = {
+    'id': 1, 'title': 'Heat', 'year': 1995, 'rating': 8.3, 'genre': 'Crime',
+    'director': 'Michael Mann', 'description': 'A heist crew and a detective.', 'poster_filename': 'heat.jpg'
+}
+
+
+def test_hash_ignores_representation_but_not_content():
+    movie = normalize_movie(MOVIE)
+
+    assert movie['genres'] == ['Crime']
+    assert content_hash(movie) == content_hash(normalize_movie(dict(MOVIE, rating='8.30')))
+    assert content_hash(movie) != content_hash(dict(movie, rating=8.4))
+
+
+def diff_catalog(movies, stored, force=False):
+    diff = CatalogDiff()
+    upserts = list(classify(iter(movies), stored, diff, force=force))
+    return diff, upserts
+
+
+def test_diff_classifies_new_changed_deleted():
+    heat = normalize_movie(MOVIE)
+    alien = normalize_movie(dict(MOVIE, id=2, title='Alien'))
+    stored = {1: content_hash(heat), 2: 'stale', 3: content_hash(heat)}
+
+    diff, upserts = diff_catalog([heat, alien, dict(heat, id=4)], stored)
+    report = diff.report()
+
+    assert (report['new'], report['changed'], report['deleted'], report['unchanged']) == (1, 1, 1, 1)
+    assert report['new_ids'] == [4] and report['changed_ids'] == [2] and report['deleted_ids'] == [3]
+    assert [m['id'] for m in upserts] == [2, 4] and report['received'] == 3
+    assert not diff_catalog([heat], {1: content_hash(heat)})[0]
+    assert diff_catalog([heat], {1: content_hash(heat)}, force=True)[1]
+
+
+def test_copy_lines_escape_text_and_arrays():
+    movie = dict(normalize_movie(MOVIE), genres=['Crime', 'Say "hi"'], description='Tab\there\nand a \\ slash',
+                 content_hash='abc')
+    line = copy_line(movie)
+
+    assert line.endswith('\n') and line.count('\t') == 8 and line.count('\n') == 1
+    assert '{"Crime","Say \\\\"hi\\\\""}' in line
+    assert 'Tab\\there\\nand a \\\\ slash' in line
+
+    stream = CopyStream([movie, dict(movie, director=None)])
+    assert stream.read(10) + stream.read() == line + line.replace('Michael Mann', '\\N')
+
+
+class FakeSyncCursor:
+    """Holds the movies table as {id: content_hash}; just enough SQL for sync_catalog()."""
+
+    def __init__(self, table, statements):
+        self.table = table
+        self.statements = statements
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        if sql.startswith('SELECT id, content_hash'):
+            self.result = list(self.table.items())
+        elif sql.startswith('DELETE'):
+            # No WHERE evaluation here: the test checks the SQL itself
+            for movie_id in params[0]:
+                self.table.pop(movie_id, None)
+        elif sql.startswith('SELECT COUNT'):
+            self.result = [(len(self.table),)]
+
+    def copy_expert(self, sql, stream):
+        for line in stream.read().splitlines():
+            fields = line.split('\t')
+            self.table[int(fields[0])] = fields[-1]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+
+class FakeSyncConn:
+    def __init__(self, table):
+        self.table = table
+        self.statements = []
+
+    def cursor(self):
+        return FakeSyncCursor(self.table, self.statements)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_sync_keeps_movies_added_at_runtime():
+    heat = normalize_movie(MOVIE)
+    # 3 came from an older catalog; 50 was added through insert_movie() (no hash)
+    table = {1: content_hash(heat), 3: 'old', 50: None}
+
+    conn = FakeSyncConn(table)
+    _, report = sync_catalog(conn, [MOVIE])
+
+    assert report['deleted_ids'] == [3] and report['total'] == 2
+    assert sorted(table) == [1, 50]
+    deletes = [(sql, params) for sql, params in conn.statements if sql.startswith('DELETE')]
+    assert deletes == [(DELETE_SQL, ([3],))]
+    assert DELETE_SQL.endswith('AND content_hash IS NOT NULL')
@@ -0,0 +1,137 @@
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from database import connections
+
+pytest.importorskip('psycopg2')
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeConn:
+    closed = 0
+
+    def __init__(self, target, lag):
+        self.target = target
+        self.lag = lag
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return 0  # TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((sql, params))
+
+    def fetchone(self):
+        return (self.conn.lag,)
+
+
+class FakePool:
+    def __init__(self, target, lag=0.0):
+        self.conn = FakeConn(target, lag)
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        pass
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    monkeypatch.setattr(Config, 'POSTGRES_REPLICA_HOSTS', 'r1, r2:6432')
+    monkeypatch.setattr(Config, 'POSTGRES_PORT', 5432)
+    monkeypatch.setattr(Config, 'POSTGRES_REPLICA_MAX_LAG_SECONDS', 5.0)
+    pools = {target: FakePool(target) for target in ('primary', 'r1:5432', 'r2:6432')}
+    monkeypatch.setattr(connections, 'get_pg_pool', lambda target='primary': pools[target])
+    connections.reset_pools()
+    yield pools
+    connections.reset_pools()
+
+
+def served_by(**kwargs):
+    with connections.pg_connection(**kwargs) as conn:
+        return conn.target
+
+
+def test_replica_targets_default_the_port(pools):
+    assert connections.replica_targets() == ['r1:5432', 'r2:6432']
+
+
+def test_reads_rotate_over_replicas_and_writes_hit_primary(pools):
+    assert {served_by(read_only=True) for _ in range(4)} == {'r1:5432', 'r2:6432'}
+    assert served_by() == 'primary'
+
+    served_by(read_only=True, statement_timeout_ms=250)
+    timeouts = [params for conn in (pools['r1:5432'].conn, pools['r2:6432'].conn)
+                for sql, params in conn.statements if 'statement_timeout' in sql]
+    assert timeouts == [(250,)]
+
+
+def test_lagging_replicas_and_pinned_reads_fall_back(pools):
+    pools['r1:5432'].conn.lag = 30.0
+    assert {served_by(read_only=True) for _ in range(4)} == {'r2:6432'}
+    assert connections.replica_status()['r1:5432']['ok'] is False
+
+    pools['r2:6432'].conn.lag = 30.0
+    connections.reset_pools()
+    assert served_by(read_only=True) == 'primary'
+
+    pools['r2:6432'].conn.lag = 0.0
+    connections.reset_pools()
+    connections.pin_primary(60)
+    assert served_by(read_only=True) == 'primary'
+
+
+def test_pools_are_rebuilt_per_process(monkeypatch):
+    pytest.importorskip('redis')
+    connections.reset_pools()
+    pool = connections.get_redis_pool()
+    assert connections.get_redis_pool() is pool
+
+    # A forked worker sees a new pid and must not reuse the master's sockets
+    monkeypatch.setattr(connections.os, 'getpid', lambda: -1)
+    forked = connections.get_redis_pool()
+    assert forked is not pool and connections.get_redis_pool() is forked
+
+    connections.reset_pools()
+    assert connections.get_redis_pool() is not forked
+    connections.reset_pools()
+
+
+def test_gunicorn_post_fork_resets_pools(monkeypatch):
+    pytest.importorskip('redis')
+    started = []
+    monkeypatch.setattr('catalog_events.start_listener', lambda: started.append(1))
+    settings = runpy.run_path(os.path.join(ROOT_DIR, 'gunicorn.conf.py'))
+
+    connections.reset_pools()
+    inherited = connections.get_redis_pool()
+
+    server = SimpleNamespace(log=SimpleNamespace(info=lambda message: None))
+    settings['post_fork'](server, SimpleNamespace(pid=123))
+
+    assert connections.get_redis_pool() is not inherited
+    assert started == [1] and settings['worker_class'] == 'gthread'
+    connections.reset_pools()
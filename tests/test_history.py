@@ -0,0 +1,42 @@
+from history import (
+    build_history, compact_search_results,
+    estimate_tokens, stub_tool_response
+)
+
+
+def test_history_stays_within_budget():
+    conversation = []
+    for i in range(20):
+        conversation.append({'role': 'user', 'content': f'question {i} ' + 'x' * 200})
+        conversation.append({'role': 'assistant', 'content': 'y' * 2000})
+
+    history = build_history(conversation, token_budget=500, max_message_tokens=100, summary_tokens=60)
+
+    assert history[0][0] == 'user'
+    assert history[0][1].startswith('Earlier in this conversation the user asked:')
+    assert sum(estimate_tokens(text) for _, text in history) <= 500 + 60 + 2
+
+
+def test_short_history_is_kept_verbatim():
+    conversation = [
+        {'role': 'user', 'content': 'comedy please'},
+        {'role': 'assistant', 'content': 'Here are some comedies!'},
+    ]
+
+    assert build_history(conversation, token_budget=500) == [
+        ('user', 'comedy please'),
+        ('model', 'Here are some comedies!'),
+    ]
+
+
+def test_search_results_are_trimmed():
+    movies = [{'id': 1, 'title': 'Heat', 'year': 1995, 'rating': 8.3, 'genres': ['Crime'],
+               'director': 'Michael Mann', 'description': 'long text', 'poster_filename': 'heat.jpg'}]
+
+    compact = compact_search_results(movies)
+
+    assert compact == [{'id': 1, 'title': 'Heat', 'year': 1995, 'rating': 8.3,
+                        'genres': ['Crime'], 'director': 'Michael Mann'}]
+    assert stub_tool_response('search_movies', {'results': compact, 'count': 1}) == {
+        'count': 1, 'titles': ['Heat']
+    }
@@ -0,0 +1,73 @@
+"""Cold-start budget: what `import app` costs a fresh gunicorn master.
+
+Each run writes the slowest imports (from `python -X importtime`) to
+IMPORT_TIME_REPORT, default .pytest_cache/import-time-app.txt, so a
+regression can be traced to the module that caused it.
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative `import app` time in ms, checked against the best of three runs
+BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '400'))
+
+# Imported on first use by the code that needs them (see database/connections.py)
+DEFERRED_MODULES = ('boto3', 'botocore', 'meilisearch', 'psycopg2', 'redis', 'requests')
+
+
+def import_profile(module):
+    """[(cumulative_us, self_us, name)] for `import module` in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=ROOT_DIR, capture_output=True, text=True, timeout=60, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def write_report(rows, path, top=40):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"{'cumulative_ms':>14} {'self_ms':>9}  module\n")
+        for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+            f.write(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}\n")
+
+
+def test_app_import_time_within_budget():
+    def app_us(rows):
+        return next(cumulative for cumulative, _, name in rows if name.strip() == 'app')
+
+    best = min((import_profile('app') for _ in range(3)), key=app_us)
+    write_report(best, os.getenv('IMPORT_TIME_REPORT',
+                                 os.path.join(ROOT_DIR, '.pytest_cache', 'import-time-app.txt')))
+
+    loaded = {name.strip() for _, _, name in best}
+    assert not loaded.intersection(DEFERRED_MODULES), 'backend SDK imported at app import time'
+
+    app_ms = app_us(best) / 1000
+    assert app_ms <= BUDGET_MS, f"import app took {app_ms:.0f}ms (budget {BUDGET_MS:.0f}ms)"
+
+
+def test_agent_control_lambda_builds_clients_on_demand(monkeypatch):
+    boto3 = pytest.importorskip('boto3')
+    built = []
+    monkeypatch.setattr(boto3, 'client', lambda service, **kwargs: built.append(service) or object())
+    monkeypatch.setenv('AI_AGENT_INSTANCE_ID', 'i-123')
+    monkeypatch.setenv('DYNAMODB_TABLE', 'heartbeats')
+
+    path = os.path.join(ROOT_DIR, 'terraform', 'lambda_functions', 'ai_agent_control', 'lambda_function.py')
+    spec = importlib.util.spec_from_file_location('ai_agent_control_lambda', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert built == []
+
+    assert module.aws('ec2') is module.aws('ec2')
+    assert built == ['ec2']
@@ -0,0 +1,70 @@
+import asyncio
+
+from flask import Flask
+
+import instrumentation
+from instrumentation import instrument, timed
+from tests.agent_copies import agent_module, definition_source
+
+
+def test_server_timing_sums_calls_per_dependency():
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+
+    @instrument('postgres')
+    def load_movie():
+        return {'id': 1}
+
+    @app.route('/movie')
+    def movie():
+        load_movie()
+        load_movie()
+        with timed('redis', 'get_movie'):
+            pass
+        return 'ok'
+
+    header = app.test_client().get('/movie').headers['Server-Timing']
+
+    assert header.startswith(('postgres;dur=', 'redis;dur='))
+    assert 'postgres;dur=' in header and 'desc="2 calls"' in header
+    assert 'redis;dur=' in header
+    assert ', app;dur=' in header
+
+
+def test_timed_outside_request_only_records_metrics():
+    with timed('s3', 'get_object'):
+        pass
+
+
+def test_agent_copy_formats_server_timing_the_same_way():
+    agent = agent_module('instrumentation')
+    assert definition_source(agent.__file__, 'server_timing_header') == \
+        definition_source(instrumentation.__file__, 'server_timing_header')
+
+
+def test_agent_middleware_keeps_timings_per_request():
+    agent = agent_module('instrumentation')
+
+    async def app(scope, receive, send):
+        for _ in range(scope['calls']):
+            with agent.timed('gemini', 'generate'):
+                await asyncio.sleep(0.01)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'ok'})
+
+    async def call(calls):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await agent.ServerTimingMiddleware(app)({'type': 'http', 'calls': calls}, None, send)
+        return dict(sent[0]['headers'])[b'server-timing'].decode()
+
+    async def concurrently():
+        return await asyncio.gather(call(1), call(2))
+
+    one, two = asyncio.run(concurrently())
+    assert one.startswith('gemini;dur=') and 'calls' not in one
+    assert two.startswith('gemini;dur=') and 'desc="2 calls"' in two
+    assert ', app;dur=' in one and ', app;dur=' in two
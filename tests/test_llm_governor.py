@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_governor import (
+    AsyncLLMGovernor, LLMGovernor, LLMOverloadedError,
+    PRIORITY_CONTINUATION, PRIORITY_NEW
+)
+
+
+def test_rejects_when_queue_full():
+    governor = LLMGovernor(initial_limit=1, max_limit=1, max_queue=0)
+    governor.acquire()
+
+    with pytest.raises(LLMOverloadedError) as exc_info:
+        governor.acquire()
+
+    assert exc_info.value.reason == 'queue_full'
+    assert exc_info.value.retry_after >= 1
+    assert governor.stats()['rejected_queue_full'] == 1
+
+
+def test_deadline_exceeded_while_queued():
+    governor = LLMGovernor(initial_limit=1, max_limit=1, max_queue=4)
+    governor.acquire()
+
+    with pytest.raises(LLMOverloadedError) as exc_info:
+        governor.acquire(deadline=time.monotonic() + 0.05)
+
+    assert exc_info.value.reason == 'deadline_exceeded'
+    assert governor.stats()['queued'] == 0
+
+
+def test_continuations_are_served_before_new_requests():
+    governor = LLMGovernor(initial_limit=1, max_limit=1, max_queue=4)
+    governor.acquire()
+    order = []
+
+    def worker(name, priority):
+        governor.acquire(priority=priority)
+        order.append(name)
+        governor.release(latency=0.01)
+
+    new = threading.Thread(target=worker, args=('new', PRIORITY_NEW))
+    new.start()
+    while governor.stats()['queued'] < 1:
+        time.sleep(0.001)
+    continuation = threading.Thread(target=worker, args=('continuation', PRIORITY_CONTINUATION))
+    continuation.start()
+    while governor.stats()['queued'] < 2:
+        time.sleep(0.001)
+
+    governor.release(latency=0.01)
+    new.join(1)
+    continuation.join(1)
+
+    assert order == ['continuation', 'new']
+
+
+def test_throttling_halves_limit():
+    governor = LLMGovernor(initial_limit=8, min_limit=1, max_limit=8)
+
+    with pytest.raises(RuntimeError):
+        with governor.slot():
+            raise RuntimeError('429 RESOURCE_EXHAUSTED')
+
+    stats = governor.stats()
+    assert stats['limit'] == 4
+    assert stats['throttled'] == 1
+    assert stats['in_flight'] == 0
+
+
+def test_async_governor_rejects_after_deadline():
+    async def scenario():
+        governor = AsyncLLMGovernor(initial_limit=1, max_limit=1, max_queue=4)
+        await governor.acquire()
+        with pytest.raises(LLMOverloadedError):
+            await governor.acquire(deadline=time.monotonic() + 0.05)
+
+        waiter = asyncio.create_task(governor.acquire())
+        await asyncio.sleep(0)
+        governor.release(latency=0.01)
+        await asyncio.wait_for(waiter, 1)
+        return governor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['in_flight'] == 1
+    assert stats['rejected_deadline'] == 1
+    assert stats['queued'] == 0
+
+
+def test_cancelled_call_frees_its_slot():
+    async def scenario():
+        governor = AsyncLLMGovernor(initial_limit=1, max_limit=1, max_queue=4)
+        started = asyncio.Event()
+
+        async def call_model():
+            async with governor.slot():
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(call_model())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async with governor.slot(deadline=time.monotonic() + 1):
+            pass
+        return governor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['in_flight'] == 0
+    assert stats['errors'] == 0 and stats['throttled'] == 0
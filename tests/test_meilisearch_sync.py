@@ -0,0 +1,130 @@
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from database import meilisearch_sync
+from database.meilisearch_sync import movie_document, reindex_shadow, sync_documents
+
+
+class FakeClient:
+    """Records batches; tasks finish immediately, deleting uid 99 fails."""
+
+    def __init__(self):
+        self.calls = []
+        self.statuses = {}
+
+    def index(self, uid):
+        return self
+
+    def _enqueue(self, kind, batch):
+        uid = len(self.calls)
+        self.calls.append((kind, batch))
+        self.statuses[uid] = 'failed' if kind == 'delete' and 99 in batch else 'succeeded'
+        return SimpleNamespace(task_uid=uid)
+
+    def add_documents(self, documents, primary_key=None):
+        return self._enqueue('upsert', documents)
+
+    def delete_documents(self, ids):
+        return self._enqueue('delete', ids)
+
+    def get_task(self, uid):
+        status = self.statuses[uid]
+        error = {'message': 'boom'} if status == 'failed' else None
+        return SimpleNamespace(status=status, error=error, duration='PT0.01S')
+
+
+def test_movie_document_is_json_safe():
+    document = movie_document({'id': 1, 'title': 'Heat', 'rating': Decimal('8.3'), 'genres': None, 'extra': 1})
+
+    assert document['rating'] == 8.3 and isinstance(document['rating'], float)
+    assert document['genres'] == [] and 'extra' not in document
+
+
+def test_sync_documents_batches_and_reports_failures():
+    client = FakeClient()
+    movies = [{'id': i, 'title': f"m{i}", 'rating': 5} for i in range(5)]
+
+    result = sync_documents(movies, [7, 99], client=client, batch_size=2, concurrency=2)
+
+    assert sorted(len(batch) for kind, batch in client.calls if kind == 'upsert') == [1, 2, 2]
+    assert (result['upserted'], result['deleted']) == (5, 2)
+    assert result['status'] == 'error' and result['failed_batches'] == 1
+    assert [b['error'] for b in result['batches'] if b['status'] == 'failed'] == ['boom']
+
+    assert sync_documents([], [], client=client)['status'] == 'ok'
+
+
+class FakeIndexes:
+    """Just enough index management for reindex_shadow(); every task succeeds."""
+
+    def __init__(self, live):
+        self.indexes = {'movies': list(live)}
+
+    def _task(self):
+        return SimpleNamespace(task_uid=0)
+
+    def get_task(self, uid):
+        return SimpleNamespace(status='succeeded', error=None, duration=None)
+
+    def get_indexes(self, parameters=None):
+        return {'results': [SimpleNamespace(uid=uid) for uid in self.indexes]}
+
+    def create_index(self, uid, options=None):
+        self.indexes.setdefault(uid, [])
+        return self._task()
+
+    def delete_index(self, uid):
+        del self.indexes[uid]
+        return self._task()
+
+    def swap_indexes(self, parameters):
+        a, b = parameters[0]['indexes']
+        self.indexes[a], self.indexes[b] = self.indexes[b], self.indexes[a]
+        return self._task()
+
+    def index(self, uid):
+        docs = self.indexes[uid]
+        return SimpleNamespace(
+            update_settings=lambda settings: self._task(),
+            add_documents=lambda batch, primary_key=None: docs.extend(batch) or self._task(),
+            get_stats=lambda: {'numberOfDocuments': len(docs)},
+        )
+
+
+def test_reindex_shadow_swaps_complete_index(monkeypatch):
+    cleared = []
+    monkeypatch.setattr('database.redis_cache.clear_search_cache', lambda: cleared.append(1))
+    client = FakeIndexes(live=[{'id': 99}])
+    client.indexes['movies_stale'] = []
+
+    movies = [{'id': i, 'title': f"m{i}", 'rating': 5} for i in range(3)]
+    report = reindex_shadow(client, movies)
+
+    assert report['status'] == 'ok' and report['documents'] == 3
+    assert list(client.indexes) == ['movies']
+    assert [d['id'] for d in client.indexes['movies']] == [0, 1, 2] and cleared
+
+    report = reindex_shadow(client, [])
+    assert report['status'] == 'error' and list(client.indexes) == ['movies']
+
+
+def test_background_reindex_keeps_a_lock_taken_over_by_another_run(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr('database.connections.get_redis', lambda decode_responses=True: client)
+
+    def slow_reindex():
+        # This run's lock expires mid-reindex and another instance takes it
+        client.set(meilisearch_sync.REINDEX_LOCK_KEY, 'other')
+        return {'status': 'ok'}
+
+    monkeypatch.setattr(meilisearch_sync, 'reindex_shadow', slow_reindex)
+    assert meilisearch_sync.start_background_reindex()
+    for thread in threading.enumerate():
+        if thread.name == 'meilisearch-reindex':
+            thread.join(5)
+
+    assert client.get(meilisearch_sync.REINDEX_LOCK_KEY) == 'other'
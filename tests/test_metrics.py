@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import textwrap
+from unittest import mock
+
+from app import app
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_requests_labelled_by_url_rule_and_method():
+    client = app.test_client()
+    client.get('/health', headers={'X-Request-ID': 'abc123'})
+
+    with mock.patch('database.movie_views.get_most_viewed', return_value=[(7, 42)]):
+        body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'flask_request_count_total{endpoint="/health",http_status="200",method="GET"}' in body
+    assert 'flask_movie_views_top{movie_id="7"} 42.0' in body
+
+
+def test_multiprocess_scrape_aggregates_workers(tmp_path):
+    """Production mode: startup.sh always sets PROMETHEUS_MULTIPROC_DIR.
+
+    prometheus_client picks its value storage at import, so this runs in a
+    fresh interpreter; two processes record a request each.
+    """
+    script = textwrap.dedent("""
+        import os, sys
+        from unittest import mock
+        from app import app
+
+        client = app.test_client()
+        client.get('/health')
+        if os.fork() == 0:
+            client.get('/health')
+            os._exit(0)
+        os.wait()
+        with mock.patch('database.movie_views.get_most_viewed', return_value=[]):
+            sys.stdout.write(client.get('/metrics').get_data(as_text=True))
+    """)
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, timeout=60, check=True)
+
+    assert 'flask_request_count_total{endpoint="/health",http_status="200",method="GET"} 2.0' in result.stdout
@@ -0,0 +1,169 @@
+import ast
+import os
+
+import pytest
+
+from database import migrations
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The hot queries of movies_db / analytics_db, with sample parameters
+HOT_QUERIES = [
+    ("SELECT id FROM movies ORDER BY rating DESC, id LIMIT 20 OFFSET 40", ()),
+    ("SELECT id FROM movies WHERE genres @> ARRAY[%s]::TEXT[] ORDER BY rating DESC, id LIMIT 10", ('g3',)),
+    ("SELECT id FROM movies WHERE genres && %s ORDER BY rating DESC, id LIMIT 10", (['g1', 'g2'],)),
+    ("SELECT query, COUNT(*) FROM search_queries WHERE searched_at > NOW() - INTERVAL '7 days' GROUP BY query", ()),
+]
+
+
+# Runner code the Lambda carries besides the steps MIGRATIONS names
+RUNNER = ('SCHEMA_MIGRATIONS_SQL', '_lock', 'pending', 'migrate')
+
+
+def lambda_code():
+    """The data-pipeline Lambda's source, as terraform writes it."""
+    with open(os.path.join(ROOT_DIR, 'terraform', 'lambda_data_pipeline.tf'), encoding='utf-8') as f:
+        return f.read().split("content  = <<-PYTHON\n")[1].split("\nPYTHON")[0] + "\n"
+
+
+def migration_sources(source):
+    """{name: source} for MIGRATIONS, every definition it references and the runner.
+
+    The Lambda names its lock constants MIGRATION_LOCK_* and logs instead of
+    printing; both are normalized away.
+    """
+    tree = ast.parse(source)
+    definitions = {}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            definitions[node.name] = node
+        elif isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            definitions[node.targets[0].id] = node
+
+    names = {'MIGRATIONS', *RUNNER}
+    names.update(n.id for n in ast.walk(definitions['MIGRATIONS'])
+                 if isinstance(n, ast.Name) and n.id in definitions)
+    return {
+        name: ast.get_source_segment(source, definitions[name])
+        .replace('MIGRATION_LOCK_', 'LOCK_').replace('logger.info(', 'print(')
+        for name in names
+    }
+
+
+def test_pipeline_lambda_carries_the_same_migrations():
+    code = lambda_code()
+    with open(migrations.__file__, encoding='utf-8') as f:
+        module_code = f.read()
+
+    lambda_sources = migration_sources(code)
+    module_sources = migration_sources(module_code)
+    assert {'_baseline', '_genres_array', 'concurrent_index'} <= set(module_sources)
+    assert sorted(lambda_sources) == sorted(module_sources)
+    for name, source in module_sources.items():
+        assert lambda_sources[name] == source, name
+    assert f"MIGRATION_LOCK_ID = {migrations.LOCK_ID}\n" in code
+
+    versions = [version for version, *_ in migrations.MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.log.append((' '.join(sql.split()), self.conn.autocommit))
+        if 'pg_try_advisory_lock' in sql:
+            self.result = [(True,)]
+        elif sql.startswith('SELECT version'):
+            self.result = [(version,) for version in self.conn.applied]
+        elif sql.startswith('INSERT INTO schema_migrations'):
+            self.conn.applied.append(params[0])
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConn:
+    def __init__(self, applied):
+        self.applied = list(applied)
+        self.autocommit = False
+        self.log = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def test_migrate_applies_pending_versions_once():
+    conn = FakeConn(applied=[1, 2])
+
+    assert migrations.migrate(conn) == ['movies_rating_index', 'movies_genres_gin', 'search_queries_searched_at']
+    assert conn.autocommit is False and conn.commits == 0
+
+    creates = [(sql, autocommit) for sql, autocommit in conn.log if sql.startswith('CREATE INDEX')]
+    assert [autocommit for _, autocommit in creates] == [True, True, True]
+    assert creates[0][0] == 'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_movies_rating ON movies (rating DESC, id)'
+    assert conn.log[-1][0].startswith('SELECT pg_advisory_unlock')
+
+    assert migrations.migrate(conn) == []
+
+
+def test_hot_queries_have_an_index_path():
+    """EXPLAIN against a scratch database: set TEST_POSTGRES_DSN to run it."""
+    dsn = os.getenv('TEST_POSTGRES_DSN')
+    if not dsn:
+        pytest.skip('TEST_POSTGRES_DSN not set')
+    psycopg2 = pytest.importorskip('psycopg2')
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('CREATE SCHEMA IF NOT EXISTS migration_test')
+            cursor.execute('SET search_path TO migration_test')
+        conn.commit()
+
+        migrations.migrate(conn)
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO movies (title, year, rating, genres, director, description, poster_filename)
+                SELECT 'm' || n, 2000, (n % 100) / 10.0, ARRAY['g' || (n % 50), 'g' || (n % 7)], 'd', 'x', 'p.jpg'
+                FROM generate_series(1, 20000) n
+            """)
+            cursor.execute("""
+                INSERT INTO search_queries (query, results_count, searched_at)
+                SELECT 'q' || (n % 500), 1, NOW() - n * INTERVAL '1 minute'
+                FROM generate_series(1, 200000) n
+            """)
+            cursor.execute('ANALYZE movies')
+            cursor.execute('ANALYZE search_queries')
+            cursor.execute('SET enable_seqscan = off')
+
+            for sql, params in HOT_QUERIES:
+                cursor.execute('EXPLAIN ' + sql, params)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                assert 'Seq Scan' not in plan, f"{sql}\n{plan}"
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS migration_test CASCADE')
+        conn.commit()
+        conn.close()
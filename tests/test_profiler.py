@@ -0,0 +1,77 @@
+import threading
+import time
+
+import profiler
+from app import app
+from config import Config
+from tests.agent_copies import agent_module, definition_source
+
+# The sampler itself; only the config source and the Flask wiring differ
+SHARED = ('_frame_label', 'collapse_stack', '_thread_names', 'sample', 'format_collapsed',
+          'SlowRequestRecorder', 'profile_params', 'run_profile')
+
+
+def _busy_wait(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_returns_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_wait, args=(stop,), name='busy')
+    worker.start()
+    try:
+        stacks = profiler.sample(0.2, 100)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [stack for stack in stacks if stack.startswith('busy;')]
+    assert busy and all('_busy_wait (test_profiler.py:' in stack for stack in busy)
+
+
+def test_profile_endpoint_requires_token(monkeypatch):
+    client = app.test_client()
+    assert client.get('/debug/profile?seconds=0.1').status_code == 404
+
+    monkeypatch.setattr(Config, 'PROFILER_TOKEN', 'secret')
+    assert client.get('/debug/profile', headers={'X-Profiler-Token': 'sécret'}).status_code == 404
+    response = client.get('/debug/profile?seconds=0.1', headers={'X-Profiler-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+def test_slow_request_recorder_keeps_only_slow_requests():
+    recorder = profiler.SlowRequestRecorder(threshold_ms=50, hz=200)
+
+    recorder.start()
+    assert recorder.finish(0.01, path='/fast') is None
+
+    recorder.start()
+    time.sleep(0.1)
+    record = recorder.finish(0.1, path='/slow')
+    assert record['path'] == '/slow' and record['samples'] > 0
+    assert list(recorder.recent) == [record]
+
+
+def test_agent_copy_shares_the_sampler():
+    agent = agent_module('profiler')
+    for name in SHARED:
+        assert definition_source(agent.__file__, name) == definition_source(profiler.__file__, name), name
+
+
+def test_agent_profile_endpoint_requires_token(monkeypatch):
+    from flask import Flask
+
+    agent = agent_module('profiler')
+    agent_app = Flask(__name__)
+    agent.init_app(agent_app)
+    client = agent_app.test_client()
+    assert client.get('/debug/profile?seconds=0.1').status_code == 404
+
+    monkeypatch.setattr(agent, 'PROFILER_TOKEN', 'secret')
+    assert not agent.authorized({'X-Profiler-Token': 'wrong'})
+    assert not agent.authorized({'X-Profiler-Token': 'sécret'})
+    response = client.get('/debug/profile?seconds=0.1', headers={'X-Profiler-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
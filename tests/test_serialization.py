@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from psycopg2.extras import RealDictRow
+
+import serialization
+from app import app
+
+
+def test_dumps_handles_db_types():
+    row = RealDictRow()
+    row['id'] = 1
+    row['rating'] = Decimal('8.8')
+    row['created_at'] = datetime(2024, 1, 2, 3, 4, 5)
+
+    assert serialization.loads(serialization.dumps(row)) == {
+        'id': 1,
+        'rating': 8.8,
+        'created_at': '2024-01-02T03:04:05',
+    }
+
+
+def test_jsonify_keeps_flask_formats():
+    payload = {'rating': Decimal('7.5'), 'genres': ['Drama'],
+               'created_at': datetime(2024, 1, 2, 3, 4, 5), 'released': date(2024, 1, 2)}
+    with app.test_request_context():
+        response = app.json.response(payload)
+
+    assert response.mimetype == 'application/json'
+    assert serialization.loads(response.get_data()) == {
+        'rating': '7.5',
+        'genres': ['Drama'],
+        'created_at': 'Tue, 02 Jan 2024 03:04:05 GMT',
+        'released': 'Tue, 02 Jan 2024 00:00:00 GMT',
+    }
+    assert serialization.loads(app.json.dumps(payload)) == serialization.loads(DefaultJSONProvider(app).dumps(payload))
+
+
+def test_featured_movies_rating_is_a_number(monkeypatch):
+    row = RealDictRow()
+    row.update(id=1, title='Heat', rating=Decimal('8.3'), year=1995, genres=['Crime'], poster_filename='heat.jpg')
+    monkeypatch.setattr('app.get_all_movies', lambda: [row])
+
+    response = app.test_client().get('/api/movies/featured')
+
+    assert response.status_code == 200
+    assert b'"rating":8.3' in response.get_data()
+    assert response.get_json()['movies'][0]['rating'] == 8.3
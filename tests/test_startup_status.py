@@ -0,0 +1,51 @@
+import startup_status
+from config import Config
+
+
+def test_ready_gate_follows_critical_steps(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'STARTUP_STATUS_FILE', str(tmp_path / 'status.json'))
+    assert not startup_status.is_ready(startup_status.read())
+
+    startup_status.reset(('postgres', 's3'))
+    startup_status.record('s3', 'failed', seconds=0.1)
+    assert not startup_status.is_ready(startup_status.read())
+
+    startup_status.record('postgres', 'ok', seconds=2.5)
+    status = startup_status.read()
+    assert startup_status.is_ready(status)
+    assert status['steps']['s3'] == {'status': 'failed', 'seconds': 0.1}
+
+    monkeypatch.setattr(Config, 'STARTUP_STATUS_FILE', '')
+    assert startup_status.is_ready(None)
+
+
+def test_ready_endpoint_reports_startup(monkeypatch, tmp_path):
+    from app import app
+
+    monkeypatch.setattr(Config, 'STARTUP_STATUS_FILE', str(tmp_path / 'status.json'))
+    startup_status.reset(('postgres',))
+    startup_status.record('postgres', 'running')
+
+    response = app.test_client().get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['startup']['steps']['postgres']['status'] == 'running'
+    assert app.test_client().get('/health').status_code == 200
+
+
+def test_api_waits_for_startup(monkeypatch, tmp_path):
+    import app as app_module
+
+    monkeypatch.setattr(Config, 'STARTUP_STATUS_FILE', str(tmp_path / 'status.json'))
+    monkeypatch.setattr(app_module, '_started', False)
+    client = app_module.app.test_client()
+
+    startup_status.reset(('postgres',))
+    response = client.get('/api/movies')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '5'
+    assert response.get_json() == {'error': 'Service starting'}
+
+    # A failed attempt keeps the gate closed until startup.sh's retry succeeds
+    startup_status.record('postgres', 'error', seconds=1.0)
+    assert client.get('/api/movies').status_code == 503
+    assert client.get('/ready').status_code == 503
+    assert client.get('/health').status_code == 200
@@ -0,0 +1,37 @@
+from flask import Flask
+
+import tracing
+from instrumentation import timed
+
+
+def test_traceparent_takes_precedence_over_request_id():
+    context = tracing.context_from_headers({
+        'traceparent': '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01',
+        'X-Request-ID': 'ffffffffffffffffffffffffffffffff',
+    })
+    assert context == ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True)
+
+    trace_id, parent, _ = tracing.context_from_headers({'X-Request-ID': 'not-hex'})
+    assert len(trace_id) == 32 and parent is None
+
+
+def test_request_id_becomes_trace_id_and_reaches_sqs_attributes():
+    captured = {}
+    app = Flask(__name__)
+    tracing.init_app(app)
+
+    @app.route('/trace')
+    def _trace_view():
+        with timed('sqs', 'send_message'):
+            captured['attributes'] = tracing.sqs_message_attributes()
+        return 'ok'
+
+    trace_id = '0af7651916cd43dd8448eb211c80319c'
+    response = app.test_client().get('/trace', headers={'X-Request-ID': trace_id})
+
+    assert response.headers['X-Request-ID'] == trace_id
+    message = {'MessageAttributes': {'traceparent': captured['attributes']['traceparent']}}
+    consumer_trace, producer_span, sampled = tracing.context_from_sqs(message)
+    assert consumer_trace == trace_id and sampled
+    assert producer_span != response.headers['traceresponse'].split('-')[2]
+    assert tracing.current_span() is None
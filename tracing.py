@@ -0,0 +1,277 @@
+"""Minimal distributed tracing with W3C trace context.
+
+nginx assigns every request an X-Request-ID (32 hex chars, reused as the
+trace id) unless the client already sent one or a `traceparent`. Flask opens
+a server span per request, instrumentation.timed() opens a child span per
+dependency call, send_search_event() puts the trace context on the SQS
+message, and analytics_worker.py continues the trace in a consumer span that
+records the enqueue-to-commit lag.
+
+Finished spans are exported in OTLP/JSON span shape by a background thread,
+either appended to TRACE_EXPORT_PATH (one JSON span per line) or POSTed to a
+local collector at TRACE_OTLP_ENDPOINT (e.g. http://localhost:4318/v1/traces).
+With neither configured, ids are still propagated but spans are dropped.
+"""
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config import Config
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_HEX32 = re.compile(r'^[0-9a-f]{32}$')
+
+SPAN_KIND = {'internal': 1, 'server': 2, 'client': 3, 'producer': 4, 'consumer': 5}
+
+_current_span = ContextVar('current_span', default=None)
+
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'sampled',
+                 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name, trace_id, parent_id=None, kind='internal', sampled=True):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = {}
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self):
+        data = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND[self.kind],
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        return data
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+def parse_traceparent(value):
+    """(trace_id, parent_span_id, sampled) or None."""
+    match = _TRACEPARENT.match((value or '').strip().lower())
+    if not match or match.group(1) == '0' * 32:
+        return None
+    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+
+def context_from_headers(headers):
+    """Trace context from traceparent, falling back to a 32-hex X-Request-ID."""
+    parsed = parse_traceparent(headers.get('traceparent'))
+    if parsed:
+        return parsed
+
+    request_id = (headers.get('X-Request-ID') or '').strip().lower()
+    trace_id = request_id if _HEX32.match(request_id) else _new_id(16)
+    return trace_id, None, random.random() < Config.TRACE_SAMPLE_RATE
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def start_span(name, kind='internal', context=None):
+    """Start a span and make it current; returns (span, token) for end_span()."""
+    if context is not None:
+        trace_id, parent_id, sampled = context
+    else:
+        parent = _current_span.get()
+        if parent is None:
+            trace_id, parent_id, sampled = _new_id(16), None, random.random() < Config.TRACE_SAMPLE_RATE
+        else:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+
+    new_span = Span(name, trace_id, parent_id, kind, sampled)
+    return new_span, _current_span.set(new_span)
+
+
+def end_span(finished, token=None, error=None):
+    finished.end_ns = time.time_ns()
+    if error is not None:
+        finished.error = str(error) or type(error).__name__
+    if token is not None:
+        _current_span.reset(token)
+    if finished.sampled:
+        _exporter.export(finished)
+
+
+@contextmanager
+def span(name, kind='internal', context=None, **attributes):
+    current, token = start_span(name, kind, context)
+    current.attributes.update(attributes)
+    try:
+        yield current
+    except Exception as e:
+        end_span(current, token, error=e)
+        raise
+    else:
+        end_span(current, token)
+
+
+def child_span(name, kind='client', **attributes):
+    """Like span(), but a no-op outside a trace (background jobs, startup)."""
+    if _current_span.get() is None:
+        return _noop()
+    return span(name, kind, **attributes)
+
+
+@contextmanager
+def _noop():
+    yield None
+
+
+def sqs_message_attributes():
+    """SQS MessageAttributes carrying the current trace context."""
+    current = _current_span.get()
+    if current is None:
+        return {}
+    return {'traceparent': {'DataType': 'String', 'StringValue': current.traceparent}}
+
+
+def context_from_sqs(message):
+    """Trace context from a received SQS message, or None if it has none."""
+    attribute = message.get('MessageAttributes', {}).get('traceparent', {})
+    return parse_traceparent(attribute.get('StringValue'))
+
+
+class _Exporter:
+    """Batches finished spans on a background thread."""
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(Config.TRACE_EXPORT_PATH or Config.TRACE_OTLP_ENDPOINT)
+
+    def export(self, finished):
+        if not self.enabled:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(finished.to_otlp())
+        except queue.Full:
+            pass
+
+    def _ensure_thread(self):
+        # Per process: the preloaded gunicorn master's thread doesn't survive fork
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=10000)
+                self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + 1.0
+            while len(batch) < 512:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Trace export error: {e}", flush=True)
+
+    def _write(self, spans):
+        service = Config.TRACE_SERVICE_NAME
+        if Config.TRACE_EXPORT_PATH:
+            with open(Config.TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+                for item in spans:
+                    f.write(json.dumps(dict(item, service=service)) + '\n')
+
+        if Config.TRACE_OTLP_ENDPOINT:
+            import requests
+            payload = {'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', service)]},
+                'scopeSpans': [{'scope': {'name': 'service-checker'}, 'spans': spans}],
+            }]}
+            requests.post(Config.TRACE_OTLP_ENDPOINT, json=payload, timeout=5)
+
+
+_exporter = _Exporter()
+
+
+def init_app(app):
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_span():
+        context = context_from_headers(request.headers)
+        current, _ = start_span(f"{request.method} {request.path}", 'server', context)
+        current.set_attribute('http.method', request.method)
+        current.set_attribute('http.target', request.full_path.rstrip('?'))
+        g.trace_span = current
+
+    @app.after_request
+    def _add_trace_headers(response):
+        current = g.get('trace_span')
+        if current is not None:
+            if request.url_rule:
+                current.name = f"{request.method} {request.url_rule.rule}"
+                current.set_attribute('http.route', request.url_rule.rule)
+            current.set_attribute('http.status_code', response.status_code)
+            response.headers['X-Request-ID'] = current.trace_id
+            response.headers['traceresponse'] = current.traceparent
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        current = g.pop('trace_span', None)
+        if current is not None:
+            end_span(current, error=exc)
+            _current_span.set(None)